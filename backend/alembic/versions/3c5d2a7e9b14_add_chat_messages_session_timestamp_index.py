@@ -0,0 +1,27 @@
+"""Add chat_messages (session_id, timestamp, id) index
+
+Revision ID: 3c5d2a7e9b14
+Revises: f8c8d0529745
+Create Date: 2026-10-19 10:12:41.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5d2a7e9b14'
+down_revision: Union[str, None] = 'f8c8d0529745'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chat_messages_session_id_timestamp_id', 'chat_messages', ['session_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chat_messages_session_id_timestamp_id', table_name='chat_messages')
@@ -0,0 +1,43 @@
+"""Add portfolio_digests
+
+Revision ID: 9d41b6e2c7a3
+Revises: 3c5d2a7e9b14
+Create Date: 2026-10-19 16:02:17.514903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41b6e2c7a3'
+down_revision: Union[str, None] = '3c5d2a7e9b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('portfolio_digests',
+    sa.Column('portfolio_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('holdings_fingerprint', sa.String(), nullable=False),
+    sa.Column('total_value_inr', sa.Float(), nullable=False),
+    sa.Column('total_day_gain_inr', sa.Float(), nullable=False),
+    sa.Column('total_gain_inr', sa.Float(), nullable=False),
+    sa.Column('assets', sa.JSON(), nullable=False),
+    sa.Column('ai_summary', sa.String(), nullable=False),
+    sa.Column('generated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('portfolio_id')
+    )
+    op.create_index(op.f('ix_portfolio_digests_user_id'), 'portfolio_digests', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_portfolio_digests_user_id'), table_name='portfolio_digests')
+    op.drop_table('portfolio_digests')
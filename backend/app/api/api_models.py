@@ -74,6 +74,12 @@ class ChatMessage(Base):
     )
     sources = Column(JSON, nullable=True)
 
+    __table_args__ = (
+        Index(
+            "ix_chat_messages_session_id_timestamp_id", "session_id", "timestamp", "id"
+        ),
+    )
+
 
 class FinanceNews(Base):
     __tablename__ = "finance_news"
@@ -133,6 +139,12 @@ class Portfolio(Base):
     assets = relationship(
         "Asset", back_populates="portfolio", cascade="all, delete-orphan"
     )
+    digest = relationship(
+        "PortfolioDigest",
+        back_populates="portfolio",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
 
 
 class Asset(Base):
@@ -154,6 +166,27 @@ class Asset(Base):
     portfolio = relationship("Portfolio", back_populates="assets")
 
 
+class PortfolioDigest(Base):
+    """Precomputed valuation and AI summary of a portfolio, refreshed nightly."""
+
+    __tablename__ = "portfolio_digests"
+    portfolio_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("portfolios.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Holdings and valuation the summary was written for.
+    holdings_fingerprint = Column(String, nullable=False)
+    total_value_inr = Column(Float, nullable=False)
+    total_day_gain_inr = Column(Float, nullable=False)
+    total_gain_inr = Column(Float, nullable=False)
+    assets = Column(JSON, nullable=False)
+    ai_summary = Column(String, nullable=False)
+    generated_at = Column(DateTime(timezone=True), nullable=False)
+    portfolio = relationship("Portfolio", back_populates="digest")
+
+
 class KnowledgeBase(Base):
     __tablename__ = "knowledge_bases"
 
@@ -404,3 +437,44 @@ class NewsBase(BaseModel):
     description: str
     content: str
     sources: str
+
+
+class CAGRInput(BaseModel):
+    start_value: float = Field(..., gt=0)
+    end_value: float = Field(..., ge=0)
+    years: float = Field(..., gt=0)
+
+
+class CashFlowInput(BaseModel):
+    amount: float
+    date: datetime.date
+
+
+class XIRRInput(BaseModel):
+    cash_flows: List[CashFlowInput] = Field(..., min_length=2)
+
+
+class SIPInput(BaseModel):
+    monthly_investment: float = Field(..., gt=0)
+    annual_rate_percent: float
+    years: float = Field(..., gt=0, le=100)
+    annual_step_up_percent: float = 0.0
+
+
+class LoanInput(BaseModel):
+    principal: float = Field(..., gt=0)
+    annual_rate_percent: float = Field(..., ge=0)
+    years: float = Field(..., gt=0, le=50)
+    include_schedule: bool = False
+
+
+class CompoundInterestInput(BaseModel):
+    principal: float = Field(..., gt=0)
+    annual_rate_percent: float
+    years: float = Field(..., ge=0)
+    compounds_per_year: int = Field(1, ge=1, le=365)
+
+
+class DrawdownInput(BaseModel):
+    values: List[float] = Field(..., min_length=2)
+    labels: Optional[List[str]] = None
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.api_functions import get_current_user
+from app.api.api_models import (
+    CAGRInput,
+    CompoundInterestInput,
+    DrawdownInput,
+    LoanInput,
+    SIPInput,
+    User,
+    XIRRInput,
+)
+from app.chat_provider.utils import financial_calculators as calc
+
+calculator_router = APIRouter(prefix="/calculators")
+
+
+@calculator_router.post("/cagr")
+async def calculate_cagr(
+    input: CAGRInput, current_user: User = Depends(get_current_user)
+):
+    try:
+        return {"cagr": calc.cagr(input.start_value, input.end_value, input.years)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@calculator_router.post("/xirr")
+async def calculate_xirr(
+    input: XIRRInput, current_user: User = Depends(get_current_user)
+):
+    try:
+        return {
+            "xirr": calc.xirr(
+                [flow.amount for flow in input.cash_flows],
+                [flow.date for flow in input.cash_flows],
+            )
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@calculator_router.post("/sip")
+async def calculate_sip(
+    input: SIPInput, current_user: User = Depends(get_current_user)
+):
+    try:
+        return calc.sip_future_value(
+            input.monthly_investment,
+            input.annual_rate_percent,
+            input.years,
+            input.annual_step_up_percent,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@calculator_router.post("/emi")
+async def calculate_emi(
+    input: LoanInput, current_user: User = Depends(get_current_user)
+):
+    try:
+        schedule = calc.amortization_schedule(
+            input.principal, input.annual_rate_percent, input.years
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total_interest = float(schedule["interest"].sum())
+    response = {
+        "emi": float(schedule["emi"][0]),
+        "total_interest": total_interest,
+        "total_payment": input.principal + total_interest,
+    }
+    if input.include_schedule:
+        response["schedule"] = [
+            {
+                "month": int(month),
+                "interest": float(interest),
+                "principal": float(principal),
+                "balance": float(balance),
+            }
+            for month, interest, principal, balance in zip(
+                schedule["month"],
+                schedule["interest"],
+                schedule["principal"],
+                schedule["balance"],
+            )
+        ]
+    return response
+
+
+@calculator_router.post("/compound-interest")
+async def calculate_compound_interest(
+    input: CompoundInterestInput, current_user: User = Depends(get_current_user)
+):
+    try:
+        return calc.compound_interest(
+            input.principal,
+            input.annual_rate_percent,
+            input.years,
+            input.compounds_per_year,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@calculator_router.post("/drawdown")
+async def calculate_drawdown(
+    input: DrawdownInput, current_user: User = Depends(get_current_user)
+):
+    try:
+        return calc.max_drawdown(input.values, input.labels)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
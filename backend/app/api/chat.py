@@ -1,17 +1,58 @@
 import asyncio
 import datetime
 import json
+import os
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
 from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.api_functions import (
+    CHAT_HISTORY_CACHE_MAX_MESSAGES,
+    CHAT_HISTORY_DEFAULT_PAGE_SIZE,
+    AsyncSessionLocal,
     ChatServiceManager,
+    append_chat_history,
     get_chat_history,
     get_current_user,
     get_db,
+    redis_client,
+)
+from app.api.chat_history import decode_history_cursor, encode_history_cursor
+from app.api.chat_jobs import (
+    CHAT_EXECUTION_MODE,
+    CHAT_JOB_MAX_QUEUE_DEPTH,
+    ChatJobQueue,
+    build_job,
+    chat_jobs_enqueued,
+    chat_jobs_rejected,
+)
+from app.api.chat_runs import (
+    CHAT_RUN_DISCONNECT_GRACE_SECONDS,
+    CHAT_RUN_STALL_SECONDS,
+    TERMINAL_EVENT_TYPES,
+    ChatRunStore,
+    chat_run_resumes,
+    format_event_id,
+    new_run_id,
+    parse_event_id,
+)
+from app.api.chat_scheduler import (
+    DEEP_LANE,
+    QUICK_LANE,
+    chat_scheduler,
+    reserve_or_429,
 )
 from app.api.api_models import (
     ChatInput,
@@ -21,18 +62,292 @@ from app.api.api_models import (
 )
 from uuid import UUID as uuid_UUID
 from app.api.api_functions import token_splitter
+from app.chat_provider.service.answer_cache import ANSWER_CACHE_BYPASS_HEADER
+from app.chat_provider.service.title_service import should_generate_title
+from app.chat_provider.utils.metrics import Counter
 
+# How long to wait after the answer for a pending title before completing the
+# stream. The title is still saved if it finishes later.
+TITLE_EVENT_GRACE_SECONDS = float(os.environ.get("TITLE_EVENT_GRACE_SECONDS", 1.0))
+# How often a running graph checks whether any client is still attached.
+DISCONNECT_POLL_SECONDS = float(os.environ.get("DISCONNECT_POLL_SECONDS", 0.5))
+
+chat_runs_cancelled = Counter(
+    "zenfi_chat_runs_cancelled_total",
+    "Chat runs cancelled because no client stayed attached, by lane.",
+    ["lane"],
+)
 
 chat_router = APIRouter(prefix="/chat")
 chat_service_manager = ChatServiceManager()
+chat_run_store = ChatRunStore(redis_client)
+chat_job_queue = ChatJobQueue(redis_client)
+# Strong references to runs executing in the background.
+_chat_runs: set = set()
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+
+async def cancel_when_abandoned(run_id: str, task: asyncio.Task) -> bool:
+    """
+    Cancels `task` once no client has been attached to the run for the
+    disconnect grace period, and returns True if it did. Cancellation reaches
+    the graph's node tasks, search fan-out and HTTP fetches; blocking executor
+    jobs that already started finish in the background and their results are
+    dropped.
+    """
+    while not task.done():
+        await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        if not task.done() and not await chat_run_store.is_attached(run_id):
+            task.cancel()
+            return True
+    return False
+
+
+async def keep_run_alive(run_id: str) -> None:
+    """Refreshes the run's liveness key so followers know it is still executing."""
+    while True:
+        await chat_run_store.beat(run_id)
+        await asyncio.sleep(CHAT_RUN_STALL_SECONDS / 3)
+
+
+async def publish_quietly(run_id: str, event: dict) -> None:
+    try:
+        await chat_run_store.publish(run_id, event)
+    except Exception as e:
+        print(f"ERROR [publish_quietly]: Publishing to run {run_id}: {e}")
+
+
+async def run_chat(
+    job: dict,
+    admission,
+    title_task: Optional[asyncio.Task] = None,
+    announce: bool = True,
+) -> None:
+    """
+    Executes one chat turn (a job built by `build_job`) and publishes its SSE
+    events to the run's buffer. Runs detached from any request so clients can
+    drop and re-attach; in worker mode it runs in a chat worker process.
+    `announce=False` skips the opening events when a redelivered job already
+    published them.
+    """
+    run_id = job["run_id"]
+    session_id = job["session_id"]
+    lane = DEEP_LANE if job["is_deep_search"] else QUICK_LANE
+    full_response = ""
+    sources = []
+    watcher = None
+    heartbeat = asyncio.create_task(keep_run_alive(run_id))
+
+    async def run_graph():
+        # Hold the lane slot only while the graph runs, not while the
+        # answer is paced out to the client.
+        async with admission:
+            return [
+                token
+                async for token in chat_service_manager.stream_message(
+                    session_id,
+                    job["message"],
+                    isDeepSearch=job["is_deep_search"],
+                    user_id=job["user_id"],
+                    bypass_cache=job["bypass_cache"],
+                )
+            ]
+
+    try:
+        if announce:
+            await chat_run_store.publish(
+                run_id,
+                {"type": "session", "session_id": session_id, "run_id": run_id},
+            )
+            await chat_run_store.publish(run_id, {"type": "heartbeat"})
+        graph_task = asyncio.create_task(run_graph())
+        watcher = asyncio.create_task(cancel_when_abandoned(run_id, graph_task))
+        try:
+            tokens = await graph_task
+        finally:
+            if not watcher.done():
+                watcher.cancel()
+        for token in tokens:
+            if token:
+                parts = token_splitter.split(token)
+                for part in parts:
+                    if part:
+                        full_response += part
+                        await chat_run_store.publish(
+                            run_id, {"type": "token", "content": part}
+                        )
+                        await asyncio.sleep(0.01)
+        if full_response.strip():
+            bot_message = ChatMessage(
+                session_id=uuid.UUID(session_id),
+                sender="bot",
+                message=full_response,
+                timestamp=datetime.datetime.now(datetime.timezone.utc),
+                sources=sources,
+            )
+            async with AsyncSessionLocal() as db:
+                db.add(bot_message)
+                await db.commit()
+            await append_chat_history(bot_message)
+        if title_task is not None:
+            # shield keeps the title task running if the grace period expires.
+            try:
+                title = await asyncio.wait_for(
+                    asyncio.shield(title_task), TITLE_EVENT_GRACE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                title = None
+            if title:
+                await chat_run_store.publish(run_id, {"type": "title", "title": title})
+        await chat_run_store.publish(
+            run_id, {"type": "complete", "finishReason": "stop"}
+        )
+    except asyncio.CancelledError:
+        abandoned = (
+            watcher is not None
+            and watcher.done()
+            and not watcher.cancelled()
+            and watcher.result()
+        )
+        if not abandoned:
+            raise
+        chat_runs_cancelled.labels(lane=lane).inc()
+        print(f"DEBUG [run_chat]: Run {run_id} for session {session_id} cancelled")
+        await publish_quietly(run_id, {"type": "error", "finishReason": "cancelled"})
+    except Exception as e:
+        print(f"Streaming error: {str(e)}")
+        await publish_quietly(
+            run_id, {"type": "error", "finishReason": "error", "error": str(e)}
+        )
+    finally:
+        heartbeat.cancel()
+        admission.close()
+        await chat_run_store.finish(run_id)
+
+
+def start_chat_run(job: dict, admission, announce: bool = True) -> asyncio.Task:
+    """Runs a chat job in this process, in the background."""
+    title_task = None
+    if job["generate_title"]:
+        title_task = chat_service_manager.start_title_generation(
+            job["session_id"], job["message"]
+        )
+    task = asyncio.create_task(run_chat(job, admission, title_task, announce))
+    _chat_runs.add(task)
+    task.add_done_callback(_chat_runs.discard)
+    return task
+
+
+async def queue_has_room_or_429(lane: str) -> bool:
+    """
+    Returns False when the worker queue cannot be reached, in which case the
+    run executes in this process instead.
+    """
+    try:
+        depth = await chat_job_queue.depth()
+    except Exception as e:
+        print(f"ERROR [queue_has_room_or_429]: Falling back to inline run: {e}")
+        return False
+    if depth >= CHAT_JOB_MAX_QUEUE_DEPTH:
+        chat_jobs_rejected.labels(lane=lane, reason="queue_full").inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many chat requests, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    return True
+
+
+async def reserve_user_job_or_429(user_id, lane: str) -> bool:
+    """
+    Counts the run against the user's pending cap, shared by every worker.
+    Returns False when Redis cannot be reached, in which case the run
+    executes in this process instead.
+    """
+    try:
+        reserved = await chat_job_queue.reserve_user(user_id)
+    except Exception as e:
+        print(f"ERROR [reserve_user_job_or_429]: Falling back to inline run: {e}")
+        return False
+    if not reserved:
+        chat_jobs_rejected.labels(lane=lane, reason="user_limit").inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many chat requests in progress, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    return True
+
+
+def follow_run(request: Request, run_id: str, after: str) -> StreamingResponse:
+    """Streams a run's events after `after`, then its live events."""
+
+    async def event_stream():
+        loop = asyncio.get_running_loop()
+        touch_every = CHAT_RUN_DISCONNECT_GRACE_SECONDS / 3
+        await chat_run_store.touch(run_id)
+        touched_at = loop.time()
+        try:
+            async for stream_id, event in chat_run_store.follow(run_id, after):
+                if loop.time() - touched_at >= touch_every:
+                    await chat_run_store.touch(run_id)
+                    touched_at = loop.time()
+                if event is None:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                data = json.dumps(event, separators=(",", ":"))
+                if stream_id is None:
+                    yield f"data: {data}\n\n"
+                else:
+                    yield f"id: {format_event_id(run_id, stream_id)}\ndata: {data}\n\n"
+                if event.get("type") in TERMINAL_EVENT_TYPES:
+                    await chat_run_store.release_request(run_id)
+        except Exception as e:
+            print(f"ERROR [follow_run]: Following run {run_id}: {e}")
+            yield f'data: {{"type":"error","finishReason":"error","error":{json.dumps(str(e))}}}\n\n'
+
+    return StreamingResponse(
+        event_stream(), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+async def resume_run_or_404(
+    request: Request, current_user: User, last_event_id: str
+) -> StreamingResponse:
+    run_id, after = parse_event_id(last_event_id)
+    owner = await chat_run_store.owner(run_id)
+    if not owner or owner.get("user_id") != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Chat run not found or expired")
+    chat_run_resumes.labels(via="last_event_id").inc()
+    return follow_run(request, run_id, after)
 
 
 @chat_router.post("/stream")
 async def stream_chat(
     input_data: ChatInput,
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
+    cache_bypass: Optional[str] = Header(None, alias=ANSWER_CACHE_BYPASS_HEADER),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
 ):
+    """
+    Starts a chat turn and streams its events as SSE. Every event carries an
+    `id`; a client that loses the connection re-sends the request with that id
+    as Last-Event-ID to receive the rest of the same run. A retry of the same
+    message without the header joins the earlier run from the beginning.
+    """
+    if parse_event_id(last_event_id):
+        return await resume_run_or_404(request, current_user, last_event_id)
+
+    bypass_cache = (cache_bypass or "").strip().lower() in ("1", "true", "yes")
     try:
         session_uuid = uuid.UUID(input_data.session_id)
         isDeepResearch = input_data.isDeepSearch
@@ -52,75 +367,114 @@ async def stream_chat(
             status_code=404, detail="Session not found or not authorized"
         )
 
-    user_message = ChatMessage(
-        session_id=session.id,
-        sender="user",
-        message=input_data.message,
-        timestamp=datetime.datetime.now(datetime.timezone.utc),
+    run_id = new_run_id()
+    existing_run = await chat_run_store.claim_request(
+        str(session.id), input_data.message, run_id
     )
-    db.add(user_message)
-    await db.commit()
+    if existing_run is not None:
+        chat_run_resumes.labels(via="retry").inc()
+        return follow_run(request, existing_run, "0-0")
 
-    async def stream_generator():
-        yield f'data: {{"type":"session","session_id":{json.dumps(str(session.id))}}}\n\n'
-        full_response = ""
-        sources = []
-        try:
-            yield 'data: {"type":"heartbeat"}\n\n'
-            async for token in chat_service_manager.stream_message(
-                input_data.session_id,
-                input_data.message,
-                isDeepSearch=isDeepResearch,
-                user_id=current_user.id,
-            ):
-                if token:
-                    parts = token_splitter.split(token)
-                    for part in parts:
-                        if part:
-                            full_response += part
-                            yield f'data: {{"type":"token","content":{json.dumps(part)}}}\n\n'
-                            await asyncio.sleep(0.01)
-            if full_response.strip():
-                bot_message = ChatMessage(
-                    session_id=session.id,
-                    sender="bot",
-                    message=full_response,
-                    timestamp=datetime.datetime.now(datetime.timezone.utc),
-                    sources=sources,
-                )
-                db.add(bot_message)
-                await db.commit()
-                asyncio.create_task(
-                    get_chat_history(input_data.session_id, db, force_db=True)
+    lane = DEEP_LANE if isDeepResearch else QUICK_LANE
+    use_workers = CHAT_EXECUTION_MODE == "worker" and await queue_has_room_or_429(lane)
+    if use_workers:
+        use_workers = await reserve_user_job_or_429(current_user.id, lane)
+    admission = None
+    try:
+        if not use_workers:
+            admission = reserve_or_429(chat_scheduler, current_user.id, lane)
+
+        user_message = ChatMessage(
+            session_id=session.id,
+            sender="user",
+            message=input_data.message,
+            timestamp=datetime.datetime.now(datetime.timezone.utc),
+        )
+        db.add(user_message)
+        await db.commit()
+        await append_chat_history(user_message)
+
+        job = build_job(
+            run_id,
+            str(session.id),
+            current_user.id,
+            input_data.message,
+            isDeepResearch,
+            bypass_cache,
+            should_generate_title(session.summary, input_data.message),
+        )
+        await chat_run_store.create(
+            run_id, current_user.id, str(session.id), input_data.message
+        )
+        if use_workers:
+            try:
+                await chat_job_queue.enqueue(job)
+                chat_jobs_enqueued.labels(lane=lane).inc()
+            except Exception as e:
+                print(
+                    f"ERROR [stream_chat]: Enqueueing run {run_id}, running inline: {e}"
                 )
-            yield 'data: {"type":"complete","finishReason":"stop"}\n\n'
-        except asyncio.CancelledError:
-            yield 'data: {"type":"error","finishReason":"cancelled"}\n\n'
-        except Exception as e:
-            print(f"Streaming error: {str(e)}")
-            yield f'data: {{"type":"error","finishReason":"error","error":{json.dumps(str(e))}}}\n\n'
+                await chat_job_queue.release_user(current_user.id)
+                use_workers = False
+                admission = reserve_or_429(chat_scheduler, current_user.id, lane)
+    except BaseException:
+        # Only run_chat releases an admission once started, and only the
+        # worker's acknowledgement releases a queued job; release them here
+        # if the request fails before the run begins.
+        if admission is not None:
+            admission.close()
+        if use_workers:
+            await chat_job_queue.release_user(current_user.id)
+        raise
+    if not use_workers:
+        start_chat_run(job, admission)
+    return follow_run(request, run_id, "0-0")
 
-    return StreamingResponse(
-        stream_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+
+@chat_router.get("/runs/{run_id}/events")
+async def chat_run_events(
+    run_id: str,
+    request: Request,
+    after: str = "0-0",
+    current_user: User = Depends(get_current_user),
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+):
+    """
+    Re-attaches to a chat run, for EventSource clients. Replays events after
+    Last-Event-ID (or `after`, a stream id) and then follows the live run.
+    """
+    resume = parse_event_id(last_event_id)
+    if resume is not None and resume[0] == run_id:
+        after = resume[1]
+    return await resume_run_or_404(
+        request, current_user, format_event_id(run_id, after)
     )
 
 
 @chat_router.get("/history")
 async def get_chat_history_endpoint(
     session_id: str,
+    response: Response,
+    before: Optional[str] = None,
+    limit: int = Query(
+        CHAT_HISTORY_DEFAULT_PAGE_SIZE, ge=1, le=CHAT_HISTORY_CACHE_MAX_MESSAGES
+    ),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    """
+    Returns a page of the session's messages, oldest first. Pass the
+    X-Next-Before response header back as `before` to fetch the previous page;
+    the header is absent on the oldest page.
+    """
     try:
         session_uuid = uuid_UUID(session_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid session id format")
+    try:
+        cursor = decode_history_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
     stmt = select(ChatSession).where(
         ChatSession.id == session_uuid, ChatSession.user_id == current_user.id
     )
@@ -130,10 +484,12 @@ async def get_chat_history_endpoint(
         raise HTTPException(
             status_code=404, detail="Session not found or not authorized"
         )
-    chat_history = await get_chat_history(session_id, db)
+    chat_history = await get_chat_history(session_id, db, before=cursor, limit=limit)
+    if len(chat_history) == limit:
+        response.headers["X-Next-Before"] = encode_history_cursor(chat_history[0])
     formatted_history = [
         {
-            "id": str(uuid.uuid4()),
+            "id": str(msg.get("id") or uuid.uuid4()),
             "role": "user" if msg["sender"] == "user" else "assistant",
             "content": msg["message"],
             "timestamp": msg["timestamp"],
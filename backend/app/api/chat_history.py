@@ -0,0 +1,46 @@
+"""
+Keyset paging over a session's chat messages. Messages are ordered by
+(timestamp, id), so messages saved within the same clock tick still get a
+stable order and no page skips or repeats them. Cursors are the
+"<timestamp>_<id>" of the oldest message of the previous page.
+"""
+
+import datetime
+from typing import Optional, Tuple
+from uuid import UUID as uuid_UUID
+
+from sqlalchemy import Select, select, tuple_
+
+from app.api.api_models import ChatMessage
+
+HistoryCursor = Tuple[datetime.datetime, int]
+
+
+def encode_history_cursor(message: dict) -> str:
+    """Cursor for the page older than this serialized message."""
+    return f"{message['timestamp']}_{message['id']}"
+
+
+def decode_history_cursor(cursor: str) -> HistoryCursor:
+    """Parses a cursor from encode_history_cursor. Raises ValueError if malformed."""
+    timestamp, _, message_id = cursor.rpartition("_")
+    before = datetime.datetime.fromisoformat(timestamp)
+    if before.tzinfo is None:
+        before = before.replace(tzinfo=datetime.timezone.utc)
+    return before, int(message_id)
+
+
+def history_page_query(
+    session_id, before: Optional[HistoryCursor], limit: int
+) -> Select:
+    """Newest-first query for up to `limit` messages older than `before`."""
+    stmt = select(ChatMessage).where(
+        ChatMessage.session_id == uuid_UUID(str(session_id))
+    )
+    if before is not None:
+        stmt = stmt.where(
+            tuple_(ChatMessage.timestamp, ChatMessage.id) < tuple_(*before)
+        )
+    return stmt.order_by(ChatMessage.timestamp.desc(), ChatMessage.id.desc()).limit(
+        limit
+    )
@@ -0,0 +1,221 @@
+import json
+import os
+from typing import Dict, List, Tuple
+
+from app.api.chat_scheduler import CHAT_PER_USER_MAX_PENDING
+from app.chat_provider.utils.metrics import Counter
+
+# "inline" runs chat graphs inside the API process; "worker" enqueues them for
+# `python -m app.api.chat_worker` processes.
+CHAT_EXECUTION_MODE = os.environ.get("CHAT_EXECUTION_MODE", "inline").lower()
+CHAT_JOB_STREAM = os.environ.get("CHAT_JOB_STREAM", "chat_jobs")
+CHAT_JOB_GROUP = os.environ.get("CHAT_JOB_GROUP", "chat_workers")
+# A claimed job whose worker stops extending it for this long is handed to
+# another worker.
+CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS = int(
+    os.environ.get("CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS", 60)
+)
+CHAT_JOB_MAX_DELIVERIES = int(os.environ.get("CHAT_JOB_MAX_DELIVERIES", 3))
+CHAT_JOB_MAX_QUEUE_DEPTH = int(os.environ.get("CHAT_JOB_MAX_QUEUE_DEPTH", 200))
+CHAT_JOB_STREAM_MAXLEN = 100000
+# Per-user job counts expire after this long without a new job, so counts of
+# jobs that were lost without an acknowledgement heal on their own.
+CHAT_JOB_USER_PENDING_TTL_SECONDS = int(
+    os.environ.get("CHAT_JOB_USER_PENDING_TTL_SECONDS", 3600)
+)
+
+# Counts a job against the user's cap, refusing it when the cap is reached.
+_RESERVE_USER_SCRIPT = """
+local pending = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+if pending > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+_RELEASE_USER_SCRIPT = """
+if redis.call('DECR', KEYS[1]) <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return 1
+"""
+
+chat_jobs_enqueued = Counter(
+    "zenfi_chat_jobs_enqueued_total",
+    "Chat runs handed to the worker pool, by lane.",
+    ["lane"],
+)
+chat_jobs_rejected = Counter(
+    "zenfi_chat_jobs_rejected_total",
+    "Chat runs rejected before enqueueing, by lane and reason "
+    "(queue_full, user_limit).",
+    ["lane", "reason"],
+)
+chat_jobs_claimed = Counter(
+    "zenfi_chat_jobs_claimed_total",
+    "Chat jobs claimed by a worker, by how (new, reclaimed).",
+    ["via"],
+)
+chat_jobs_finished = Counter(
+    "zenfi_chat_jobs_finished_total",
+    "Chat jobs acknowledged by a worker, by outcome.",
+    ["outcome"],
+)
+
+
+def _user_pending_key(user_id) -> str:
+    return f"chat_jobs:pending:{user_id}"
+
+
+class ChatJobQueue:
+    """
+    At-least-once chat job queue on a Redis stream with a consumer group.
+    Workers claim jobs with XREADGROUP, keep them by extending their claim
+    while running, and acknowledge them when done. Jobs left pending longer
+    than the visibility timeout (a crashed or stuck worker) are taken over by
+    another worker with XAUTOCLAIM.
+
+    Each user's queued and running jobs are counted in Redis, so the per-user
+    cap holds across all workers rather than per worker process.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        stream: str = CHAT_JOB_STREAM,
+        group: str = CHAT_JOB_GROUP,
+        visibility_timeout_seconds: int = CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS,
+    ):
+        self.redis = redis_client
+        self.stream = stream
+        self.group = group
+        self.visibility_timeout_ms = visibility_timeout_seconds * 1000
+        self._group_ready = False
+
+    async def ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            await self.redis.xgroup_create(
+                self.stream, self.group, id="0", mkstream=True
+            )
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def depth(self) -> int:
+        """Jobs not yet claimed plus jobs claimed but not acknowledged."""
+        await self.ensure_group()
+        for group in await self.redis.xinfo_groups(self.stream):
+            if group["name"] == self.group:
+                return int(group.get("lag") or 0) + int(group.get("pending") or 0)
+        return int(await self.redis.xlen(self.stream))
+
+    async def reserve_user(
+        self, user_id, limit: int = CHAT_PER_USER_MAX_PENDING
+    ) -> bool:
+        """Counts one more job for the user. Returns False if the cap is reached."""
+        reserved = await self.redis.eval(
+            _RESERVE_USER_SCRIPT,
+            1,
+            _user_pending_key(user_id),
+            limit,
+            CHAT_JOB_USER_PENDING_TTL_SECONDS,
+        )
+        return bool(int(reserved))
+
+    async def release_user(self, user_id) -> None:
+        """Gives back a job counted by reserve_user."""
+        try:
+            await self.redis.eval(_RELEASE_USER_SCRIPT, 1, _user_pending_key(user_id))
+        except Exception as e:
+            print(f"ERROR [ChatJobQueue]: Releasing job of user {user_id}: {e}")
+
+    async def enqueue(self, job: dict) -> str:
+        return await self.redis.xadd(
+            self.stream,
+            {"job": json.dumps(job)},
+            maxlen=CHAT_JOB_STREAM_MAXLEN,
+            approximate=True,
+        )
+
+    async def claim(
+        self, consumer: str, count: int, block_ms: int = 5000
+    ) -> List[Tuple[str, dict, int]]:
+        """
+        Returns up to `count` (job_id, job, deliveries) tuples, taking over
+        expired claims of other workers before reading new jobs.
+        """
+        claimed: List[Tuple[str, dict, int]] = []
+        _, entries, *_ = await self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=self.visibility_timeout_ms,
+            start_id="0-0",
+            count=count,
+        )
+        for job_id, fields in entries:
+            if not fields:
+                # Trimmed from the stream while pending; nothing left to run.
+                await self.ack(job_id)
+                continue
+            chat_jobs_claimed.labels(via="reclaimed").inc()
+            claimed.append(
+                (job_id, json.loads(fields["job"]), await self._deliveries(job_id))
+            )
+        if claimed:
+            return claimed
+
+        response = await self.redis.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        for _, entries in response or []:
+            for job_id, fields in entries:
+                chat_jobs_claimed.labels(via="new").inc()
+                claimed.append((job_id, json.loads(fields["job"]), 1))
+        return claimed
+
+    async def _deliveries(self, job_id: str) -> int:
+        pending = await self.redis.xpending_range(
+            self.stream, self.group, min=job_id, max=job_id, count=1
+        )
+        return int(pending[0]["times_delivered"]) if pending else 1
+
+    async def extend(self, consumer: str, job_ids: List[str]) -> None:
+        """Resets the idle time of jobs this worker is still running."""
+        if job_ids:
+            await self.redis.xclaim(
+                self.stream, self.group, consumer, 0, job_ids, justid=True
+            )
+
+    async def ack(self, job_id: str, user_id=None) -> None:
+        """Removes a finished job and, on its first acknowledgement, its user count."""
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, job_id)
+            pipe.xdel(self.stream, job_id)
+            acked, _ = await pipe.execute()
+        if acked and user_id is not None:
+            await self.release_user(user_id)
+
+
+def build_job(
+    run_id: str,
+    session_id: str,
+    user_id: int,
+    message: str,
+    is_deep_search: bool,
+    bypass_cache: bool,
+    generate_title: bool,
+) -> Dict[str, object]:
+    return {
+        "run_id": run_id,
+        "session_id": session_id,
+        "user_id": user_id,
+        "message": message,
+        "is_deep_search": is_deep_search,
+        "bypass_cache": bypass_cache,
+        "generate_title": generate_title,
+    }
@@ -0,0 +1,384 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import AsyncGenerator, Dict, List, Optional, Tuple
+
+from app.chat_provider.utils.metrics import Counter
+
+# Events of a run stay replayable for this long after the last event.
+CHAT_RUN_TTL_SECONDS = int(os.environ.get("CHAT_RUN_TTL_SECONDS", 900))
+CHAT_RUN_MAX_EVENTS = int(os.environ.get("CHAT_RUN_MAX_EVENTS", 10000))
+# A run with no attached client for this long is cancelled.
+CHAT_RUN_DISCONNECT_GRACE_SECONDS = float(
+    os.environ.get("CHAT_RUN_DISCONNECT_GRACE_SECONDS", 30)
+)
+# A retried POST with the same message joins the existing run within this window.
+CHAT_RUN_DEDUP_SECONDS = int(os.environ.get("CHAT_RUN_DEDUP_SECONDS", 120))
+CHAT_RUN_FOLLOW_BLOCK_MS = 1000
+# A run whose executor has not refreshed its liveness key for this long (a
+# crashed worker, a dropped job) is ended with an error for its followers.
+# Also bounds how long a queued job may wait for a worker.
+CHAT_RUN_STALL_SECONDS = int(os.environ.get("CHAT_RUN_STALL_SECONDS", 120))
+# Idle follow polls (about a second each) between liveness checks.
+CHAT_RUN_STALL_CHECK_POLLS = int(os.environ.get("CHAT_RUN_STALL_CHECK_POLLS", 10))
+# Followers give up on a run this long after it was created.
+CHAT_RUN_MAX_SECONDS = float(os.environ.get("CHAT_RUN_MAX_SECONDS", 900))
+
+TERMINAL_EVENT_TYPES = {"complete", "error"}
+
+chat_run_resumes = Counter(
+    "zenfi_chat_run_resumes_total",
+    "Clients that re-attached to a running or finished chat run, by how.",
+    ["via"],
+)
+chat_runs_abandoned = Counter(
+    "zenfi_chat_runs_abandoned_total",
+    "Chat runs ended for their followers without a terminal event, by reason "
+    "(stalled, timeout).",
+    ["reason"],
+)
+chat_run_replayed_events = Counter(
+    "zenfi_chat_run_replayed_events_total",
+    "Buffered chat run events replayed to reconnecting clients.",
+)
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+def format_event_id(run_id: str, stream_id: str) -> str:
+    return f"{run_id}/{stream_id}"
+
+
+def parse_event_id(event_id: Optional[str]) -> Optional[Tuple[str, str]]:
+    """Splits a `run_id/stream_id` SSE id; returns None if malformed."""
+    run_id, sep, stream_id = (event_id or "").strip().partition("/")
+    if not sep or not run_id or not stream_id:
+        return None
+    return run_id, stream_id
+
+
+def _events_key(run_id: str) -> str:
+    return f"chat_run:{run_id}:events"
+
+
+def _meta_key(run_id: str) -> str:
+    return f"chat_run:{run_id}:meta"
+
+
+def _attached_key(run_id: str) -> str:
+    return f"chat_run:{run_id}:attached"
+
+
+def _alive_key(run_id: str) -> str:
+    return f"chat_run:{run_id}:alive"
+
+
+def _request_key(session_id: str, message: str) -> str:
+    digest = hashlib.sha256(message.strip().encode("utf-8")).hexdigest()[:32]
+    return f"chat_run_request:{session_id}:{digest}"
+
+
+class _LocalRun:
+    def __init__(self, user_id: int, session_id: str):
+        self.meta = {
+            "user_id": str(user_id),
+            "session_id": session_id,
+            "created_at": str(time.time()),
+        }
+        self.events: List[Tuple[str, dict]] = []
+        self.changed = asyncio.Condition()
+        self.attached_until = 0.0
+        self.alive_until = 0.0
+
+
+class ChatRunStore:
+    """
+    Buffers the SSE events of each chat run in a Redis stream so a client can
+    reconnect with Last-Event-ID, replay what it missed and keep following the
+    live run, possibly from another API worker. If Redis is unavailable when a
+    run starts, that run is buffered in process instead and can only be resumed
+    on the same worker.
+    """
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+        self._local: Dict[str, _LocalRun] = {}
+
+    async def claim_request(
+        self, session_id: str, message: str, run_id: str
+    ) -> Optional[str]:
+        """
+        Registers run_id for this (session, message). Returns the run_id of an
+        earlier run of the same message instead if one is still registered.
+        """
+        key = _request_key(session_id, message)
+        try:
+            created = await self.redis.set(
+                key, run_id, nx=True, ex=CHAT_RUN_DEDUP_SECONDS
+            )
+            if created:
+                return None
+            existing = await self.redis.get(key)
+            if existing and await self.redis.exists(_meta_key(existing)):
+                return existing
+            await self.redis.set(key, run_id, ex=CHAT_RUN_DEDUP_SECONDS)
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Deduplicating run for {session_id}: {e}")
+        return None
+
+    async def create(
+        self, run_id: str, user_id: int, session_id: str, message: str
+    ) -> None:
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(
+                    _meta_key(run_id),
+                    mapping={
+                        "user_id": str(user_id),
+                        "session_id": session_id,
+                        "request_key": _request_key(session_id, message),
+                        "created_at": str(time.time()),
+                    },
+                )
+                pipe.expire(_meta_key(run_id), CHAT_RUN_TTL_SECONDS)
+                pipe.set(
+                    _attached_key(run_id), 1, ex=int(CHAT_RUN_DISCONNECT_GRACE_SECONDS)
+                )
+                pipe.set(_alive_key(run_id), 1, ex=CHAT_RUN_STALL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            print(
+                f"ERROR [ChatRunStore]: Falling back to local buffer for {run_id}: {e}"
+            )
+            self._local[run_id] = _LocalRun(user_id, session_id)
+            await self.touch(run_id)
+            await self.beat(run_id)
+
+    async def release_request(self, run_id: str) -> None:
+        """
+        Called once a client has received the end of the run: a later identical
+        message is then a new question, not a retry, and gets a fresh run.
+        """
+        if run_id in self._local:
+            return
+        try:
+            request_key = await self.redis.hget(_meta_key(run_id), "request_key")
+            if request_key and await self.redis.get(request_key) == run_id:
+                await self.redis.delete(request_key)
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Releasing request of run {run_id}: {e}")
+
+    async def owner(self, run_id: str) -> Optional[Dict[str, str]]:
+        """Returns {"user_id", "session_id"} of a known run, else None."""
+        local = self._local.get(run_id)
+        if local is not None:
+            return local.meta
+        try:
+            meta = await self.redis.hgetall(_meta_key(run_id))
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Reading run {run_id}: {e}")
+            return None
+        return meta or None
+
+    async def publish(self, run_id: str, event: dict) -> str:
+        """Appends an event and returns its stream id."""
+        local = self._local.get(run_id)
+        if local is not None:
+            async with local.changed:
+                stream_id = f"{len(local.events) + 1}-0"
+                local.events.append((stream_id, event))
+                local.changed.notify_all()
+            return stream_id
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(
+                _events_key(run_id),
+                {"event": json.dumps(event)},
+                maxlen=CHAT_RUN_MAX_EVENTS,
+                approximate=True,
+            )
+            pipe.expire(_events_key(run_id), CHAT_RUN_TTL_SECONDS)
+            pipe.expire(_meta_key(run_id), CHAT_RUN_TTL_SECONDS)
+            results = await pipe.execute()
+        return results[0]
+
+    async def last_event(self, run_id: str) -> Optional[dict]:
+        local = self._local.get(run_id)
+        if local is not None:
+            return local.events[-1][1] if local.events else None
+        entries = await self.redis.xrevrange(_events_key(run_id), count=1)
+        return json.loads(entries[0][1]["event"]) if entries else None
+
+    async def finish(self, run_id: str) -> None:
+        """Drops the in-process buffer of a finished local run after the TTL."""
+        if run_id in self._local:
+            asyncio.get_running_loop().call_later(
+                CHAT_RUN_TTL_SECONDS, self._local.pop, run_id, None
+            )
+
+    async def touch(self, run_id: str) -> None:
+        """Marks the run as having an attached client."""
+        local = self._local.get(run_id)
+        if local is not None:
+            local.attached_until = (
+                asyncio.get_running_loop().time() + CHAT_RUN_DISCONNECT_GRACE_SECONDS
+            )
+            return
+        try:
+            await self.redis.set(
+                _attached_key(run_id), 1, ex=int(CHAT_RUN_DISCONNECT_GRACE_SECONDS)
+            )
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Touching run {run_id}: {e}")
+
+    async def is_attached(self, run_id: str) -> bool:
+        local = self._local.get(run_id)
+        if local is not None:
+            return asyncio.get_running_loop().time() < local.attached_until
+        try:
+            return bool(await self.redis.exists(_attached_key(run_id)))
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Checking run {run_id}: {e}")
+            return True
+
+    async def beat(self, run_id: str) -> None:
+        """Marks the run as still being executed; called by its executor."""
+        local = self._local.get(run_id)
+        if local is not None:
+            local.alive_until = (
+                asyncio.get_running_loop().time() + CHAT_RUN_STALL_SECONDS
+            )
+            return
+        try:
+            await self.redis.set(_alive_key(run_id), 1, ex=CHAT_RUN_STALL_SECONDS)
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Beating run {run_id}: {e}")
+
+    async def is_alive(self, run_id: str) -> bool:
+        """False once the run's meta is gone or its executor stopped beating."""
+        local = self._local.get(run_id)
+        if local is not None:
+            return asyncio.get_running_loop().time() < local.alive_until
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.exists(_meta_key(run_id))
+                pipe.exists(_alive_key(run_id))
+                has_meta, has_beat = await pipe.execute()
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Checking run {run_id}: {e}")
+            return True
+        return bool(has_meta and has_beat)
+
+    async def _abandon(
+        self, run_id: str, reason: str, message: str
+    ) -> Tuple[Optional[str], dict]:
+        """
+        Ends a run that will never finish on its own. The error is published
+        while the run is still known, so later resumes and a late worker see
+        it as finished; its stream id is None otherwise.
+        """
+        chat_runs_abandoned.labels(reason=reason).inc()
+        print(f"DEBUG [ChatRunStore]: Ending run {run_id} ({reason})")
+        event = {"type": "error", "finishReason": "error", "error": message}
+        stream_id = None
+        try:
+            if await self.owner(run_id):
+                stream_id = await self.publish(run_id, event)
+        except Exception as e:
+            print(f"ERROR [ChatRunStore]: Ending run {run_id}: {e}")
+        return stream_id, event
+
+    async def follow(
+        self, run_id: str, after: str = "0-0"
+    ) -> AsyncGenerator[Tuple[Optional[str], Optional[dict]], None]:
+        """
+        Yields (stream_id, event) for events after `after`: first the buffered
+        ones, then live ones until a terminal event. Yields (None, None) about
+        once a second while idle so callers can check their client.
+
+        Ends with an error event if the run stops being executed without
+        finishing, or is still unfinished CHAT_RUN_MAX_SECONDS after it was
+        created; that event's stream id may be None.
+        """
+        loop = asyncio.get_running_loop()
+        meta = await self.owner(run_id) or {}
+        age = time.time() - float(meta.get("created_at") or time.time())
+        deadline = loop.time() + CHAT_RUN_MAX_SECONDS - max(age, 0.0)
+        local = self._local.get(run_id)
+        if local is not None:
+            source = self._follow_local(local, after)
+        else:
+            source = self._follow_redis(run_id, after)
+
+        idle_polls = 0
+        try:
+            async for stream_id, event in source:
+                if event is not None:
+                    idle_polls = 0
+                    yield stream_id, event
+                    continue
+                if loop.time() >= deadline:
+                    yield await self._abandon(
+                        run_id, "timeout", "The chat run took too long, please retry"
+                    )
+                    return
+                idle_polls += 1
+                if idle_polls >= CHAT_RUN_STALL_CHECK_POLLS:
+                    idle_polls = 0
+                    if not await self.is_alive(run_id):
+                        yield await self._abandon(
+                            run_id,
+                            "stalled",
+                            "The chat run was interrupted, please retry",
+                        )
+                        return
+                yield None, None
+        finally:
+            await source.aclose()
+
+    async def _follow_redis(self, run_id: str, after: str):
+        key = _events_key(run_id)
+        last_id = after
+        replaying = after != "0-0"
+        while True:
+            response = await self.redis.xread(
+                {key: last_id}, count=500, block=CHAT_RUN_FOLLOW_BLOCK_MS
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                replaying = False
+                yield None, None
+                continue
+            if replaying:
+                chat_run_replayed_events.inc(len(entries))
+            for stream_id, fields in entries:
+                last_id = stream_id
+                event = json.loads(fields["event"])
+                yield stream_id, event
+                if event.get("type") in TERMINAL_EVENT_TYPES:
+                    return
+
+    async def _follow_local(self, local: _LocalRun, after: str):
+        index = int(after.split("-")[0]) if after != "0-0" else 0
+        while True:
+            async with local.changed:
+                if index >= len(local.events):
+                    try:
+                        await asyncio.wait_for(
+                            local.changed.wait(), CHAT_RUN_FOLLOW_BLOCK_MS / 1000
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                pending = local.events[index:]
+            if not pending:
+                yield None, None
+                continue
+            for stream_id, event in pending:
+                index += 1
+                yield stream_id, event
+                if event.get("type") in TERMINAL_EVENT_TYPES:
+                    return
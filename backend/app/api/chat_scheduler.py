@@ -0,0 +1,228 @@
+import asyncio
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from app.chat_provider.utils.metrics import Counter, Gauge, Histogram
+
+QUICK_LANE = "quick"
+DEEP_LANE = "deep"
+
+CHAT_QUICK_LANE_CONCURRENCY = int(os.environ.get("CHAT_QUICK_LANE_CONCURRENCY", 8))
+CHAT_DEEP_LANE_CONCURRENCY = int(os.environ.get("CHAT_DEEP_LANE_CONCURRENCY", 2))
+CHAT_PER_USER_CONCURRENCY = int(os.environ.get("CHAT_PER_USER_CONCURRENCY", 2))
+CHAT_PER_USER_MAX_PENDING = int(os.environ.get("CHAT_PER_USER_MAX_PENDING", 4))
+CHAT_MAX_QUEUE_DEPTH = int(os.environ.get("CHAT_MAX_QUEUE_DEPTH", 50))
+
+scheduler_queue_depth = Gauge(
+    "zenfi_chat_scheduler_queue_depth",
+    "Chat runs admitted but waiting for a slot, per lane.",
+    ["lane"],
+    multiprocess_mode="livesum",
+)
+scheduler_running = Gauge(
+    "zenfi_chat_scheduler_running",
+    "Chat runs currently executing, per lane.",
+    ["lane"],
+    multiprocess_mode="livesum",
+)
+scheduler_wait_seconds = Histogram(
+    "zenfi_chat_scheduler_wait_seconds",
+    "Time a chat run waited in the queue before starting.",
+    ["lane"],
+)
+scheduler_rejections = Counter(
+    "zenfi_chat_scheduler_rejections_total",
+    "Chat runs rejected with 429, by lane and reason.",
+    ["lane", "reason"],
+)
+
+
+class SchedulerFull(Exception):
+    def __init__(self, lane: str, reason: str, retry_after: int):
+        super().__init__(f"Chat {lane} lane is busy ({reason})")
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Lane:
+    def __init__(self, name: str, concurrency: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self._queue_depth = scheduler_queue_depth.labels(lane=name)
+        self._running_gauge = scheduler_running.labels(lane=name)
+        self.waiting = 0
+        self.running = 0
+        # Exponentially weighted average of run duration, used for Retry-After.
+        self.avg_run_seconds = 10.0 if name == QUICK_LANE else 90.0
+
+    # The gauges follow the counters so they can be summed across processes.
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @waiting.setter
+    def waiting(self, value: int) -> None:
+        self._waiting = value
+        self._queue_depth.set(value)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @running.setter
+    def running(self, value: int) -> None:
+        self._running = value
+        self._running_gauge.set(value)
+
+
+class Admission:
+    """
+    A reserved place in a lane. Entering waits for the user's slot and then the
+    lane's slot; leaving releases both. Safe to close more than once.
+    """
+
+    def __init__(self, scheduler: "ChatScheduler", user_id: str, lane: _Lane):
+        self._scheduler = scheduler
+        self._user_id = user_id
+        self._lane = lane
+        self._user_semaphore: Optional[asyncio.Semaphore] = None
+        self._lane_acquired = False
+        self._started_at: Optional[float] = None
+        self._closed = False
+
+    async def __aenter__(self) -> "Admission":
+        enqueued_at = time.monotonic()
+        try:
+            user_semaphore = self._scheduler._user_semaphore(self._user_id)
+            await user_semaphore.acquire()
+            self._user_semaphore = user_semaphore
+            await self._lane.semaphore.acquire()
+            self._lane_acquired = True
+        except BaseException:
+            self.close()
+            raise
+        self._lane.waiting -= 1
+        self._lane.running += 1
+        self._started_at = time.monotonic()
+        scheduler_wait_seconds.labels(lane=self._lane.name).observe(
+            self._started_at - enqueued_at
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._lane_acquired:
+            self._lane.running -= 1
+            self._lane.semaphore.release()
+            duration = time.monotonic() - (self._started_at or time.monotonic())
+            self._lane.avg_run_seconds = (
+                0.8 * self._lane.avg_run_seconds + 0.2 * duration
+            )
+        else:
+            self._lane.waiting -= 1
+        if self._user_semaphore is not None:
+            self._user_semaphore.release()
+        self._scheduler._release_user(self._user_id)
+
+
+class ChatScheduler:
+    """
+    Admission control for chat runs. Quick chat and deep search run in separate
+    lanes so long reports cannot starve quick answers, each user is capped at a
+    few concurrent runs, and the waiting queue is bounded so overload turns into
+    a fast 429 instead of an ever-growing backlog.
+    """
+
+    def __init__(
+        self,
+        lane_concurrency: Optional[Dict[str, int]] = None,
+        per_user_concurrency: int = CHAT_PER_USER_CONCURRENCY,
+        per_user_max_pending: int = CHAT_PER_USER_MAX_PENDING,
+        max_queue_depth: int = CHAT_MAX_QUEUE_DEPTH,
+    ):
+        lane_concurrency = lane_concurrency or {
+            QUICK_LANE: CHAT_QUICK_LANE_CONCURRENCY,
+            DEEP_LANE: CHAT_DEEP_LANE_CONCURRENCY,
+        }
+        self.lanes = {
+            name: _Lane(name, concurrency)
+            for name, concurrency in lane_concurrency.items()
+        }
+        self.per_user_concurrency = per_user_concurrency
+        self.per_user_max_pending = per_user_max_pending
+        self.max_queue_depth = max_queue_depth
+        self._user_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._user_pending: Dict[str, int] = {}
+
+    def _user_semaphore(self, user_id: str) -> asyncio.Semaphore:
+        semaphore = self._user_semaphores.get(user_id)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_user_concurrency)
+            self._user_semaphores[user_id] = semaphore
+        return semaphore
+
+    def _release_user(self, user_id: str) -> None:
+        pending = self._user_pending.get(user_id, 0) - 1
+        if pending <= 0:
+            self._user_pending.pop(user_id, None)
+            self._user_semaphores.pop(user_id, None)
+        else:
+            self._user_pending[user_id] = pending
+
+    def _retry_after(self, lane: _Lane) -> int:
+        backlog = lane.waiting + lane.running
+        estimate = lane.avg_run_seconds * backlog / max(lane.concurrency, 1)
+        return max(1, math.ceil(estimate))
+
+    def reserve(self, user_id, lane_name: str) -> Admission:
+        """
+        Reserves a place in the given lane without waiting. Raises SchedulerFull
+        when the lane's queue or the user's pending allowance is exhausted.
+        """
+        lane = self.lanes[lane_name]
+        user_key = str(user_id)
+        if lane.waiting >= self.max_queue_depth:
+            scheduler_rejections.labels(lane=lane.name, reason="queue_full").inc()
+            raise SchedulerFull(lane.name, "queue_full", self._retry_after(lane))
+        if self._user_pending.get(user_key, 0) >= self.per_user_max_pending:
+            scheduler_rejections.labels(lane=lane.name, reason="user_limit").inc()
+            raise SchedulerFull(lane.name, "user_limit", self._retry_after(lane))
+        self._user_pending[user_key] = self._user_pending.get(user_key, 0) + 1
+        lane.waiting += 1
+        return Admission(self, user_key, lane)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {
+                "waiting": lane.waiting,
+                "running": lane.running,
+                "concurrency": lane.concurrency,
+                "avg_run_seconds": lane.avg_run_seconds,
+            }
+            for name, lane in self.lanes.items()
+        }
+
+
+def reserve_or_429(scheduler: ChatScheduler, user_id, lane_name: str) -> Admission:
+    try:
+        return scheduler.reserve(user_id, lane_name)
+    except SchedulerFull as e:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many chat requests, please retry in {e.retry_after} seconds",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+chat_scheduler = ChatScheduler()
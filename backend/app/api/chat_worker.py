@@ -0,0 +1,214 @@
+"""
+Chat worker: executes chat and deep search runs queued by the API when it runs
+with CHAT_EXECUTION_MODE=worker, and publishes their events to the same Redis
+run buffers the API relays to clients. Start as many as needed:
+
+    cd backend
+    python -m app.api.chat_worker --concurrency 10 --metrics-port 9100
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+from typing import Dict, Optional
+
+from app.api.api_functions import redis_client
+from app.api.chat import chat_run_store, publish_quietly, start_chat_run
+from app.api.chat_jobs import (
+    CHAT_JOB_MAX_DELIVERIES,
+    CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS,
+    ChatJobQueue,
+    chat_jobs_finished,
+)
+from app.api.chat_runs import TERMINAL_EVENT_TYPES
+from app.api.chat_scheduler import (
+    CHAT_DEEP_LANE_CONCURRENCY,
+    CHAT_QUICK_LANE_CONCURRENCY,
+    DEEP_LANE,
+    QUICK_LANE,
+    SchedulerFull,
+    chat_scheduler,
+)
+from app.chat_provider.service.sandbox_runner import sandbox_runner
+from app.chat_provider.utils.metrics import (
+    CONTENT_TYPE_LATEST,
+    mark_process_dead,
+    render_metrics,
+)
+
+CHAT_WORKER_CONCURRENCY = int(
+    os.environ.get(
+        "CHAT_WORKER_CONCURRENCY",
+        CHAT_QUICK_LANE_CONCURRENCY + CHAT_DEEP_LANE_CONCURRENCY,
+    )
+)
+# On SIGTERM, running jobs get this long to finish; the rest are left pending
+# and another worker takes them over after the visibility timeout.
+CHAT_WORKER_SHUTDOWN_GRACE_SECONDS = float(
+    os.environ.get("CHAT_WORKER_SHUTDOWN_GRACE_SECONDS", 30)
+)
+# Events that only open a run; a job that got no further can safely run again.
+_OPENING_EVENT_TYPES = {"session", "heartbeat"}
+
+
+class ChatWorker:
+    def __init__(self, queue: ChatJobQueue, consumer: str, concurrency: int):
+        self.queue = queue
+        self.consumer = consumer
+        self.concurrency = concurrency
+        self.running: Dict[str, asyncio.Task] = {}
+        self.stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        print(f"DEBUG [ChatWorker]: {self.consumer} stopping")
+        self.stopping.set()
+
+    async def run(self) -> None:
+        await self.queue.ensure_group()
+        extender = asyncio.create_task(self._extend_claims())
+        print(
+            f"DEBUG [ChatWorker]: {self.consumer} consuming {self.queue.stream} "
+            f"with concurrency {self.concurrency}"
+        )
+        try:
+            while not self.stopping.is_set():
+                free = self.concurrency - len(self.running)
+                if free <= 0:
+                    await asyncio.wait(
+                        list(self.running.values()),
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    continue
+                try:
+                    jobs = await self.queue.claim(self.consumer, free, block_ms=2000)
+                except Exception as e:
+                    print(f"ERROR [ChatWorker]: Claiming jobs: {e}")
+                    await asyncio.sleep(1)
+                    continue
+                for job_id, job, deliveries in jobs:
+                    task = asyncio.create_task(self._handle(job_id, job, deliveries))
+                    self.running[job_id] = task
+                    task.add_done_callback(
+                        lambda _, job_id=job_id: self.running.pop(job_id, None)
+                    )
+        finally:
+            if self.running:
+                _, unfinished = await asyncio.wait(
+                    list(self.running.values()),
+                    timeout=CHAT_WORKER_SHUTDOWN_GRACE_SECONDS,
+                )
+                for task in unfinished:
+                    task.cancel()
+            extender.cancel()
+
+    async def _extend_claims(self) -> None:
+        while True:
+            await asyncio.sleep(CHAT_JOB_VISIBILITY_TIMEOUT_SECONDS / 3)
+            try:
+                await self.queue.extend(self.consumer, list(self.running))
+            except Exception as e:
+                print(f"ERROR [ChatWorker]: Extending claims: {e}")
+
+    async def _handle(self, job_id: str, job: dict, deliveries: int) -> None:
+        run_id = job["run_id"]
+        try:
+            outcome = await self._execute(job, deliveries)
+        except asyncio.CancelledError:
+            # Left unacknowledged so another worker picks it up.
+            raise
+        except Exception as e:
+            print(f"ERROR [ChatWorker]: Job {job_id} for run {run_id}: {e}")
+            return
+        try:
+            await self.queue.ack(job_id, job.get("user_id"))
+        except Exception as e:
+            print(f"ERROR [ChatWorker]: Acknowledging job {job_id}: {e}")
+        chat_jobs_finished.labels(outcome=outcome).inc()
+
+    async def _execute(self, job: dict, deliveries: int) -> str:
+        run_id = job["run_id"]
+        last_event = await chat_run_store.last_event(run_id)
+        if last_event is not None and last_event.get("type") in TERMINAL_EVENT_TYPES:
+            return "duplicate"
+        if deliveries > CHAT_JOB_MAX_DELIVERIES or (
+            last_event is not None
+            and last_event.get("type") not in _OPENING_EVENT_TYPES
+        ):
+            # Part of the answer already reached the buffer; a rerun would
+            # produce a different one, so end the run and let the client retry.
+            print(
+                f"DEBUG [ChatWorker]: Giving up on run {run_id} after {deliveries} deliveries"
+            )
+            await publish_quietly(
+                run_id,
+                {
+                    "type": "error",
+                    "finishReason": "error",
+                    "error": "The chat run was interrupted, please retry",
+                },
+            )
+            return "abandoned"
+
+        lane = DEEP_LANE if job["is_deep_search"] else QUICK_LANE
+        try:
+            admission = chat_scheduler.reserve(job["user_id"], lane)
+        except SchedulerFull as e:
+            await publish_quietly(
+                run_id, {"type": "error", "finishReason": "busy", "error": str(e)}
+            )
+            return "busy"
+        await start_chat_run(job, admission, announce=last_event is None)
+        return "ok"
+
+
+async def serve_metrics(port: int) -> asyncio.AbstractServer:
+    """Serves the worker's metrics registry as plain HTTP on every path."""
+
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            body = render_metrics()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                + f"Content-Type: {CONTENT_TYPE_LATEST}\r\n".encode()
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        except Exception as e:
+            print(f"ERROR [serve_metrics]: {e}")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "0.0.0.0", port)
+
+
+async def main(concurrency: int, name: Optional[str], metrics_port: Optional[int]):
+    worker = ChatWorker(
+        ChatJobQueue(redis_client),
+        consumer=name or f"{socket.gethostname()}-{os.getpid()}",
+        concurrency=concurrency,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    sandbox_runner.start_in_background()
+    server = await serve_metrics(metrics_port) if metrics_port else None
+    try:
+        await worker.run()
+    finally:
+        if server is not None:
+            server.close()
+        mark_process_dead()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run queued chat jobs.")
+    parser.add_argument("--concurrency", type=int, default=CHAT_WORKER_CONCURRENCY)
+    parser.add_argument("--name", help="Consumer name (default: host-pid)")
+    parser.add_argument("--metrics-port", type=int)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.name, args.metrics_port))
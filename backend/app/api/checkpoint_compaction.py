@@ -0,0 +1,235 @@
+"""
+Checkpoint compaction job for the LangGraph Postgres saver (checkpoint-zenfi).
+Every graph step stores a checkpoint, so threads accumulate hundreds of them
+plus the channel blobs and pending writes they reference. Each pass:
+
+- deletes threads whose latest checkpoint is older than the TTL (abandoned
+  sessions; their messages stay in chat_messages),
+- keeps the latest checkpoint plus CHECKPOINT_KEEP_HISTORY older ones per
+  thread and namespace, and
+- deletes writes and blobs no remaining checkpoint references.
+
+Only threads idle for CHECKPOINT_COMPACTION_IDLE_SECONDS are touched, so a run
+in progress never loses the blobs it has written but not yet referenced.
+
+    cd backend
+    python -m app.api.checkpoint_compaction --once
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional
+
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row
+
+from app.api.api_functions import checkpoint_db_uri
+from app.chat_provider.utils.metrics import Counter
+
+CHECKPOINT_KEEP_HISTORY = int(os.environ.get("CHECKPOINT_KEEP_HISTORY", 5))
+CHECKPOINT_TTL_DAYS = int(os.environ.get("CHECKPOINT_TTL_DAYS", 30))
+CHECKPOINT_COMPACTION_IDLE_SECONDS = int(
+    os.environ.get("CHECKPOINT_COMPACTION_IDLE_SECONDS", 600)
+)
+CHECKPOINT_COMPACTION_INTERVAL_SECONDS = int(
+    os.environ.get("CHECKPOINT_COMPACTION_INTERVAL_SECONDS", 3600)
+)
+# Threads per transaction, to keep locks and statement times short.
+CHECKPOINT_COMPACTION_BATCH_SIZE = int(
+    os.environ.get("CHECKPOINT_COMPACTION_BATCH_SIZE", 100)
+)
+
+checkpoint_rows_deleted = Counter(
+    "zenfi_checkpoint_compaction_deleted_rows_total",
+    "Rows deleted by checkpoint compaction, by table and reason (expired, pruned).",
+    ["table", "reason"],
+)
+
+# Threads whose latest checkpoint is older than the TTL, after `after`.
+EXPIRED_THREADS_SQL = """
+    SELECT thread_id
+    FROM checkpoints
+    WHERE thread_id > %(after)s
+    GROUP BY thread_id
+    HAVING max((checkpoint->>'ts')::timestamptz)
+        < now() - make_interval(days => %(ttl_days)s)
+    ORDER BY thread_id
+    LIMIT %(limit)s
+"""
+# Idle threads holding more than the latest checkpoint plus history, after `after`.
+OVERGROWN_THREADS_SQL = """
+    SELECT thread_id
+    FROM checkpoints
+    WHERE thread_id > %(after)s
+    GROUP BY thread_id, checkpoint_ns
+    HAVING count(*) > %(kept)s
+        AND max((checkpoint->>'ts')::timestamptz)
+            < now() - make_interval(secs => %(idle_seconds)s)
+    ORDER BY thread_id
+    LIMIT %(limit)s
+"""
+DELETE_THREADS_SQL = {
+    table: f"DELETE FROM {table} WHERE thread_id = ANY(%(threads)s)"
+    for table in ("checkpoint_writes", "checkpoint_blobs", "checkpoints")
+}
+PRUNE_CHECKPOINTS_SQL = """
+    DELETE FROM checkpoints c
+    USING (
+        SELECT thread_id, checkpoint_ns, checkpoint_id,
+            row_number() OVER (
+                PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+            ) AS position
+        FROM checkpoints
+        WHERE thread_id = ANY(%(threads)s)
+    ) ranked
+    WHERE ranked.position > %(kept)s
+        AND c.thread_id = ranked.thread_id
+        AND c.checkpoint_ns = ranked.checkpoint_ns
+        AND c.checkpoint_id = ranked.checkpoint_id
+"""
+# Writes belong to a checkpoint; pending sends are read from the writes of a
+# checkpoint's parent, so those are kept too.
+PRUNE_WRITES_SQL = """
+    DELETE FROM checkpoint_writes w
+    WHERE w.thread_id = ANY(%(threads)s)
+        AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = w.thread_id
+                AND c.checkpoint_ns = w.checkpoint_ns
+                AND (c.checkpoint_id = w.checkpoint_id
+                    OR c.parent_checkpoint_id = w.checkpoint_id)
+        )
+"""
+# Blobs are stored once per (channel, version) and shared by every checkpoint
+# whose channel_versions point at them.
+PRUNE_BLOBS_SQL = """
+    DELETE FROM checkpoint_blobs b
+    WHERE b.thread_id = ANY(%(threads)s)
+        AND NOT EXISTS (
+            SELECT 1
+            FROM checkpoints c,
+                jsonb_each_text(c.checkpoint -> 'channel_versions') AS v(channel, version)
+            WHERE c.thread_id = b.thread_id
+                AND c.checkpoint_ns = b.checkpoint_ns
+                AND v.channel = b.channel
+                AND v.version = b.version
+        )
+"""
+
+
+class CheckpointCompactor:
+    def __init__(
+        self,
+        conn: AsyncConnection,
+        keep_history: int = CHECKPOINT_KEEP_HISTORY,
+        ttl_days: int = CHECKPOINT_TTL_DAYS,
+        idle_seconds: int = CHECKPOINT_COMPACTION_IDLE_SECONDS,
+        batch_size: int = CHECKPOINT_COMPACTION_BATCH_SIZE,
+    ):
+        self.conn = conn
+        self.keep_history = keep_history
+        self.ttl_days = ttl_days
+        self.idle_seconds = idle_seconds
+        self.batch_size = batch_size
+
+    async def _threads(self, sql: str, after: str) -> List[str]:
+        async with self.conn.cursor() as cur:
+            await cur.execute(
+                sql,
+                {
+                    "after": after,
+                    "ttl_days": self.ttl_days,
+                    "kept": self.keep_history + 1,
+                    "idle_seconds": self.idle_seconds,
+                    "limit": self.batch_size,
+                },
+            )
+            # A thread with several namespaces can appear more than once.
+            return list(dict.fromkeys(row["thread_id"] for row in await cur.fetchall()))
+
+    async def _delete(
+        self, statements: Dict[str, str], params: dict, reason: str
+    ) -> Dict[str, int]:
+        deleted = {}
+        async with self.conn.transaction():
+            async with self.conn.cursor() as cur:
+                for table, sql in statements.items():
+                    await cur.execute(sql, params)
+                    deleted[table] = cur.rowcount
+                    checkpoint_rows_deleted.labels(table=table, reason=reason).inc(
+                        cur.rowcount
+                    )
+        return deleted
+
+    async def _each_batch(self, sql: str, handle) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        after = ""
+        while True:
+            threads = await self._threads(sql, after)
+            if not threads:
+                return totals
+            for table, count in (await handle(threads)).items():
+                totals[table] = totals.get(table, 0) + count
+            after = threads[-1]
+
+    async def expire(self) -> Dict[str, int]:
+        """Deletes every row of threads idle for longer than the TTL."""
+        return await self._each_batch(
+            EXPIRED_THREADS_SQL,
+            lambda threads: self._delete(
+                DELETE_THREADS_SQL, {"threads": threads}, "expired"
+            ),
+        )
+
+    async def prune(self) -> Dict[str, int]:
+        """Trims idle threads to their latest checkpoints and referenced data."""
+        return await self._each_batch(
+            OVERGROWN_THREADS_SQL,
+            lambda threads: self._delete(
+                {
+                    "checkpoints": PRUNE_CHECKPOINTS_SQL,
+                    "checkpoint_writes": PRUNE_WRITES_SQL,
+                    "checkpoint_blobs": PRUNE_BLOBS_SQL,
+                },
+                {"threads": threads, "kept": self.keep_history + 1},
+                "pruned",
+            ),
+        )
+
+
+async def run_once() -> Dict[str, Dict[str, int]]:
+    started = time.monotonic()
+    async with await AsyncConnection.connect(
+        checkpoint_db_uri(), autocommit=True, prepare_threshold=0, row_factory=dict_row
+    ) as conn:
+        compactor = CheckpointCompactor(conn)
+        result = {
+            "expired": await compactor.expire(),
+            "pruned": await compactor.prune(),
+        }
+    print(
+        f"DEBUG [checkpoint_compaction]: Deleted {result} "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    return result
+
+
+async def main(once: bool, interval: Optional[int]) -> None:
+    while True:
+        try:
+            await run_once()
+        except Exception as e:
+            print(f"ERROR [checkpoint_compaction]: Run failed: {e}")
+        if once:
+            return
+        await asyncio.sleep(interval or CHECKPOINT_COMPACTION_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact LangGraph checkpoints.")
+    parser.add_argument("--once", action="store_true", help="Run one pass and exit")
+    parser.add_argument("--interval", type=int, help="Seconds between passes")
+    args = parser.parse_args()
+    asyncio.run(main(args.once, args.interval))
@@ -21,6 +21,8 @@ from app.chat_provider.tools.finance_tools import (
     get_stock_fastinfo,
 )
 from app.config.config import redis_url
+from app.chat_provider.service.user_context import invalidate_user_context
+from app.chat_provider.utils.observability import record_cache_lookup
 
 dashboard_router = APIRouter(prefix="/dashboard")
 
@@ -49,10 +51,12 @@ async def get_market_status(
     if redis_client:
         try:
             cached_data_bytes = await redis_client.get(cache_key)
+            record_cache_lookup("market_status", bool(cached_data_bytes))
             if cached_data_bytes:
                 print(f"Cache hit for {cache_key}")  # Or use a proper logger
                 return json.loads(cached_data_bytes.decode("utf-8"))
         except Exception as e:
+            record_cache_lookup("market_status", None)
             print(
                 f"Redis GET error for {cache_key}: {e}. Proceeding without cache."
             )  # Or use a proper logger
@@ -125,6 +129,7 @@ async def add_stock(
                 print(
                     f"Redis DELETE error for {cache_key}: {e}"
                 )  # Or use a proper logger
+        await invalidate_user_context(current_user.id)
 
         return {"message": f"Stock {stock.symbol} added successfully"}
     except Exception as e:
@@ -165,6 +170,7 @@ async def remove_stock(
                 print(
                     f"Redis DELETE error for {cache_key}: {e}"
                 )  # Or use a proper logger
+        await invalidate_user_context(current_user.id)
 
         return {"message": f"Stock {stock.symbol} removed successfully"}
     except Exception as e:
@@ -183,10 +189,12 @@ async def get_stocks(
     if redis_client:
         try:
             cached_data_bytes = await redis_client.get(cache_key)
+            record_cache_lookup("user_stocks", bool(cached_data_bytes))
             if cached_data_bytes:
                 print(f"Cache hit for {cache_key}")  # Or use a proper logger
                 return json.loads(cached_data_bytes.decode("utf-8"))
         except Exception as e:
+            record_cache_lookup("user_stocks", None)
             print(
                 f"Redis GET error for {cache_key}: {e}. Proceeding without cache."
             )  # Or use a proper logger
@@ -239,10 +247,12 @@ async def get_dashboard_data(  # Original function name was get_dashboard_data f
     if redis_client:
         try:
             cached_data_bytes = await redis_client.get(cache_key)
+            record_cache_lookup("dashboard_info", bool(cached_data_bytes))
             if cached_data_bytes:
                 print(f"Cache hit for {cache_key}")  # Or use a proper logger
                 return json.loads(cached_data_bytes.decode("utf-8"))
         except Exception as e:
+            record_cache_lookup("dashboard_info", None)
             print(
                 f"Redis GET error for {cache_key}: {e}. Proceeding without cache."
             )  # Or use a proper logger
@@ -1,14 +1,15 @@
+import asyncio
 import uuid
 from fastapi import APIRouter, Depends, Form, HTTPException, UploadFile, File
 from google.cloud import bigquery
 from uuid import uuid4
 from typing import List
 from langchain_google_genai import (
-    ChatGoogleGenerativeAI,
     HarmBlockThreshold,
     HarmCategory,
 )
 from langchain_google_vertexai import VertexAIEmbeddings
+from app.chat_provider.utils.llm_gateway import GatewayChatModel
 from app.api.api_models import (
     FileUploadResponse,
     KnowledgeBase,
@@ -35,6 +36,8 @@ from app.chat_provider.service.knowledge_base.knowledege_base import (
     set_knowledge_base_as_default,
 )
 from app.config.config import GEMINI_API_KEY, project_id
+from app.chat_provider.service.user_context import invalidate_user_context
+from app.chat_provider.utils.observability import llm_metrics_callback
 
 # -----------------Prequiste-------------#
 # ---------------------------------------#
@@ -47,10 +50,11 @@ safety_settings = {
     HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
 }
 
-rag_llm = ChatGoogleGenerativeAI(
+rag_llm = GatewayChatModel(
     model="gemini-2.0-flash-lite",
     api_key=GEMINI_API_KEY,
     safety_settings=safety_settings,
+    callbacks=[llm_metrics_callback],
 )
 
 dataset_id = "zenf_dataset"
@@ -112,6 +116,7 @@ async def create_knowledge_base(
 
         if request.is_default:
             await set_knowledge_base_as_default(db, current_user.id, knowledge_base_id)
+            await invalidate_user_context(current_user.id)
 
         return kb
     except Exception as e:
@@ -253,7 +258,8 @@ async def query_knowledge_base(
     print("LOG: Trying Rag Query for knowledge Base")
 
     try:
-        rag_result = search_enhanced(
+        rag_result = await asyncio.to_thread(
+            search_enhanced,
             table_id=kb.table_id,
             query=request.query,
             filter={"context": "some_context"},
@@ -306,6 +312,7 @@ async def set_default_knowledge_base(
 
     # Commit the changes
     await db.commit()
+    await invalidate_user_context(current_user.id)
 
     # Fetch all knowledge bases to return
     result = await db.execute(select(KnowledgeBase))
@@ -1,5 +1,6 @@
 # main.py - REMOVE the oauth2_scheme definition from here
 from fastapi import FastAPI, Depends
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 
 # REMOVE THIS LINE: from fastapi.security import OAuth2PasswordBearer
@@ -14,6 +15,13 @@ from app.api.chat import chat_router
 from app.api.auth import auth_router
 from app.api.knowledge_base import knowledge_base_router
 from app.api.news import news_api_router
+from app.api.calculators import calculator_router
+from app.chat_provider.service.sandbox_runner import sandbox_runner
+from app.chat_provider.utils.metrics import (
+    CONTENT_TYPE_LATEST,
+    mark_process_dead,
+    render_metrics,
+)
 
 app = FastAPI(
     title="Your API", description="API with OAuth2 authentication", version="1.0.0"
@@ -25,12 +33,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Before"],
 )
 
 
 @app.on_event("startup")
 async def startup():
     await init_db()
+    sandbox_runner.start_in_background()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    mark_process_dead()
 
 
 # Include auth router FIRST
@@ -41,6 +56,13 @@ app.include_router(portfolio_router)
 app.include_router(chat_router)
 app.include_router(knowledge_base_router)
 app.include_router(news_api_router)
+app.include_router(calculator_router)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of all registered metrics."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
 # Session Management
@@ -2,9 +2,13 @@ import json
 import datetime
 import redis.asyncio as aioredis
 from fastapi import APIRouter, HTTPException
-from langchain_google_genai import ChatGoogleGenerativeAI
 from app.config.config import GEMINI_API_KEY, redis_url
 from app.chat_provider.service.news_service import FinanceNewsService
+from app.chat_provider.utils.llm_gateway import GatewayChatModel
+from app.chat_provider.utils.observability import (
+    llm_metrics_callback,
+    record_cache_lookup,
+)
 
 news_api_router = APIRouter(prefix="/news")
 
@@ -23,7 +27,11 @@ if redis_url:
 # Cache expiration set to 12 hours (43,200 seconds)
 CACHE_EXPIRATION_SECONDS = 43200
 
-model = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite", api_key=GEMINI_API_KEY)
+model = GatewayChatModel(
+    model="gemini-2.0-flash-lite",
+    api_key=GEMINI_API_KEY,
+    callbacks=[llm_metrics_callback],
+)
 
 
 @news_api_router.get("/")
@@ -32,10 +40,12 @@ async def get_latest_news():
     if redis_client:
         try:
             cached_data_bytes = await redis_client.get(cache_key)
+            record_cache_lookup("news", bool(cached_data_bytes))
             if cached_data_bytes:
                 print(f"Cache hit for {cache_key}")  # Or use a proper logger
                 return json.loads(cached_data_bytes.decode("utf-8"))
         except Exception as e:
+            record_cache_lookup("news", None)
             print(
                 f"Redis GET error for {cache_key}: {e}. Proceeding without cache."
             )  # Or use a proper logger
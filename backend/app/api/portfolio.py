@@ -20,12 +20,15 @@ from app.api.api_models import (
     PortfolioOutput,
     User,
 )
+from app.api.portfolio_digest_rules import digest_summary
 from app.chat_provider.tools.finance_tools import (
     get_stock_fastinfo,
 )
 from google.cloud import storage
 from app.chat_provider.extra_functions.exchange import get_exchange_rate
 from app.config.config import redis_url
+from app.chat_provider.service.user_context import invalidate_user_context
+from app.chat_provider.utils.observability import record_cache_lookup
 
 portfolio_router = APIRouter(prefix="/portfolio")
 
@@ -102,6 +105,7 @@ async def create_portfolio_assets(
                 print(
                     f"Redis DELETE error for {cache_key}: {e}. Proceeding without cache invalidation."
                 )
+        await invalidate_user_context(current_user.id)
 
         return asset
 
@@ -122,7 +126,7 @@ async def get_portfolio(
     stmt = (
         select(Portfolio)
         .where(Portfolio.id == portfolio_id, Portfolio.user_id == current_user.id)
-        .options(selectinload(Portfolio.assets))
+        .options(selectinload(Portfolio.assets), selectinload(Portfolio.digest))
     )
     result = await db.execute(stmt)
     portfolio = result.scalars().first()
@@ -136,10 +140,12 @@ async def get_portfolio(
     if redis_client:
         try:
             cached_data_bytes = await redis_client.get(cache_key)
+            record_cache_lookup("portfolio", bool(cached_data_bytes))
             if cached_data_bytes:
                 print(f"Cache hit for {cache_key}")
                 return json.loads(cached_data_bytes.decode("utf-8"))
         except Exception as e:
+            record_cache_lookup("portfolio", None)
             print(f"Redis GET error for {cache_key}: {e}. Proceeding without cache.")
 
     # Compute portfolio response if cache miss
@@ -269,14 +275,16 @@ async def get_portfolio(
 
             assets_details.append(asset_detail)
 
-        ai_portfolio_summary = await generate_ai_portfolio_summary(
-            portfolio_name=str(getattr(portfolio, "name", "")),
-            portfolio_value=total_value_base,
-            total_day_gain_inr=total_day_gain_base,
-            total_gain_inr=total_gain_base,
-            assets=assets_details,
-            user_id=current_user.id,
-        )
+        # Served from the nightly digest unless the holdings changed since.
+        ai_portfolio_summary = digest_summary(portfolio)
+        if ai_portfolio_summary is None:
+            ai_portfolio_summary = await generate_ai_portfolio_summary(
+                portfolio_name=str(getattr(portfolio, "name", "")),
+                portfolio_value=total_value_base,
+                total_day_gain_inr=total_day_gain_base,
+                total_gain_inr=total_gain_base,
+                assets=assets_details,
+            )
 
         portfolio_response = {
             "id": str(portfolio.id),
@@ -359,6 +367,7 @@ async def update_default_portfolio(
 
     await db.commit()
     await db.refresh(portfolio)
+    await invalidate_user_context(current_user.id)
 
     return {
         "message": message,
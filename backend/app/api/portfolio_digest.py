@@ -0,0 +1,213 @@
+"""
+Portfolio digest job: after the Indian market closes, values every default
+portfolio in one pass and stores an AI summary for each in portfolio_digests,
+so GET /portfolio/{id} serves a precomputed summary instead of running an LLM
+conversation per view. Summaries are only regenerated for portfolios whose
+holdings changed or whose prices moved materially since the last digest.
+
+    cd backend
+    python -m app.api.portfolio_digest --once   # one pass now
+    python -m app.api.portfolio_digest          # every weekday after close
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pytz
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.api.api_functions import (
+    AsyncSessionLocal,
+    generate_ai_portfolio_summary,
+    redis_client,
+)
+from app.api.api_models import Portfolio, PortfolioDigest
+from app.api.portfolio_digest_rules import (
+    holdings_fingerprint,
+    needs_regeneration,
+    value_assets,
+)
+from app.chat_provider.extra_functions.exchange import CurrencyConverter
+from app.chat_provider.utils.metrics import Counter
+from app.chat_provider.utils.quote_cache import quote_cache
+
+# NSE closes at 15:30 IST; the run starts once closing prices have settled.
+PORTFOLIO_DIGEST_RUN_AT = os.environ.get("PORTFOLIO_DIGEST_RUN_AT", "15:45")
+PORTFOLIO_DIGEST_TIMEZONE = pytz.timezone("Asia/Kolkata")
+PORTFOLIO_DIGEST_BATCH_SIZE = int(os.environ.get("PORTFOLIO_DIGEST_BATCH_SIZE", 200))
+PORTFOLIO_DIGEST_LLM_CONCURRENCY = int(
+    os.environ.get("PORTFOLIO_DIGEST_LLM_CONCURRENCY", 4)
+)
+QUOTE_FIELDS = ["last_price", "previous_close", "currency"]
+
+portfolio_digests = Counter(
+    "zenfi_portfolio_digests_total",
+    "Portfolios processed by the digest job, by result "
+    "(regenerated, unchanged, failed).",
+    ["result"],
+)
+
+
+async def load_fx_rates(currencies: Iterable[str]) -> Dict[str, float]:
+    """INR rates for the given currencies from one rates download."""
+    currencies = {c for c in currencies if c and c != "INR"}
+    rates = {"INR": 1.0}
+    if not currencies:
+        return rates
+    try:
+        converter = await asyncio.to_thread(CurrencyConverter)
+    except Exception as e:
+        print(f"ERROR [load_fx_rates]: {e}. Valuing at a rate of 1.")
+        return rates
+    for currency in currencies:
+        try:
+            rates[currency] = converter.convert(currency, "INR", 1.0)
+        except ValueError as e:
+            print(f"ERROR [load_fx_rates]: {e}. Valuing {currency} at a rate of 1.")
+    return rates
+
+
+async def digest_batch(
+    portfolios: List[Portfolio],
+    fx_rates: Dict[str, float],
+    semaphore: asyncio.Semaphore,
+) -> Tuple[Dict[str, int], List[PortfolioDigest]]:
+    """
+    Values one batch of portfolios and regenerates the stale summaries.
+    Returns counts by result and the new digests, which the caller saves.
+    """
+    symbols = {
+        asset.identifier
+        for portfolio in portfolios
+        for asset in portfolio.assets
+        if asset.asset_type == "Stock"
+    }
+    quotes = await quote_cache.get_many(symbols, QUOTE_FIELDS)
+    new_currencies = {q.get("currency") for q in quotes.values()} - set(fx_rates)
+    if new_currencies:
+        fx_rates.update(await load_fx_rates(new_currencies))
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    counts = {"regenerated": 0, "unchanged": 0, "failed": 0}
+
+    async def digest(portfolio: Portfolio) -> Optional[PortfolioDigest]:
+        fingerprint = holdings_fingerprint(portfolio.assets)
+        assets, value, day_gain, gain = value_assets(portfolio.assets, quotes, fx_rates)
+        if not needs_regeneration(portfolio.digest, fingerprint, assets, value, now):
+            counts["unchanged"] += 1
+            return None
+        try:
+            async with semaphore:
+                summary = await generate_ai_portfolio_summary(
+                    portfolio_name=str(portfolio.name),
+                    portfolio_value=value,
+                    total_day_gain_inr=day_gain,
+                    total_gain_inr=gain,
+                    assets=assets,
+                )
+        except Exception as e:
+            print(f"ERROR [digest_batch]: Portfolio {portfolio.id}: {e}")
+            counts["failed"] += 1
+            return None
+        counts["regenerated"] += 1
+        return PortfolioDigest(
+            portfolio_id=portfolio.id,
+            user_id=portfolio.user_id,
+            holdings_fingerprint=fingerprint,
+            total_value_inr=value,
+            total_day_gain_inr=day_gain,
+            total_gain_inr=gain,
+            assets=assets,
+            ai_summary=summary,
+            generated_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+
+    digests = await asyncio.gather(*(digest(p) for p in portfolios))
+    return counts, [d for d in digests if d is not None]
+
+
+async def run_once() -> Dict[str, int]:
+    """One pass over every default portfolio, in batches by id."""
+    started = time.monotonic()
+    fx_rates: Dict[str, float] = {"INR": 1.0}
+    semaphore = asyncio.Semaphore(PORTFOLIO_DIGEST_LLM_CONCURRENCY)
+    totals = {"regenerated": 0, "unchanged": 0, "failed": 0}
+    last_id = None
+    while True:
+        # Loaded in a short session: no connection is held during LLM calls.
+        async with AsyncSessionLocal() as db:
+            stmt = (
+                select(Portfolio)
+                .where(Portfolio.is_default.is_(True))
+                .options(selectinload(Portfolio.assets), selectinload(Portfolio.digest))
+                .order_by(Portfolio.id)
+                .limit(PORTFOLIO_DIGEST_BATCH_SIZE)
+            )
+            if last_id is not None:
+                stmt = stmt.where(Portfolio.id > last_id)
+            portfolios = (await db.execute(stmt)).scalars().all()
+            if not portfolios:
+                break
+        last_id = portfolios[-1].id
+        counts, digests = await digest_batch(
+            [p for p in portfolios if p.assets], fx_rates, semaphore
+        )
+        if digests:
+            async with AsyncSessionLocal() as db:
+                for new_digest in digests:
+                    await db.merge(new_digest)
+                await db.commit()
+        for result, count in counts.items():
+            totals[result] += count
+            portfolio_digests.labels(result=result).inc(count)
+        if digests:
+            # Cached GET /portfolio/{id} responses still carry the old summary.
+            try:
+                await redis_client.delete(
+                    *(f"portfolio:{d.portfolio_id}" for d in digests)
+                )
+            except Exception as e:
+                print(f"ERROR [run_once]: Invalidating portfolio cache: {e}")
+    print(
+        f"DEBUG [run_once]: Portfolio digests {totals} "
+        f"in {time.monotonic() - started:.1f}s"
+    )
+    return totals
+
+
+def seconds_until_next_run(now: Optional[datetime.datetime] = None) -> float:
+    """Seconds until PORTFOLIO_DIGEST_RUN_AT IST on the next weekday."""
+    now = now or datetime.datetime.now(PORTFOLIO_DIGEST_TIMEZONE)
+    hour, minute = (int(part) for part in PORTFOLIO_DIGEST_RUN_AT.split(":"))
+    run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += datetime.timedelta(days=1)
+    while run_at.weekday() >= 5:
+        run_at += datetime.timedelta(days=1)
+    return (run_at - now).total_seconds()
+
+
+async def main(once: bool) -> None:
+    if once:
+        await run_once()
+        return
+    while True:
+        delay = seconds_until_next_run()
+        print(f"DEBUG [portfolio_digest]: Next run in {delay / 3600:.1f}h")
+        await asyncio.sleep(delay)
+        try:
+            await run_once()
+        except Exception as e:
+            print(f"ERROR [portfolio_digest]: Run failed: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute portfolio digests.")
+    parser.add_argument("--once", action="store_true", help="Run one pass now and exit")
+    args = parser.parse_args()
+    asyncio.run(main(args.once))
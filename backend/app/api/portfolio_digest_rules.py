@@ -0,0 +1,133 @@
+"""
+Rules of the portfolio digest job that need no I/O: how holdings are
+fingerprinted and valued from prefetched quotes, and when a stored digest is
+stale and must be regenerated or no longer served.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.api.api_models import Portfolio, PortfolioDigest
+
+# A summary is rewritten when the portfolio value moved this much since it was
+# written, when any holding moved this much on the day, or when it is this old.
+PORTFOLIO_DIGEST_VALUE_CHANGE_PERCENT = float(
+    os.environ.get("PORTFOLIO_DIGEST_VALUE_CHANGE_PERCENT", 2.0)
+)
+PORTFOLIO_DIGEST_ASSET_MOVE_PERCENT = float(
+    os.environ.get("PORTFOLIO_DIGEST_ASSET_MOVE_PERCENT", 5.0)
+)
+PORTFOLIO_DIGEST_MAX_AGE_DAYS = int(os.environ.get("PORTFOLIO_DIGEST_MAX_AGE_DAYS", 7))
+
+
+def holdings_fingerprint(assets: Iterable) -> str:
+    """Stable hash of a portfolio's holdings, independent of asset order."""
+    holdings = sorted(
+        (
+            asset.asset_type,
+            asset.identifier,
+            float(asset.quantity),
+            float(asset.purchase_price),
+            asset.purchase_date.isoformat() if asset.purchase_date else "",
+        )
+        for asset in assets
+    )
+    return hashlib.sha256(json.dumps(holdings).encode("utf-8")).hexdigest()
+
+
+def digest_summary(portfolio: Portfolio) -> Optional[str]:
+    """
+    Returns the precomputed AI summary of a portfolio loaded with its digest,
+    or None if there is none or it was written for different holdings.
+    """
+    digest = portfolio.digest
+    if digest is None or digest.holdings_fingerprint != holdings_fingerprint(
+        portfolio.assets
+    ):
+        return None
+    age = datetime.datetime.now(datetime.timezone.utc) - digest.generated_at
+    if age > datetime.timedelta(days=PORTFOLIO_DIGEST_MAX_AGE_DAYS + 1):
+        return None
+    return digest.ai_summary
+
+
+def value_assets(
+    assets: Iterable, quotes: Dict[str, dict], fx_rates: Dict[str, float]
+) -> Tuple[List[dict], float, float, float]:
+    """
+    Values holdings from prefetched quotes and INR exchange rates. Returns the
+    asset details GET /portfolio/{id} renders and the INR totals (value, day
+    gain, total gain).
+    """
+    details = []
+    total_value = total_day_gain = total_gain = 0.0
+    for asset in assets:
+        detail = {
+            "identifier": asset.identifier,
+            "asset_type": asset.asset_type,
+            "quantity": asset.quantity,
+            "purchase_price": asset.purchase_price,
+            "purchase_date": asset.purchase_date.isoformat()
+            if asset.purchase_date
+            else None,
+            "value_base": 0.0,
+            "day_gain_base": 0.0,
+            "total_gain_base": 0.0,
+            "day_gain_percent": 0.0,
+            "total_gain_percent": 0.0,
+            "news": [],
+        }
+        quote = quotes.get(asset.identifier.strip().upper()) or {}
+        last, previous = quote.get("last_price"), quote.get("previous_close")
+        if asset.asset_type == "Stock" and last is not None and previous is not None:
+            rate = fx_rates.get(quote.get("currency") or "INR", 1.0)
+            detail.update(
+                {
+                    "value_base": last * asset.quantity * rate,
+                    "day_gain_base": (last - previous) * asset.quantity * rate,
+                    "total_gain_base": (last - asset.purchase_price)
+                    * asset.quantity
+                    * rate,
+                    "day_gain_percent": (last - previous) / previous * 100
+                    if previous
+                    else 0,
+                    "total_gain_percent": (last - asset.purchase_price)
+                    / asset.purchase_price
+                    * 100
+                    if asset.purchase_price
+                    else 0,
+                }
+            )
+            total_value += detail["value_base"]
+            total_day_gain += detail["day_gain_base"]
+            total_gain += detail["total_gain_base"]
+        details.append(detail)
+    return details, total_value, total_day_gain, total_gain
+
+
+def needs_regeneration(
+    digest: Optional[PortfolioDigest],
+    fingerprint: str,
+    assets: List[dict],
+    total_value: float,
+    now: datetime.datetime,
+) -> bool:
+    if digest is None or digest.holdings_fingerprint != fingerprint:
+        return True
+    if now - digest.generated_at > datetime.timedelta(
+        days=PORTFOLIO_DIGEST_MAX_AGE_DAYS
+    ):
+        return True
+    if digest.total_value_inr:
+        change = abs(total_value - digest.total_value_inr) / digest.total_value_inr
+        if change * 100 >= PORTFOLIO_DIGEST_VALUE_CHANGE_PERCENT:
+            return True
+    elif total_value:
+        return True
+    return any(
+        abs(asset["day_gain_percent"]) >= PORTFOLIO_DIGEST_ASSET_MOVE_PERCENT
+        for asset in assets
+    )
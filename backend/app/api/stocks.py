@@ -11,6 +11,7 @@ from app.api.api_functions import get_current_user, get_db
 from app.api.api_models import StockInput, StockSearchInput, User
 from app.chat_provider.tools.news_tools import fetch_finance_news
 from app.chat_provider.extra_functions.charts import get_charts_data, get_stock_info
+from app.chat_provider.utils.observability import record_cache_lookup
 
 stock_router = APIRouter(prefix="/stocks")
 
@@ -74,10 +75,12 @@ async def get_stock_information(
         if redis_client:
             try:
                 cached_data_bytes = await redis_client.get(cache_key)
+                record_cache_lookup("charts", bool(cached_data_bytes))
                 if cached_data_bytes:
                     print(f"Cache hit for {cache_key}")  # Or use a proper logger
                     charts_data = json.loads(cached_data_bytes.decode("utf-8"))
             except Exception as e:
+                record_cache_lookup("charts", None)
                 print(
                     f"Redis GET error for {cache_key}: {e}. Proceeding without cache."
                 )  # Or use a proper logger
@@ -4,7 +4,6 @@ from typing import List, Any, Optional, Dict
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 from langchain_google_genai import (
-    ChatGoogleGenerativeAI,
     HarmBlockThreshold,
     HarmCategory,
 )
@@ -40,13 +39,17 @@ safety_settings = {
 }
 from google.cloud import bigquery
 
+from app.chat_provider.utils.observability import llm_metrics_callback
+from app.chat_provider.utils.llm_gateway import GatewayChatModel
+
 GEMINI_API_KEY = os.environ.get("GOOGLE_GEMINI_API_KEY", "")
 
 
-quicksearch_llm = ChatGoogleGenerativeAI(
+quicksearch_llm = GatewayChatModel(
     model="gemini-2.0-flash-lite",
     api_key=GEMINI_API_KEY,
     safety_settings=safety_settings,
+    callbacks=[llm_metrics_callback],
 )
 
 PROJECT_ID = "gdg-on-campus-challenge"
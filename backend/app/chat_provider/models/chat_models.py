@@ -1,6 +1,7 @@
 from typing import Annotated, List, TypedDict, Literal, Optional
 from pydantic import BaseModel, Field
 import operator
+from langgraph.channels.untracked_value import UntrackedValue
 from langgraph.graph.message import add_messages
 
 
@@ -14,23 +15,37 @@ class Queries(BaseModel):
     )
 
 
+class TurnScratch(TypedDict):
+    """
+    Routing flags and retrieval results of the current turn. Held in
+    UntrackedValue channels: never written to checkpoints, so each turn starts
+    without them and a turn's web results or code output never reach the
+    checkpoints or prompts of later turns.
+    """
+
+    needs_portfolio: Annotated[Optional[bool], UntrackedValue]
+    needs_knowledge_base: Annotated[Optional[bool], UntrackedValue]
+    needs_python_code: Annotated[Optional[bool], UntrackedValue]
+    needs_web_search: Annotated[Optional[bool], UntrackedValue]
+    search_queries: Annotated[list[SearchQuery], UntrackedValue]
+    search_sufficient: Annotated[Optional[bool], UntrackedValue]
+    python_code_context: Annotated[Optional[str], UntrackedValue]
+    python_code: Annotated[Optional[str], UntrackedValue]
+    python_code_parameters: Annotated[Optional[list], UntrackedValue]
+    execution_result: Annotated[Optional[str], UntrackedValue]
+    knowledge_base_results: Annotated[Optional[str], UntrackedValue]
+    source_str: Annotated[Optional[str], UntrackedValue]
+    search_iterations: Annotated[int, UntrackedValue]
+    portfolio_data: Annotated[Optional[str], UntrackedValue]
+
+
 # Updated AppState with 'code' field
-class AppState(TypedDict):
+class AppState(TurnScratch):
     messages: Annotated[list, add_messages]
-    needs_portfolio: Optional[bool]
-    needs_knowledge_base: Optional[bool]
-    needs_python_code: Optional[bool]
-    needs_web_search: Optional[bool]
-    search_queries: list[SearchQuery]
-    search_sufficient: Optional[bool]
-    summary: Optional[str]
-    python_code_context: Optional[str]
-    python_code: Optional[str]
-    execution_result: Optional[str]
-    knowledge_base_results: Optional[str] = None
-    source_str: Optional[str] = None
-    search_iterations: int
-    portfolio_data: Optional[str] = None
+    # Rolling summary of turns older than the verbatim window, and how many
+    # messages from the start of the history it covers.
+    conversation_summary: Optional[str]
+    summarized_message_count: int
 
 
 class PythonSearchNeed(BaseModel):
@@ -40,13 +55,19 @@ class PythonSearchNeed(BaseModel):
     )
 
 
-class PythonCodeContext(BaseModel):
-    python_code_context: Optional[str] = Field(
-        None, description="Context for the Python code generation."
-    )
+class PythonCodeParameter(BaseModel):
+    name: str = Field(description="Variable name assigned at the top of the code.")
+    value: float = Field(description="Value of the variable, as given in the query.")
 
 
-class PythonCode(BaseModel):
+class PythonCodePlan(BaseModel):
+    python_code_context: Optional[str] = Field(
+        None, description="One or two sentences on what the code computes and how."
+    )
+    parameters: List[PythonCodeParameter] = Field(
+        default_factory=list,
+        description="Numeric inputs taken from the user query, in the order they appear.",
+    )
     code: Optional[str] = Field(
         None, description="Generated Python code to answer the user's query."
     )
@@ -3,6 +3,8 @@ from pydantic import BaseModel, Field
 import operator
 from langgraph.graph.message import add_messages
 
+from app.chat_provider.utils.checkpoint_serde import TextValue
+
 
 class Section(BaseModel):
     name: str = Field(
@@ -57,10 +59,9 @@ class ReportState(TypedDict):
     ]  # List of feedback on the report plan
     sections: list[Section]  # List of report sections
     completed_sections: Annotated[list, operator.add]  # Send() API key
-    report_sections_from_research: (
-        str  # String of any completed sections from research to write final sections
-    )
-    final_report: str  # Final report
+    # String of any completed sections from research to write final sections
+    report_sections_from_research: Annotated[str, TextValue]
+    final_report: Annotated[str, TextValue]  # Final report
 
 
 class SectionState(TypedDict):
@@ -68,10 +69,10 @@ class SectionState(TypedDict):
     section: Section  # Report section
     search_iterations: int  # Number of search iterations done
     search_queries: list[SearchQuery]  # List of search queries
-    source_str: str  # String of formatted source content from web search
-    report_sections_from_research: (
-        str  # String of any completed sections from research to write final sections
-    )
+    # String of formatted source content from web search
+    source_str: Annotated[str, TextValue]
+    # String of any completed sections from research to write final sections
+    report_sections_from_research: Annotated[str, TextValue]
     completed_sections: list[
         Section
     ]  # Final key we duplicate in outer state for Send() API
@@ -0,0 +1,163 @@
+import os
+import re
+import time
+from typing import Dict, Optional
+
+from app.chat_provider.utils.cache_utils import (
+    SimilarityIndex,
+    TTLCache,
+    normalize_query,
+    query_hash,
+)
+from app.chat_provider.utils.metrics import Counter
+
+ANSWER_CACHE_TTL_SECONDS = int(os.environ.get("ANSWER_CACHE_TTL_SECONDS", 86400))
+ANSWER_CACHE_MAX_ENTRIES = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 1024))
+# Set to 0 to only serve exact normalized hits.
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.9)
+)
+ANSWER_CACHE_BYPASS_HEADER = "X-Cache-Bypass"
+
+answer_cache_lookups = Counter(
+    "zenfi_answer_cache_lookups_total",
+    "Answer cache lookups by result (hit, near_hit, miss, ineligible, bypass).",
+    ["result"],
+)
+answer_cache_stores = Counter(
+    "zenfi_answer_cache_stores_total",
+    "Answers written to the answer cache.",
+)
+
+# Questions about concepts rather than markets, e.g. "what is a P/E ratio".
+_EDUCATIONAL = re.compile(
+    r"^(what is|what are|whats|what does|what do|explain|define|definition of|"
+    r"meaning of|difference between|how does|how do|how is|why do|why does|"
+    r"when should|tell me about)\b"
+)
+_TIME_SENSITIVE_WORDS = {
+    "today", "now", "current", "currently", "latest", "recent", "recently",
+    "live", "price", "prices", "quote", "trading", "news", "yesterday",
+    "tomorrow", "week", "weeks", "month", "months", "year", "years", "quarter",
+    "quarters", "forecast", "prediction",
+    "outlook", "target", "buy", "sell", "my", "portfolio", "holdings",
+    "nifty", "sensex", "rate", "rates", "inflation", "results", "earnings",
+}  # fmt: skip
+# Words that refer back to earlier turns; the answer depends on the conversation.
+_CONTEXT_WORDS = {
+    "it",
+    "its",
+    "this",
+    "that",
+    "these",
+    "those",
+    "they",
+    "them",
+    "above",
+}
+# Questions with numeric inputs ("EMI on 50 lakh at 8.5%") are calculations for
+# one user, not definitions; this also covers years such as 2024.
+_NUMBER = re.compile(r"\d")
+# Upper-case tokens in the raw query are usually tickers, except common acronyms.
+_TICKER = re.compile(r"\b[A-Z][A-Z0-9&]{1,14}(?:\.(?:NS|BO))?\b")
+_GLOSSARY_ACRONYMS = {
+    "PE", "EPS", "ROE", "ROCE", "ROI", "SIP", "SWP", "STP", "EMI", "ETF", "NAV",
+    "IPO", "FPO", "GDP", "CAGR", "XIRR", "NPS", "PPF", "EPF", "ELSS", "REIT",
+    "INVIT", "AMC", "SEBI", "KYC", "TDS", "LTCG", "STCG", "FD", "RD", "EBITDA",
+    "PB", "PEG", "DCF", "NPA", "ESG", "MF", "US", "UK", "AI", "FAQ", "CPI",
+}  # fmt: skip
+_STOPWORDS = {"a", "an", "the", "is", "are", "of", "to", "in", "for", "and", "vs", "me"}
+
+
+def is_time_insensitive(query: str) -> bool:
+    """
+    Local classifier for questions whose answer does not depend on market data,
+    the date, the user, the conversation or numbers the user supplied. Only
+    these answers may be cached.
+    """
+    normalized = normalize_query(query)
+    if not _EDUCATIONAL.search(normalized):
+        return False
+    words = set(normalized.split())
+    if words & _TIME_SENSITIVE_WORDS or words & _CONTEXT_WORDS:
+        return False
+    if _NUMBER.search(normalized):
+        return False
+    tickers = {t for t in _TICKER.findall(query or "") if t not in _GLOSSARY_ACRONYMS}
+    return not tickers
+
+
+def _terms(query: str) -> set:
+    return {
+        w.rstrip("s") for w in normalize_query(query).split() if w not in _STOPWORDS
+    }
+
+
+def _terms_text(query: str) -> str:
+    # Order-independent text for the similarity index.
+    return " ".join(sorted(_terms(query)))
+
+
+class AnswerCache:
+    """
+    Caches final answers to time-insensitive questions, keyed by a hash of the
+    normalized query. Near-duplicate phrasings are matched through a local
+    trigram index, but only when both questions use the same key terms, so
+    "P/E ratio" never serves a cached "P/B ratio" answer.
+    """
+
+    def __init__(
+        self,
+        ttl: float = ANSWER_CACHE_TTL_SECONDS,
+        maxsize: int = ANSWER_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._similarity = (
+            SimilarityIndex(threshold=similarity_threshold, maxsize=maxsize)
+            if similarity_threshold > 0
+            else None
+        )
+
+    def get(self, query: str) -> Optional[str]:
+        if not is_time_insensitive(query):
+            answer_cache_lookups.labels(result="ineligible").inc()
+            return None
+        entry = self._cache.get(query_hash(query))
+        if entry is not None:
+            answer_cache_lookups.labels(result="hit").inc()
+            return entry["answer"]
+        if self._similarity is not None:
+            match = self._similarity.search(_terms_text(query))
+            if match:
+                entry = self._cache.get(match[0])
+                if entry is None:
+                    self._similarity.remove(match[0])
+                elif _terms(entry["query"]) == _terms(query):
+                    answer_cache_lookups.labels(result="near_hit").inc()
+                    return entry["answer"]
+        answer_cache_lookups.labels(result="miss").inc()
+        return None
+
+    def set(self, query: str, answer: str, ttl: Optional[float] = None) -> bool:
+        """Stores the answer if the question qualifies. Returns whether it was stored."""
+        if not answer or not answer.strip() or not is_time_insensitive(query):
+            return False
+        key = query_hash(query)
+        self._cache.set(
+            key, {"query": query, "answer": answer, "stored_at": time.time()}, ttl
+        )
+        if self._similarity is not None:
+            self._similarity.add(key, _terms_text(query))
+        answer_cache_stores.inc()
+        return True
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+
+# Shared across ChatService instances; ChatServiceManager builds a new service per request.
+answer_cache = AnswerCache()
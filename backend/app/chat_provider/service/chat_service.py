@@ -1,48 +1,24 @@
+import asyncio
 import os
 from typing import AsyncGenerator
-from langchain_sandbox import PyodideSandbox
 from langgraph.graph import StateGraph, START, END
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, ToolMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
-from sqlalchemy import select
 from app.chat_provider.service.chat_service_prompt import (
     SYSTEM_INSTRUCTIONS,
     python_code_needed_decision_prompt,
-    python_code_context_prompt,
-    python_code_generation_prompt,
+    python_code_plan_prompt,
     generate_search_queries_system_prompt,
 )
-from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langchain_core.runnables import RunnableConfig
 from app.chat_provider.tools.finance_tools import (
-    get_stock_currency,
-    get_stock_day_high,
-    get_stock_day_low,
-    get_stock_exchange,
-    get_stock_fifty_day_average,
+    DEFAULT_SNAPSHOT_FIELDS,
     get_stock_history,
     get_stock_income_statement,
     get_stock_info,
-    get_stock_last_price,
-    get_stock_last_volume,
-    get_stock_market_cap,
-    get_stock_open,
     get_stock_options_chain,
-    get_stock_previous_close,
-    get_stock_quote_type,
-    get_stock_regular_market_previous_close,
-    get_stock_shares,
-    get_stock_ten_day_average_volume,
-    get_stock_three_month_average_volume,
-    get_stock_timezone,
-    get_stock_two_hundred_day_average,
-    get_stock_year_change,
-    get_stock_year_high,
-    get_stock_year_low,
-    get_stock_point_change,
-    get_stock_percentage_change,
-    get_stock_price_change,
+    get_stock_snapshot,
 )
 from app.chat_provider.tools.web_search_tools import (
     duckduckgo_search_run_tool,
@@ -56,20 +32,31 @@ from app.chat_provider.tools.basic_tools import (
     get_current_datetime,
     youtube_search_tool,
 )
+from app.chat_provider.tools.calculator_tools import CALCULATOR_TOOLS
 
 from app.chat_provider.models.chat_models import (
     AppState,
-    PythonCode,
-    PythonCodeContext,
+    PythonCodePlan,
     PythonSearchNeed,
     Queries,
 )
-from app.chat_provider.tools.rag_tools import (
-    get_db,
-)
-from app.api.api_models import ChatSession, KnowledgeBase, Portfolio
 from app.chat_provider.service.knowledge_base.knowledege_base import search_enhanced
-from sqlalchemy.orm import selectinload
+from app.chat_provider.service.code_cache import code_cache
+from app.chat_provider.service.answer_cache import answer_cache, answer_cache_lookups
+from app.chat_provider.service.memory_manager import ConversationMemory
+from app.chat_provider.service.routing_cache import routing_cache
+from app.chat_provider.service.sandbox_runner import sandbox_runner
+from app.chat_provider.service.tool_memo import MemoizedToolNode
+from app.chat_provider.service.user_context import get_user_context
+from app.chat_provider.service.tool_selector import (
+    TOOL_SELECTION_ENABLED,
+    bind_tools_cached,
+    tool_selector_for,
+)
+from app.chat_provider.utils.observability import instrument_graph
+from app.chat_provider.utils.llm_gateway import llm_call_options
+from app.chat_provider.utils.quote_cache import quote_cache
+from app.chat_provider.utils.ticker_extractor import extract_tickers
 
 from app.chat_provider.utils.search_utils import (
     get_search_params,
@@ -86,52 +73,39 @@ class ChatService:
     ):
         self.model = model
         self.tools = [
-            get_stock_currency,
-            get_stock_day_high,
-            get_stock_day_low,
-            get_stock_exchange,
-            get_stock_fifty_day_average,
-            get_stock_last_price,
-            get_stock_last_volume,
-            get_stock_market_cap,
-            get_stock_open,
-            get_stock_previous_close,
-            get_stock_quote_type,
-            get_stock_regular_market_previous_close,
-            get_stock_shares,
-            get_stock_ten_day_average_volume,
-            get_stock_three_month_average_volume,
-            get_stock_timezone,
-            get_stock_two_hundred_day_average,
-            get_stock_year_change,
-            get_stock_year_high,
-            get_stock_year_low,
+            get_stock_snapshot,
             get_stock_history,
             get_stock_income_statement,
             get_stock_info,
             get_stock_options_chain,
-            get_stock_point_change,
-            get_stock_percentage_change,
-            get_stock_price_change,
             brave_search_tool,
             duckduckgo_search_results_tool,
             duckduckgo_search_run_tool,
             duckduckgo_news_search_tool,
             get_current_datetime,
             youtube_search_tool,
+            *CALCULATOR_TOOLS,
         ]
-        self.tool_node = ToolNode(self.tools)
+        self.tool_node = MemoizedToolNode(self.tools)
         self.system_prompt_message = SystemMessage(
             content=SYSTEM_INSTRUCTIONS
             + "\n\nYou will be provided with search results related to the user's query. Use this information to provide accurate and up-to-date responses. Additionally, if you think a YouTube video would be helpful for the user's query, use the YouTubeSearchTool to find a relevant video and include the link in your response."
         )
-        self.bound_llm = self.model.bind_tools(self.tools)
+        self.bound_llm = bind_tools_cached(self.model, self.tools)
+        self.tool_selector = tool_selector_for(
+            self.tools, always=["get_current_datetime"]
+        )
+        self.memory = ConversationMemory(model=self.model)
 
     async def check_knowledge_base_query(self, state: AppState):
         last_message = state["messages"][-1]
         if isinstance(last_message, HumanMessage):
             user_input = last_message.content
 
+            cached = routing_cache.get_flag(user_input, "needs_knowledge_base")
+            if cached is not None:
+                return {"needs_knowledge_base": cached}
+
             knowledge_base_decision_prompt = f"""
                         Analyze the user query to determine if it requires accessing their personal knowledge base, which contains their transaction history, portfolio, and financial notes.
 
@@ -156,16 +130,20 @@ class ChatService:
                         Respond with ONLY "YES" if the knowledge base is needed, or "NO" if it's not.
                         """
 
-            response = await self.model.ainvoke(
-                [
-                    SystemMessage(
-                        content="You are an expert at determining information requirements."
-                    ),
-                    HumanMessage(content=knowledge_base_decision_prompt),
-                ]
-            )
+            with llm_call_options(hedge=True):
+                response = await self.model.ainvoke(
+                    [
+                        SystemMessage(
+                            content="You are an expert at determining information requirements."
+                        ),
+                        HumanMessage(content=knowledge_base_decision_prompt),
+                    ]
+                )
 
             needs_knowledge_base = response.content.strip().upper() == "YES"
+            routing_cache.set_flag(
+                user_input, "needs_knowledge_base", needs_knowledge_base
+            )
             print(
                 f"DEBUG [check_knowledge_base_query]: Query: '{user_input}', Needs knowledge base: {needs_knowledge_base}"
             )
@@ -202,53 +180,40 @@ class ChatService:
                     "knowledge_base_results": "No user ID found. Cannot search knowledge base."
                 }
 
-            async for db in get_db():
-                stmt = select(KnowledgeBase).where(
-                    KnowledgeBase.is_default,
-                    KnowledgeBase.user_id == int(user_id),
-                )
-                result = await db.execute(stmt)
-                knowledge_base = result.scalar_one_or_none()
+            user_context = await get_user_context(user_id)
+            if user_context is None:
+                return {"knowledge_base_results": "Database connection failed."}
 
-                if not knowledge_base:
-                    print("DEBUG [search_knowledge_base]: No knowledge base found")
-                    return {
-                        "knowledge_base_results": "No knowledge base found. Please create or select a knowledge base."
-                    }
+            kb_table_id = user_context["kb_table_id"]
+            if not kb_table_id:
+                print("DEBUG [search_knowledge_base]: No knowledge base found")
+                return {
+                    "knowledge_base_results": "No knowledge base found. Please create or select a knowledge base."
+                }
 
-                kb_table_id = str(knowledge_base.table_id)
-                if not kb_table_id:
+            try:
+                # Blocking retrieval and LLM calls; keep them off the event loop.
+                rag_result = await asyncio.to_thread(
+                    search_enhanced,
+                    table_id=kb_table_id,
+                    query=query,
+                    filter={"context": "some_context"},
+                )
+                if rag_result.get("answer"):
                     print(
-                        "DEBUG [search_knowledge_base]: Knowledge base has no table_id"
+                        f"DEBUG [search_knowledge_base]: Found answer: {rag_result['answer']}"
                     )
+                    return {"knowledge_base_results": rag_result["answer"]}
+                else:
+                    print("DEBUG [search_knowledge_base]: No answer found")
                     return {
-                        "knowledge_base_results": "Knowledge base has no table_id set."
+                        "knowledge_base_results": "No relevant information found in the knowledge base."
                     }
-
-                try:
-                    rag_result = search_enhanced(
-                        table_id=kb_table_id,
-                        query=query,
-                        filter={"context": "some_context"},
-                    )
-                    if rag_result.get("answer"):
-                        print(
-                            f"DEBUG [search_knowledge_base]: Found answer: {rag_result['answer']}"
-                        )
-                        return {"knowledge_base_results": rag_result["answer"]}
-                    else:
-                        print("DEBUG [search_knowledge_base]: No answer found")
-                        return {
-                            "knowledge_base_results": "No relevant information found in the knowledge base."
-                        }
-                except Exception as e:
-                    print(f"ERROR [search_knowledge_base]: Search failed: {str(e)}")
-                    return {
-                        "knowledge_base_results": f"Error searching knowledge base: {str(e)}"
-                    }
-
-            return {"knowledge_base_results": "Database connection failed."}
-
+            except Exception as e:
+                print(f"ERROR [search_knowledge_base]: Search failed: {str(e)}")
+                return {
+                    "knowledge_base_results": f"Error searching knowledge base: {str(e)}"
+                }
         except Exception as e:
             print(f"ERROR [search_knowledge_base]: Unexpected error: {str(e)}")
             return {"knowledge_base_results": f"Unexpected error: {str(e)}"}
@@ -258,6 +223,10 @@ class ChatService:
         if isinstance(last_message, HumanMessage):
             user_input = last_message.content
 
+            cached = routing_cache.get_flag(user_input, "needs_web_search")
+            if cached is not None:
+                return {"needs_web_search": cached}
+
             search_decision_prompt = f"""
             Analyze the following user query and determine if a web search is needed to answer it properly.
 
@@ -273,16 +242,18 @@ class ChatService:
             Respond with ONLY "YES" if web search is needed, or "NO" if it's not needed.
             """
 
-            response = await self.model.ainvoke(
-                [
-                    SystemMessage(
-                        content="You are an expert at determining information requirements."
-                    ),
-                    HumanMessage(content=search_decision_prompt),
-                ]
-            )
+            with llm_call_options(hedge=True):
+                response = await self.model.ainvoke(
+                    [
+                        SystemMessage(
+                            content="You are an expert at determining information requirements."
+                        ),
+                        HumanMessage(content=search_decision_prompt),
+                    ]
+                )
 
             needs_search = response.content.strip().upper() == "YES"
+            routing_cache.set_flag(user_input, "needs_web_search", needs_search)
             print(
                 f"DEBUG [determine_search_need]: Query: '{user_input}', Needs search: {needs_search}"
             )
@@ -373,59 +344,21 @@ class ChatService:
     async def generate_portfolio_data(self, state: AppState, config: RunnableConfig):
         if config:
             current_user_id = config["configurable"].get("user_id")
-        stmt = (
-            select(Portfolio)
-            .where(Portfolio.user_id == int(current_user_id))
-            .where(Portfolio.is_default)
-            .options(selectinload(Portfolio.assets))
-        )
         try:
-            async for db in get_db():
-                result = await db.execute(stmt)
-                portfolios = result.scalars().all()
-                if not portfolios:
-                    return {"portfolio_data": ""}
-
-                output_lines = []
-                for portfolio in portfolios:
-                    created_at = str(portfolio.created_at)
-                    description = str(portfolio.description)
-
-                    output_lines.append(f"Portfolio Name: {portfolio.name}")
-                    output_lines.append(f"Created At: {created_at}")
-                    output_lines.append(f"Description: {description}")
-                    if portfolio.assets:
-                        output_lines.append("Assets:")
-                        for asset in portfolio.assets:
-                            symbol = getattr(asset, "identifier", "N/A")
-                            created_at = getattr(asset, "created_at", "N/A")
-                            asset_id = getattr(asset, "id", "N/A")
-                            asset_type = getattr(asset, "asset_type", "N/A")
-                            quantity = getattr(asset, "quantity", "N/A")
-                            purchase_price = getattr(asset, "purchase_price", "N/A")
-                            purchase_date = getattr(asset, "purchase_date", "N/A")
-                            current_value = getattr(asset, "current_value", "N/A")
-                            notes = getattr(asset, "notes", "N/A")
-                            output_lines.append(
-                                f"  - Asset ID: {asset_id}, Asset Type: {asset_type}, Symbol: {symbol}, Created At: {created_at}, Quantity: {quantity}, Purchase Price: {purchase_price}, Purchase Date: {purchase_date}, Current Value: {current_value}, Notes: {notes}"
-                            )
-                    else:
-                        output_lines.append("Assets: None")
-                    output_lines.append("")
-                    return {"portfolio_data": "\n".join(output_lines).strip()}
-                print(
-                    f"DEBUG [generate_portfolio_data]: Generated portfolio data for user {current_user_id}"
-                )
-                print("DEBUG [generate_portfolio_data]: Output lines:", output_lines)
-
-                return {"portfolio_data": "\n".join(output_lines).strip()}
+            user_context = await get_user_context(current_user_id)
+            if not user_context or not user_context["portfolio"]:
+                return {"portfolio_data": ""}
+            print(
+                f"DEBUG [generate_portfolio_data]: Generated portfolio data for user {current_user_id}"
+            )
+            return {"portfolio_data": "\n".join(user_context["portfolio"]).strip()}
         except Exception as e:
             print(f"ERROR [search_portfolio]: {str(e)}")
             return f"Error fetching portfolio: {str(e)}"
 
     async def call_model(self, state: AppState):
         llm_messages = [self.system_prompt_message]
-        llm_messages.extend(state["messages"])
+        llm_messages.extend(self.memory.build_messages(state))
 
         additional_context = []
 
@@ -457,7 +390,11 @@ class ChatService:
             )
             llm_messages.append(context_message)
 
-        response = await self.bound_llm.ainvoke(llm_messages)
+        if TOOL_SELECTION_ENABLED:
+            bound_llm = bind_tools_cached(self.model, self.tool_selector.select(state))
+        else:
+            bound_llm = self.bound_llm
+        response = await bound_llm.ainvoke(llm_messages)
         return {"messages": [response]}
 
     def route_after_search_decision(self, state: AppState):
@@ -475,43 +412,6 @@ class ChatService:
         else:
             return "call_model"
 
-    async def generate_summary(self, state: AppState, config: RunnableConfig):
-        try:
-            messages = state["messages"]
-            if not messages:
-                return {"summary": "No conversation to summarize."}
-
-            recent_messages = messages[-3:] if len(messages) >= 3 else messages
-            conversation = "\n".join(
-                f"{msg.type}: {msg.content}" for msg in recent_messages
-            )
-            heading_prompt = f"Provide a concise heading (max 5 words) that best describes the following conversation. This will be used as a chat title.\n\n{conversation}"
-            response = await self.model.ainvoke(
-                [
-                    SystemMessage(content="You are a helpful assistant."),
-                    HumanMessage(content=heading_prompt),
-                ]
-            )
-            heading = response.content.strip()
-            if config:
-                session_id = config["configurable"].get("session_id")
-                print("Got Session id ", session_id)
-            else:
-                print("No config Found")
-
-            if not heading:
-                heading = "Heading generation failed."
-            stmt = select(ChatSession).where(ChatSession.id == session_id)
-            async for db in get_db():
-                res = await db.execute(stmt)
-                chat_session = res.scalar_one_or_none()
-                if chat_session:
-                    chat_session.summary = heading
-                    await db.commit()
-            return {"summary": heading}
-        except Exception as e:
-            return {"summary": f"Error generating heading: {str(e)}"}
-
     async def check_python_code_needed(self, state: AppState) -> dict:
         try:
             if not state["messages"]:
@@ -522,18 +422,23 @@ class ChatService:
             if not isinstance(last_message, HumanMessage):
                 return False
 
+            cached = routing_cache.get_flag(last_message.content, "needs_python_code")
+            if cached is not None:
+                return {"needs_python_code": cached}
+
             structured_llm = self.model.with_structured_output(PythonSearchNeed)
 
             formatted_prompt = python_code_needed_decision_prompt.format(
                 user_query=last_message
             )
 
-            response = await structured_llm.ainvoke(
-                [
-                    SystemMessage(content=formatted_prompt),
-                    HumanMessage(content="Does Python Code Generation needed ? "),
-                ]
-            )
+            with llm_call_options(hedge=True):
+                response = await structured_llm.ainvoke(
+                    [
+                        SystemMessage(content=formatted_prompt),
+                        HumanMessage(content="Does Python Code Generation needed ? "),
+                    ]
+                )
 
             print("LOG:", response.needs_python_code)
 
@@ -554,6 +459,9 @@ class ChatService:
             print(
                 f"DEBUG [check_python_code_needed]: Query: '{last_message}', Needs Python code: {needs_python_code}"
             )
+            routing_cache.set_flag(
+                last_message.content, "needs_python_code", needs_python_code
+            )
 
             return {"needs_python_code": needs_python_code}
 
@@ -563,72 +471,39 @@ class ChatService:
             )
             return {"needs_python_code": False}
 
-    async def generate_python_code_context(self, state: AppState):
-        try:
-            if not state["messages"]:
-                return {"python_code_context": None}
-
-            last_message = state["messages"][-1]
-            if not isinstance(last_message, HumanMessage):
-                return {"python_code_context": None}
-
-            if not state.get("needs_python_code", False):
-                print(
-                    f"DEBUG [generate_python_code_context]: Python code generation not needed for query: '{last_message.content}'"
-                )
-                return {"python_code_context": None}
-
-            structured_llm = self.model.with_structured_output(PythonCodeContext)
-            formatted_prompt = python_code_context_prompt.format(
-                user_query=last_message.content
-            )
-
-            response = await structured_llm.ainvoke(
-                [
-                    SystemMessage(content=formatted_prompt),
-                    HumanMessage(
-                        content="Provide the Python code context for the user's query."
-                    ),
-                ]
-            )
-
-            python_code_context = getattr(response, "python_code_context", None)
-            if not python_code_context:
-                print(
-                    f"DEBUG [generate_python_code_context]: No context generated for query: '{last_message.content}'"
-                )
-                return {"python_code_context": None}
-
-            print(
-                f"DEBUG [generate_python_code_context]: Query: '{last_message.content}', Context: {python_code_context}"
-            )
-            return {"python_code_context": python_code_context}
-
-        except Exception as e:
-            print(
-                f"ERROR [generate_python_code_context]: Failed to process query: {str(e)}"
-            )
-            return {"python_code_context": None}
-
     async def generate_python_code(self, state: AppState):
+        """
+        Plans and writes the calculation code in a single structured call,
+        or reuses code generated earlier for the same calculation.
+        """
+        empty = {
+            "python_code_context": None,
+            "python_code": None,
+            "python_code_parameters": None,
+        }
         try:
             if not state["messages"] or not state.get("needs_python_code", False):
-                return {"python_code": None}
+                return empty
 
             last_message = state["messages"][-1]
             if not isinstance(last_message, HumanMessage):
-                return {"python_code": None}
+                return empty
 
-            python_code_context = state.get("python_code_context")
-            if not python_code_context:
+            cached = code_cache.get(last_message.content)
+            if cached is not None:
                 print(
-                    f"DEBUG [generate_python_code]: No context available for query: '{last_message.content}'"
+                    f"DEBUG [generate_python_code]: Reusing cached code for query: '{last_message.content}'"
                 )
-                return {"python_code": None}
+                # Already cached; nothing to store after execution.
+                return {
+                    "python_code_context": cached["context"],
+                    "python_code": cached["code"],
+                    "python_code_parameters": None,
+                }
 
-            structured_llm = self.model.with_structured_output(PythonCode)
-            formatted_prompt = python_code_generation_prompt.format(
-                user_query=last_message.content, prompt=python_code_context
+            structured_llm = self.model.with_structured_output(PythonCodePlan)
+            formatted_prompt = python_code_plan_prompt.format(
+                user_query=last_message.content
             )
 
             response = await structured_llm.ainvoke(
@@ -643,16 +518,20 @@ class ChatService:
                 print(
                     f"DEBUG [generate_python_code]: No code generated for query: '{last_message.content}'"
                 )
-                return {"python_code": None}
+                return empty
 
             print(
-                f"DEBUG [generate_python_code]: Query: '{last_message.content}', Code: {python_code}"
+                f"DEBUG [generate_python_code]: Query: '{last_message.content}', Context: {response.python_code_context}, Code: {python_code}"
             )
-            return {"python_code": python_code}
+            return {
+                "python_code_context": response.python_code_context,
+                "python_code": python_code,
+                "python_code_parameters": [p.model_dump() for p in response.parameters],
+            }
 
         except Exception as e:
             print(f"ERROR [generate_python_code]: Failed to process query: {str(e)}")
-            return {"python_code": None}
+            return empty
 
     async def execute_python_code(self, state: AppState):
         try:
@@ -661,9 +540,16 @@ class ChatService:
                 print("DEBUG [execute_python_code]: No Python code to execute")
                 return {"execution_result": "No code provided"}
 
-            sandbox = PyodideSandbox(allow_net=True)
-            result = await sandbox.execute(python_code)
+            result = await sandbox_runner.execute(python_code)
             print(f"DEBUG [execute_python_code]: Execution result: {result}")
+            parameters = state.get("python_code_parameters")
+            if result.status == "success" and parameters is not None:
+                code_cache.set(
+                    state["messages"][-1].content,
+                    python_code,
+                    context=state.get("python_code_context"),
+                    parameters=parameters,
+                )
             return {"execution_result": result}
 
         except Exception as e:
@@ -674,14 +560,12 @@ class ChatService:
         builder = StateGraph(AppState)
 
         # --- Nodes ---- #
+        builder.add_node("manage_memory", self.memory.update)
         builder.add_node("check_portfolio_query", self.check_portfolio_query)
         builder.add_node("generate_portfolio_data", self.generate_portfolio_data)
         builder.add_node("check_knowledge_base_query", self.check_knowledge_base_query)
         builder.add_node("search_knowledge_base", self.search_knowledge_base)
         builder.add_node("check_python_code_needed", self.check_python_code_needed)
-        builder.add_node(
-            "generate_python_code_context", self.generate_python_code_context
-        )
         builder.add_node("generate_python_code", self.generate_python_code)
         builder.add_node("execute_python_code", self.execute_python_code)
         builder.add_node("determine_search_need", self.determine_search_need)
@@ -689,11 +573,11 @@ class ChatService:
         builder.add_node("search_web", self.search_web)
         builder.add_node("evaluate_search_results", self.evaluate_search_results)
         builder.add_node("call_model", self.call_model)
-        builder.add_node("generate_summary", self.generate_summary)
-        builder.add_node("tool_node", self.tool_node)
+        builder.add_node("tool_node", self.tool_node.ainvoke)
 
         # --- Edges ---- #
-        builder.add_edge(START, "check_portfolio_query")
+        builder.add_edge(START, "manage_memory")
+        builder.add_edge("manage_memory", "check_portfolio_query")
         builder.add_conditional_edges(
             "check_portfolio_query",
             lambda state: state.get("needs_portfolio", False),
@@ -710,9 +594,8 @@ class ChatService:
         builder.add_conditional_edges(
             "check_python_code_needed",
             lambda state: state.get("needs_python_code", False),
-            {True: "generate_python_code_context", False: "determine_search_need"},
+            {True: "generate_python_code", False: "determine_search_need"},
         )
-        builder.add_edge("generate_python_code_context", "generate_python_code")
         builder.add_edge("generate_python_code", "execute_python_code")
         builder.add_edge("execute_python_code", "determine_search_need")
 
@@ -740,29 +623,35 @@ class ChatService:
             """
             Decide what to do after the LLM has been called.
             If the model decided to use a tool, route to the tool_node.
-            Otherwise, the model has produced a final answer, so generate a summary.
+            Otherwise, the model has produced a final answer and the turn ends.
+            Chat titles are generated outside the graph, see title_service.
             """
             last_message = state["messages"][-1]
             if isinstance(last_message, AIMessage) and last_message.tool_calls:
                 return "tool_node"
             else:
-                return "generate_summary"
+                return END
 
         builder.add_conditional_edges(
             "call_model",
             route_after_model_call,
-            {"tool_node": "tool_node", "generate_summary": "generate_summary"},
+            {"tool_node": "tool_node", END: END},
         )
 
         builder.add_edge("tool_node", "call_model")
 
-        builder.add_edge("generate_summary", END)
-
-        self.graph = builder.compile(checkpointer=checkpointer)
+        self.graph = instrument_graph(
+            builder.compile(checkpointer=checkpointer), "chat"
+        )
         return self.graph
 
     async def stream_input(
-        self, user_input: str, thread_id: str, user_id: str, session_id: str
+        self,
+        user_input: str,
+        thread_id: str,
+        user_id: str,
+        session_id: str,
+        bypass_cache: bool = False,
     ) -> AsyncGenerator[str, None]:
         config = RunnableConfig(
             configurable={
@@ -775,10 +664,38 @@ class ChatService:
             }
         )
         input_state = {"messages": [HumanMessage(content=user_input)]}
+
+        if bypass_cache:
+            answer_cache_lookups.labels(result="bypass").inc()
+        else:
+            cached_answer = answer_cache.get(user_input)
+            if cached_answer is not None:
+                print(f"DEBUG [stream_input]: Answer cache hit for: {user_input}")
+                yield cached_answer
+                # Record the turn in the checkpoint as if call_model had answered.
+                await self.graph.aupdate_state(
+                    config,
+                    {
+                        "messages": input_state["messages"]
+                        + [AIMessage(content=cached_answer)]
+                    },
+                    as_node="call_model",
+                )
+                return
+
+        # Warm the quote cache for tickers the message names while the graph
+        # routes, so a later get_stock_snapshot call is served from cache.
+        mentioned_symbols = extract_tickers(user_input)
+        if mentioned_symbols:
+            quote_cache.prefetch(mentioned_symbols, DEFAULT_SNAPSHOT_FIELDS)
+
         yielded_contents = set()
+        final_state = None
+        final_content = None
         async for state_update_values in self.graph.astream(
             input_state, config, stream_mode="values"
         ):
+            final_state = state_update_values
             last_message = state_update_values["messages"][-1]
             if isinstance(last_message, AIMessage):
                 content = last_message.content
@@ -792,8 +709,56 @@ class ChatService:
                     content = content_str.strip()
                 if content and content not in yielded_contents:
                     yielded_contents.add(content)
+                    final_content = content
                     yield content
 
+        if (
+            final_content
+            and final_state
+            and self._is_opening_turn(final_state)
+            and self._answered_without_data(final_state)
+        ):
+            answer_cache.set(user_input, final_content)
+        if final_state:
+            # Summarize older turns now the answer is out; the next turn applies it.
+            self.memory.schedule_fold(thread_id, final_state)
+
+    @staticmethod
+    def _is_opening_turn(state: AppState) -> bool:
+        """
+        True when the turn is the first of its thread. Later answers are written
+        with the user's conversation in the prompt and may be tailored to it,
+        so only these are shared through the global answer cache.
+        """
+        if state.get("conversation_summary"):
+            return False
+        questions = [m for m in state["messages"] if isinstance(m, HumanMessage)]
+        return len(questions) == 1
+
+    def _answered_without_data(self, state: AppState) -> bool:
+        """
+        True when the turn's answer came from the model alone: no portfolio,
+        knowledge base, code execution, web search or tool calls were involved.
+        """
+        if any(
+            state.get(flag)
+            for flag in (
+                "needs_portfolio",
+                "needs_knowledge_base",
+                "needs_python_code",
+                "needs_web_search",
+            )
+        ):
+            return False
+        for message in reversed(state["messages"]):
+            if isinstance(message, HumanMessage):
+                return True
+            if isinstance(message, ToolMessage) or (
+                isinstance(message, AIMessage) and message.tool_calls
+            ):
+                return False
+        return True
+
 
 if __name__ == "__main__":
     import asyncio
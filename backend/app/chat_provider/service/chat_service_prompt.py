@@ -106,6 +106,7 @@ Guidelines:
    - Request simple data retrieval (e.g., stock prices, market cap, or other single data points).
    - Ask for news, explanations, general information, or educational content.
    - Can be answered using available financial tools without Python code.
+   - Are standard calculations handled by the built-in calculator tools: CAGR, XIRR, SIP future value, loan EMI or amortization schedule, compound interest, and maximum drawdown.
 3. If the query is ambiguous, default to "NO" unless it clearly involves computational analysis.
 
 Examples of queries that REQUIRE Python code ("Code needed"):
@@ -120,28 +121,23 @@ Examples of queries that DO NOT REQUIRE Python code ("NO"):
 - "What is the P/E ratio of Tesla?"
 - "Explain what a dividend yield is."
 - "Show me the latest financial news."
+- "What is the EMI on a 50 lakh loan at 8.5% for 20 years?"
+- "What will a 10,000 monthly SIP at 12% be worth after 15 years?"
 
 RESPOND ONLY WITH "Code needed" or "NO". DO NOT PROVIDE ANY EXPLANATION OR ADDITIONAL TEXT.
 """
 
 
-python_code_context_prompt = """
-<User Query>
-{user_query}
-</User Query>
-You are a Python code context generator. Give A Prompt on What python code is needed to answer the user query.
-"""
-
-python_code_generation_prompt = """
+python_code_plan_prompt = """
 <User Query>
 {user_query}
 </User Query>
 
-<Prompt>
-{prompt}
-</Prompt>
+You are a Python code generator for financial calculations and data analysis. Plan and write the code that answers the user query in one step.
 
-You are python code generator. Your task is to generate Python Code based on the provided prompt. The code should be executable and relevant to the user query. Ensure that the code is well-structured, efficient, and includes necessary imports. Do not provide any explanations or additional text.
+1. python_code_context: Briefly describe what the code computes and the method used.
+2. parameters: List every number taken from the user query as a named input, in the order the numbers appear in the query.
+3. code: Executable Python code with all necessary imports. Start the code with one top-level assignment per parameter, using the same names and the numbers exactly as written in the query (e.g. `principal = 10` for "10 lakh"); do any unit conversion in the code after these assignments. Print the results. Do not provide any explanations or additional text in the code.
 """
 
 generate_search_queries_system_prompt = """
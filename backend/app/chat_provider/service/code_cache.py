@@ -0,0 +1,166 @@
+import ast
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from app.chat_provider.utils.cache_utils import TTLCache, normalize_query, query_hash
+from app.chat_provider.utils.metrics import Counter
+
+CODE_CACHE_TTL_SECONDS = int(os.environ.get("CODE_CACHE_TTL_SECONDS", 7 * 86400))
+CODE_CACHE_MAX_ENTRIES = int(os.environ.get("CODE_CACHE_MAX_ENTRIES", 1024))
+
+_NUMBER = re.compile(r"(?<![\w.])\d+(?:\.\d+)?")
+_DIGIT_GROUPING = re.compile(r"(?<=\d),(?=\d)")
+
+code_cache_lookups = Counter(
+    "zenfi_code_cache_lookups_total",
+    "Generated Python code lookups by result (exact, template, miss).",
+    ["result"],
+)
+
+
+def extract_parameters(query: str) -> Tuple[str, List[float]]:
+    """
+    Splits a query into a template with numbers replaced by <n> and the numbers
+    in order, e.g. "EMI for 10 lakh at 8.5%" -> ("emi for <n> lakh at <n>%", [10, 8.5]).
+    """
+    normalized = normalize_query(_DIGIT_GROUPING.sub("", query or ""))
+    numbers = [float(m) for m in _NUMBER.findall(normalized)]
+    return _NUMBER.sub("<n>", normalized), numbers
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _assignment(name: str) -> re.Pattern:
+    return re.compile(rf"^{re.escape(name)}\s*=.*$", re.MULTILINE)
+
+
+def _top_level_values(code: str) -> Dict[str, List[Optional[float]]]:
+    """
+    Maps each name the code binds at top level to the values it is assigned:
+    a number for a bare numeric literal (`rate = 8.5`), None for anything else
+    (`rate = 8.5 / 100 / 12`, `rate += 1`, `rate: float = 8.5`).
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return {}
+    values: Dict[str, List[Optional[float]]] = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, (ast.AugAssign, ast.AnnAssign)):
+            targets, value = [node.target], None
+        else:
+            continue
+        literal = None
+        if (
+            isinstance(value, ast.Constant)
+            and isinstance(value.value, (int, float))
+            and not isinstance(value.value, bool)
+        ):
+            literal = float(value.value)
+        for target in targets:
+            for name in ast.walk(target):
+                if isinstance(name, ast.Name):
+                    single = len(targets) == 1 and target is name
+                    values.setdefault(name.id, []).append(literal if single else None)
+    return values
+
+
+class PythonCodeCache:
+    """
+    Caches generated calculation code so repeated calculations skip the LLM.
+    Exact repeats hit on the normalized query. Code whose parameters map onto
+    the numbers in the query is also stored under the query template, so
+    "EMI for 20 lakh at 9% for 15 years" reuses the code generated for
+    "EMI for 10 lakh at 8% for 20 years" with the new values substituted.
+    """
+
+    def __init__(
+        self, ttl: float = CODE_CACHE_TTL_SECONDS, maxsize: int = CODE_CACHE_MAX_ENTRIES
+    ):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, query: str) -> Optional[Dict[str, str]]:
+        """Returns {"code", "context"} for the query, or None on a miss."""
+        entry = self._cache.get(("exact", query_hash(query)))
+        if entry is not None:
+            code_cache_lookups.labels(result="exact").inc()
+            return dict(entry)
+
+        template, numbers = extract_parameters(query)
+        entry = self._cache.get(("template", query_hash(template)))
+        if entry is not None and len(numbers) == entry["arity"]:
+            code = entry["code"]
+            for name, index in entry["bindings"].items():
+                code = _assignment(name).sub(
+                    f"{name} = {_format_value(numbers[index])}", code, count=1
+                )
+            code_cache_lookups.labels(result="template").inc()
+            return {"code": code, "context": entry["context"]}
+
+        code_cache_lookups.labels(result="miss").inc()
+        return None
+
+    def set(
+        self,
+        query: str,
+        code: str,
+        context: Optional[str] = None,
+        parameters: Optional[List[Dict]] = None,
+    ) -> None:
+        """
+        Stores code that ran successfully. `parameters` are the {name, value}
+        inputs the code assigns at top level; they enable template reuse when
+        each is assigned once, to a bare literal equal to its value, matches
+        exactly one number in the query, and every number is matched.
+        """
+        self._cache.set(
+            ("exact", query_hash(query)), {"code": code, "context": context}
+        )
+
+        template, numbers = extract_parameters(query)
+        if not numbers or not parameters:
+            return
+        assigned = _top_level_values(code)
+        bindings: Dict[str, int] = {}
+        for param in parameters:
+            name, value = param.get("name"), param.get("value")
+            if not name or value is None:
+                return
+            # Substitution rewrites the whole assignment line, so it must be the
+            # parameter's only one and hold just the number; `rate = 8.5 / 1200`
+            # would otherwise lose its unit conversion.
+            if assigned.get(name) != [float(value)]:
+                return
+            matches = [
+                index
+                for index, number in enumerate(numbers)
+                if abs(number - float(value)) < 1e-9
+            ]
+            if len(matches) != 1 or matches[0] in bindings.values():
+                # "8% for 8 years": which 8 is which cannot be told from the
+                # values, and a wrong guess would silently swap inputs later.
+                return
+            bindings[name] = matches[0]
+        if len(bindings) != len(numbers):
+            # Some number in the query is not a parameter; only exact reuse is safe.
+            return
+        self._cache.set(
+            ("template", query_hash(template)),
+            {
+                "code": code,
+                "context": context,
+                "bindings": bindings,
+                "arity": len(numbers),
+            },
+        )
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+code_cache = PythonCodeCache()
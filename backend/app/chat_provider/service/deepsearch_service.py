@@ -13,37 +13,15 @@ from app.chat_provider.service.deepsearch_service_prompt import (
     section_writer_instructions,
 )
 from langgraph.graph import MessagesState
-from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from langchain_core.runnables import RunnableConfig
 from app.chat_provider.tools.finance_tools import (
-    get_stock_currency,
-    get_stock_day_high,
-    get_stock_day_low,
-    get_stock_exchange,
-    get_stock_fifty_day_average,
+    DEFAULT_SNAPSHOT_FIELDS,
     get_stock_history,
     get_stock_income_statement,
     get_stock_info,
-    get_stock_last_price,
-    get_stock_last_volume,
-    get_stock_market_cap,
-    get_stock_open,
     get_stock_options_chain,
-    get_stock_percentage_change,
-    get_stock_point_change,
-    get_stock_previous_close,
-    get_stock_price_change,
-    get_stock_quote_type,
-    get_stock_regular_market_previous_close,
-    get_stock_shares,
-    get_stock_ten_day_average_volume,
-    get_stock_three_month_average_volume,
-    get_stock_timezone,
-    get_stock_two_hundred_day_average,
-    get_stock_year_change,
-    get_stock_year_high,
-    get_stock_year_low,
+    get_stock_snapshot,
 )
 from app.chat_provider.tools.web_search_tools import (
     google_search_tool,
@@ -77,6 +55,10 @@ from app.chat_provider.service.deepsearch_utils import (
     get_search_params,
     select_and_execute_search,
 )
+from app.chat_provider.service.tool_memo import MemoizedToolNode
+from app.chat_provider.utils.observability import instrument_graph
+from app.chat_provider.utils.quote_cache import quote_cache
+from app.chat_provider.utils.ticker_extractor import extract_tickers
 from app.chat_provider.service.deepsearch_configuration import (
     DEFAULT_REPORT_STRUCTURE,
     Configuration,
@@ -100,33 +82,11 @@ class DeepSearchChatService:
         self.model = model
         # Define the tools
         self.tools = [
-            get_stock_currency,
-            get_stock_day_high,
-            get_stock_day_low,
-            get_stock_exchange,
-            get_stock_fifty_day_average,
-            get_stock_last_price,
-            get_stock_last_volume,
-            get_stock_market_cap,
-            get_stock_open,
-            get_stock_previous_close,
-            get_stock_quote_type,
-            get_stock_regular_market_previous_close,
-            get_stock_shares,
-            get_stock_ten_day_average_volume,
-            get_stock_three_month_average_volume,
-            get_stock_timezone,
-            get_stock_two_hundred_day_average,
-            get_stock_year_change,
-            get_stock_year_high,
-            get_stock_year_low,
+            get_stock_snapshot,
             get_stock_history,
             get_stock_income_statement,
             get_stock_info,
             get_stock_options_chain,
-            get_stock_point_change,
-            get_stock_percentage_change,
-            get_stock_price_change,
             google_search_tool,
             brave_search_tool,
             duckduckgo_search_results_tool,
@@ -139,7 +99,7 @@ class DeepSearchChatService:
             python_sandbox_tool,
         ]
         # Tool Node
-        self.tool_node = ToolNode(self.tools)
+        self.tool_node = MemoizedToolNode(self.tools)
         # Bind tools to the model
         self.bound_llm = self.model.bind_tools(self.tools)
 
@@ -196,7 +156,7 @@ class DeepSearchChatService:
                 if hasattr(last_msg, "tool_calls") and last_msg.tool_calls:
                     # Execute tools
                     tool_state["messages"] = updated_messages
-                    tool_response = await self.tool_node.ainvoke(tool_state)
+                    tool_response = await self.tool_node.ainvoke(tool_state, config)
 
                     # Get the tool results
                     tool_messages = tool_response.get("messages", [])
@@ -571,7 +531,7 @@ class DeepSearchChatService:
             output=ReportStateOutput,
             config_schema=Configuration,
         )
-        builder.add_node("tools", self.tool_node)
+        builder.add_node("tools", self.tool_node.ainvoke)
         builder.add_node("generate_report_plan", self.generate_report_plan)
         builder.add_node("dispatch_sections", self.dispatch_sections)
         builder.add_node("build_section_with_web_research", section_builder.compile())
@@ -589,7 +549,9 @@ class DeepSearchChatService:
         )
         builder.add_edge("write_final_sections", "compile_final_report")
         builder.add_edge("compile_final_report", END)
-        self.graph = builder.compile(checkpointer=checkpointer)
+        self.graph = instrument_graph(
+            builder.compile(checkpointer=checkpointer), "deepsearch"
+        )
         return self.graph
 
     async def stream_input(
@@ -615,6 +577,11 @@ class DeepSearchChatService:
             "final_report": "",
         }
 
+        # Warm the quote cache for tickers the topic names while planning runs.
+        mentioned_symbols = extract_tickers(user_input)
+        if mentioned_symbols:
+            quote_cache.prefetch(mentioned_symbols, DEFAULT_SNAPSHOT_FIELDS)
+
         # Track if we've yielded anything
         has_yielded = False
 
@@ -3,7 +3,6 @@ from typing import Any, Dict, List, Optional
 import uuid
 from fastapi import HTTPException
 from langchain_google_genai import (
-    ChatGoogleGenerativeAI,
     HarmBlockThreshold,
     HarmCategory,
 )
@@ -11,6 +10,7 @@ from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
 )  # Keep for ingest_vectors
 from sqlalchemy import select
+from app.chat_provider.utils.llm_gateway import GatewayChatModel
 from app.chat_provider.service.knowledge_base.knowledge_base_pdf_helpers import (
     SemanticBoundariesTextSplitter,
     calculate_text_content_quality,
@@ -393,7 +393,7 @@ Answer:"""
         )
         # raise ValueError("GOOGLE_GEMINI_API_KEY is required for ChatGoogleGenerativeAI")
 
-    llm = ChatGoogleGenerativeAI(
+    llm = GatewayChatModel(
         model="gemini-2.5-pro-preview-03-25",
         google_api_key=gemini_api_key,
         temperature=0.1,
@@ -0,0 +1,309 @@
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import RunnableConfig
+
+from app.chat_provider.utils.cache_utils import TTLCache
+from app.chat_provider.utils.metrics import Counter, Histogram
+
+CHAT_MEMORY_MAX_TURNS = int(os.environ.get("CHAT_MEMORY_MAX_TURNS", 6))
+CHAT_MEMORY_TOKEN_BUDGET = int(os.environ.get("CHAT_MEMORY_TOKEN_BUDGET", 6000))
+# Once the window overflows, fold down to this many turns so the summary is
+# refreshed every few turns instead of on every turn.
+CHAT_MEMORY_MIN_TURNS = int(os.environ.get("CHAT_MEMORY_MIN_TURNS", 3))
+CHAT_MEMORY_SUMMARY_MAX_WORDS = int(
+    os.environ.get("CHAT_MEMORY_SUMMARY_MAX_WORDS", 250)
+)
+# Tool outputs are truncated before being folded; the summary keeps facts, not raw data.
+TOOL_OUTPUT_FOLD_CHARS = 400
+CHARS_PER_TOKEN = 4
+# A fold computed after a turn waits this long for the conversation's next turn.
+CHAT_MEMORY_FOLD_TTL_SECONDS = int(
+    os.environ.get("CHAT_MEMORY_FOLD_TTL_SECONDS", 7 * 86400)
+)
+
+
+def _redis():
+    # The process-wide client; imported late because api_functions imports this module.
+    from app.api.api_functions import redis_client
+
+    return redis_client
+
+
+# Shared across ChatService instances; ChatServiceManager builds a new service per request.
+# Folds parked here when Redis is not configured or unreachable.
+_local_folds = TTLCache(maxsize=4096, ttl=CHAT_MEMORY_FOLD_TTL_SECONDS)
+# Background folds currently running, by thread id.
+_inflight: Dict[str, asyncio.Task] = {}
+
+memory_folds = Counter(
+    "zenfi_chat_memory_folds_total",
+    "Times older conversation turns were folded into the rolling summary, "
+    "by stage (computed after a turn, applied on the next).",
+    ["stage"],
+)
+memory_prompt_tokens = Histogram(
+    "zenfi_chat_memory_prompt_tokens",
+    "Estimated history tokens sent to the model per call, after memory management.",
+    buckets=(250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000),
+)
+
+
+def _content_text(message: BaseMessage) -> str:
+    content = message.content
+    if isinstance(content, list):
+        return " ".join(
+            item.get("text", "") if isinstance(item, dict) else str(item)
+            for item in content
+        )
+    return str(content or "")
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    """Rough token estimate (4 characters per token), good enough for budgeting."""
+    total = 0
+    for message in messages:
+        total += len(_content_text(message))
+        if isinstance(message, AIMessage) and message.tool_calls:
+            total += sum(len(str(call.get("args", ""))) for call in message.tool_calls)
+    return total // CHARS_PER_TOKEN
+
+
+def turn_starts(messages: List[BaseMessage]) -> List[int]:
+    """Indexes of the HumanMessages that open each turn."""
+    return [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+
+
+def _fold_key(thread_id: str) -> str:
+    return f"chat_memory:{thread_id}:fold"
+
+
+def _render_for_summary(messages: List[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        text = _content_text(message).strip()
+        if isinstance(message, HumanMessage):
+            lines.append(f"User: {text}")
+        elif isinstance(message, ToolMessage):
+            lines.append(f"Tool {message.name}: {text[:TOOL_OUTPUT_FOLD_CHARS]}")
+        elif isinstance(message, AIMessage):
+            if message.tool_calls:
+                names = ", ".join(call["name"] for call in message.tool_calls)
+                lines.append(f"Assistant called tools: {names}")
+            if text:
+                lines.append(f"Assistant: {text}")
+    return "\n".join(lines)
+
+
+class ConversationMemory:
+    """
+    Keeps the last few turns of a conversation verbatim, within a token budget,
+    and folds everything older into a rolling summary stored in graph state.
+    The summary is extended with only the newly folded turns, never rebuilt
+    from the full history.
+
+    Folding costs a model call, so it never runs while the user waits: after a
+    turn is answered, schedule_fold summarizes in the background and parks the
+    result in Redis, and the manage_memory node of the conversation's next
+    turn writes it into graph state.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_turns: int = CHAT_MEMORY_MAX_TURNS,
+        token_budget: int = CHAT_MEMORY_TOKEN_BUDGET,
+        min_turns: int = CHAT_MEMORY_MIN_TURNS,
+    ):
+        self.model = model
+        self.max_turns = max(1, max_turns)
+        self.token_budget = token_budget
+        self.min_turns = max(1, min(min_turns, self.max_turns))
+
+    def _window_start(self, messages: List[BaseMessage], start: int) -> int:
+        """
+        Returns the index from which messages are kept verbatim. Only cuts at
+        turn boundaries, so tool calls and their results always stay together,
+        and never drops the latest turn.
+        """
+        starts = [i for i in turn_starts(messages) if i >= start]
+        if not starts:
+            return start
+        kept = starts[-self.max_turns :]
+        overflow = len(starts) > self.max_turns or (
+            estimate_tokens(messages[kept[0] :]) > self.token_budget
+        )
+        if not overflow:
+            return start
+
+        # Fold down to min_turns, then drop further turns while over budget.
+        kept = starts[-self.min_turns :]
+        while (
+            len(kept) > 1 and estimate_tokens(messages[kept[0] :]) > self.token_budget
+        ):
+            kept = kept[1:]
+        return kept[0]
+
+    async def _fold(self, summary: Optional[str], messages: List[BaseMessage]) -> str:
+        transcript = _render_for_summary(messages)
+        prompt = f"""You maintain a running summary of a conversation between a user and a financial assistant.
+
+Current summary:
+{summary or "(empty)"}
+
+New conversation turns to fold in:
+{transcript}
+
+Rewrite the summary so it also covers the new turns. Keep the user's goals, preferences, holdings, tickers, figures and conclusions that later questions may refer back to. Drop small talk and raw data. Respond with the summary only, at most {CHAT_MEMORY_SUMMARY_MAX_WORDS} words."""
+        response = await self.model.ainvoke([HumanMessage(content=prompt)])
+        return _content_text(response).strip()
+
+    @staticmethod
+    def _summarized_count(state) -> int:
+        summarized = state.get("summarized_message_count") or 0
+        if summarized > len(state.get("messages") or []):
+            # History was rewritten underneath us; start over.
+            return 0
+        return summarized
+
+    async def _store_fold(self, thread_id: str, fold: dict) -> None:
+        redis = _redis()
+        if redis:
+            try:
+                await redis.set(
+                    _fold_key(thread_id),
+                    json.dumps(fold),
+                    ex=CHAT_MEMORY_FOLD_TTL_SECONDS,
+                )
+                return
+            except Exception as e:
+                print(f"ERROR [ConversationMemory]: Redis SET failed: {e}")
+        _local_folds.set(thread_id, fold)
+
+    async def _take_fold(self, thread_id: str) -> Optional[dict]:
+        fold = _local_folds.get(thread_id)
+        _local_folds.delete(thread_id)
+        redis = _redis()
+        if redis:
+            try:
+                cached = await redis.getdel(_fold_key(thread_id))
+                if cached:
+                    fold = json.loads(cached)
+            except Exception as e:
+                print(f"ERROR [ConversationMemory]: Redis GETDEL failed: {e}")
+        return fold
+
+    async def prepare_fold(self, thread_id: str, state) -> None:
+        """
+        Summarizes turns that fell out of the verbatim window after this turn
+        and stores the result for the next turn to apply.
+        """
+        messages = state.get("messages") or []
+        summarized = self._summarized_count(state)
+        cutoff = self._window_start(messages, summarized)
+        if cutoff <= summarized:
+            return
+
+        summary = state.get("conversation_summary")
+        try:
+            summary = await self._fold(summary, messages[summarized:cutoff])
+        except Exception as e:
+            # The next turn sends the full window and folding is retried after it.
+            print(f"ERROR [ConversationMemory.prepare_fold]: Could not fold history: {e}")
+            return
+        await self._store_fold(
+            thread_id, {"from": summarized, "to": cutoff, "summary": summary}
+        )
+        memory_folds.labels(stage="computed").inc()
+        print(
+            f"DEBUG [ConversationMemory.prepare_fold]: Folded messages {summarized}-{cutoff} of {thread_id}"
+        )
+
+    def schedule_fold(self, thread_id: str, state) -> Optional[asyncio.Task]:
+        """Runs prepare_fold in the background, at most once at a time per thread."""
+        if not thread_id or thread_id in _inflight:
+            return None
+        task = asyncio.create_task(self.prepare_fold(thread_id, state))
+        _inflight[thread_id] = task
+
+        def done(finished: asyncio.Task) -> None:
+            if _inflight.get(thread_id) is finished:
+                del _inflight[thread_id]
+            if not finished.cancelled() and finished.exception() is not None:
+                print(f"ERROR [ConversationMemory]: Fold failed: {finished.exception()}")
+
+        task.add_done_callback(done)
+        return task
+
+    async def update(self, state, config: RunnableConfig) -> dict:
+        """
+        Graph node: writes the fold prepared after the previous turn into the
+        state. Returns an empty update when there is none, or when it no
+        longer matches the state it was computed from.
+        """
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        if not thread_id:
+            return {}
+        fold = await self._take_fold(thread_id)
+        if not fold:
+            return {}
+        messages = state.get("messages") or []
+        if fold["from"] != self._summarized_count(state) or fold["to"] > len(messages):
+            print(
+                f"DEBUG [ConversationMemory.update]: Discarding stale fold for {thread_id}"
+            )
+            return {}
+        memory_folds.labels(stage="applied").inc()
+        return {
+            "conversation_summary": fold["summary"],
+            "summarized_message_count": fold["to"],
+        }
+
+    def build_messages(self, state) -> List[BaseMessage]:
+        """History to send to the model: the rolling summary plus the verbatim window."""
+        messages, summary = self.window(state)
+        history: List[BaseMessage] = []
+        if summary:
+            history.append(
+                SystemMessage(
+                    content=f"Summary of the earlier conversation:\n{summary}"
+                )
+            )
+        history.extend(messages)
+        memory_prompt_tokens.observe(estimate_tokens(history))
+        return history
+
+    def _trim_start(self, messages: List[BaseMessage], start: int) -> int:
+        """
+        Index from which unsummarized messages fit the verbatim window: at most
+        max_turns turns, fewer while over the token budget, never dropping the
+        latest turn. Turns cut here are still folded after the turn.
+        """
+        kept = [i for i in turn_starts(messages) if i >= start][-self.max_turns :]
+        while (
+            len(kept) > 1 and estimate_tokens(messages[kept[0] :]) > self.token_budget
+        ):
+            kept = kept[1:]
+        return kept[0] if kept else start
+
+    def window(self, state) -> Tuple[List[BaseMessage], Optional[str]]:
+        """
+        Unsummarized messages within the window, and the summary. The window is
+        enforced here too, since the fold for older turns may not have been
+        applied yet (or failed).
+        """
+        messages = state.get("messages") or []
+        summarized = state.get("summarized_message_count") or 0
+        summary = state.get("conversation_summary")
+        if summarized > len(messages):
+            summarized, summary = 0, None
+        return list(messages[self._trim_start(messages, summarized) :]), summary
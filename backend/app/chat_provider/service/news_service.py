@@ -26,6 +26,7 @@ from app.chat_provider.service.news_service_prompt import (
     topic_specific_query_instructions,
     generate_news_instructions,
 )
+from app.chat_provider.utils.observability import instrument_graph
 
 load_dotenv()
 
@@ -135,7 +136,7 @@ class FinanceNewsService:
         builder.add_edge("search_financial_queries", "generate_news_report")
         builder.add_edge("generate_news_report", END)
 
-        self.graph = builder.compile()
+        self.graph = instrument_graph(builder.compile(), "news")
         return self.graph
 
     async def get_latest_finance_news(self, graph):
@@ -0,0 +1,119 @@
+import os
+import time
+from typing import Dict, Optional
+
+from app.chat_provider.utils.cache_utils import (
+    SimilarityIndex,
+    TTLCache,
+    query_hash,
+)
+from app.chat_provider.utils.metrics import Counter, Histogram
+
+ROUTING_CACHE_TTL_SECONDS = int(os.environ.get("ROUTING_CACHE_TTL_SECONDS", 3600))
+ROUTING_CACHE_MAX_ENTRIES = int(os.environ.get("ROUTING_CACHE_MAX_ENTRIES", 4096))
+# Set to 0 to disable near-duplicate matching and only serve exact normalized hits.
+ROUTING_CACHE_SIMILARITY_THRESHOLD = float(
+    os.environ.get("ROUTING_CACHE_SIMILARITY_THRESHOLD", 0.92)
+)
+ROUTING_CACHE_SIMILARITY_MAX_ENTRIES = int(
+    os.environ.get("ROUTING_CACHE_SIMILARITY_MAX_ENTRIES", 512)
+)
+
+routing_cache_lookups = Counter(
+    "zenfi_routing_cache_lookups_total",
+    "Routing cache lookups by result (hit, near_hit, miss).",
+    ["result"],
+)
+routing_cache_lookup_seconds = Histogram(
+    "zenfi_routing_cache_lookup_seconds",
+    "Time spent resolving routing flags from the cache.",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+)
+
+
+class RoutingCache:
+    """
+    Caches the router's decisions (needs_web_search, needs_knowledge_base, ...)
+    keyed by a hash of the normalized user query, so repeated questions skip the
+    routing LLM calls. Near-duplicates are matched through a local trigram index.
+    """
+
+    def __init__(
+        self,
+        ttl: float = ROUTING_CACHE_TTL_SECONDS,
+        maxsize: int = ROUTING_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = ROUTING_CACHE_SIMILARITY_THRESHOLD,
+    ):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._similarity = (
+            SimilarityIndex(
+                threshold=similarity_threshold,
+                maxsize=ROUTING_CACHE_SIMILARITY_MAX_ENTRIES,
+            )
+            if similarity_threshold > 0
+            else None
+        )
+        self._lookups = {"hit": 0, "near_hit": 0, "miss": 0}
+
+    def _lookup(self, query: str):
+        key = query_hash(query)
+        flags = self._cache.get(key)
+        if flags is not None:
+            return flags, "hit"
+        if self._similarity is not None:
+            match = self._similarity.search(query)
+            if match:
+                flags = self._cache.get(match[0])
+                if flags is not None:
+                    return flags, "near_hit"
+                self._similarity.remove(match[0])
+        return None, "miss"
+
+    def _record(self, result: str, start: float) -> None:
+        self._lookups[result] += 1
+        routing_cache_lookups.labels(result=result).inc()
+        routing_cache_lookup_seconds.observe(time.perf_counter() - start)
+
+    def get(self, query: str) -> Optional[Dict[str, bool]]:
+        start = time.perf_counter()
+        flags, result = self._lookup(query)
+        self._record(result, start)
+        return dict(flags) if flags is not None else None
+
+    def get_flag(self, query: str, flag: str) -> Optional[bool]:
+        """Returns the cached decision for one flag, or None when it must be computed."""
+        start = time.perf_counter()
+        flags, result = self._lookup(query)
+        if flags is None or flag not in flags:
+            flags, result = None, "miss"
+        self._record(result, start)
+        return flags[flag] if flags is not None else None
+
+    def set_flag(self, query: str, flag: str, value: bool) -> None:
+        """Merges one routing decision into the entry for this query."""
+        key = query_hash(query)
+        flags = dict(self._cache.get(key) or {})
+        flags[flag] = bool(value)
+        self._cache.set(key, flags)
+        if self._similarity is not None:
+            self._similarity.add(key, query)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, float]:
+        hits = self._lookups["hit"]
+        near_hits = self._lookups["near_hit"]
+        misses = self._lookups["miss"]
+        total = hits + near_hits + misses
+        return {
+            "size": len(self._cache),
+            "hits": hits,
+            "near_hits": near_hits,
+            "misses": misses,
+            "hit_rate": (hits + near_hits) / total if total else 0.0,
+        }
+
+
+# Shared across ChatService instances; ChatServiceManager builds a new service per request.
+routing_cache = RoutingCache()
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+from typing import Optional
+
+from langchain_sandbox import PyodideSandbox
+
+# Concurrent executions per process. Each one is a Deno subprocess holding up
+# to SANDBOX_MEMORY_LIMIT_MB of V8 heap, so size this to the host's memory.
+SANDBOX_MAX_CONCURRENCY = int(os.environ.get("SANDBOX_MAX_CONCURRENCY", 8))
+SANDBOX_TIMEOUT_SECONDS = float(os.environ.get("SANDBOX_TIMEOUT_SECONDS", 30))
+SANDBOX_MEMORY_LIMIT_MB = int(os.environ.get("SANDBOX_MEMORY_LIMIT_MB", 512))
+# Run once at startup so the Pyodide runtime and these wheels are in Deno's
+# local cache before the first user request.
+SANDBOX_WARMUP_CODE = "import numpy\nimport pandas\nprint('ok')"
+SANDBOX_WARMUP_TIMEOUT_SECONDS = 300
+
+
+class SandboxRunner:
+    """
+    Runs generated Python code in Pyodide. PyodideSandbox starts a fresh Deno
+    subprocess per execute, so one instance serves every call and nothing
+    leaks between executions; the runner only bounds how many subprocesses run
+    at once and applies the wall-time and V8 heap limits.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SANDBOX_MAX_CONCURRENCY,
+        timeout_seconds: float = SANDBOX_TIMEOUT_SECONDS,
+        memory_limit_mb: int = SANDBOX_MEMORY_LIMIT_MB,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self._sandbox: Optional[PyodideSandbox] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    async def _get_sandbox(self) -> PyodideSandbox:
+        if self._sandbox is None:
+            # The constructor shells out to `deno --version`; keep it off the loop.
+            self._sandbox = await asyncio.to_thread(PyodideSandbox, allow_net=True)
+        return self._sandbox
+
+    async def warm_up(self) -> None:
+        """Fills Deno's package cache with one throwaway execution."""
+        started = time.perf_counter()
+        try:
+            sandbox = await self._get_sandbox()
+            result = await sandbox.execute(
+                SANDBOX_WARMUP_CODE, timeout_seconds=SANDBOX_WARMUP_TIMEOUT_SECONDS
+            )
+            if result.status != "success":
+                print(f"ERROR [SandboxRunner]: Warm-up failed: {result.stderr}")
+                return
+            print(
+                f"DEBUG [SandboxRunner]: Warm-up done in {time.perf_counter() - started:.1f}s"
+            )
+        except Exception as e:
+            print(f"ERROR [SandboxRunner]: Warm-up failed: {e}")
+
+    def start_in_background(self) -> None:
+        """Schedules the warm-up; executions do not wait for it."""
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self.warm_up())
+
+    async def execute(self, code: str):
+        """Runs code in the sandbox and returns the CodeExecutionResult."""
+        sandbox = await self._get_sandbox()
+        async with self._semaphore:
+            # The sandbox enforces the limit itself; wait_for is a backstop in
+            # case the subprocess does not exit after being killed.
+            return await asyncio.wait_for(
+                sandbox.execute(
+                    code,
+                    timeout_seconds=self.timeout_seconds,
+                    memory_limit_mb=self.memory_limit_mb,
+                ),
+                timeout=self.timeout_seconds + 5,
+            )
+
+
+sandbox_runner = SandboxRunner()
@@ -0,0 +1,77 @@
+import re
+import uuid
+from typing import Optional
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy import select
+
+from app.api.api_models import ChatSession
+from app.chat_provider.tools.rag_tools import get_db
+
+_WORD = re.compile(r"[a-z0-9.]+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "give", "how", "i", "in", "is", "me", "my", "of", "on", "or", "show",
+    "tell", "the", "to", "what", "whats", "when", "which", "who", "why", "with",
+    "you", "your", "about", "please", "now", "also", "get",
+}  # fmt: skip
+# Follow-ups that point back at the current topic never count as a new topic.
+_ANAPHORA = {
+    "it",
+    "its",
+    "this",
+    "that",
+    "these",
+    "those",
+    "they",
+    "them",
+    "their",
+    "same",
+}
+MIN_TOPIC_CHANGE_WORDS = 4
+
+
+def _content_words(text: str) -> set:
+    return {w for w in _WORD.findall((text or "").lower()) if w not in _STOPWORDS}
+
+
+def should_generate_title(current_title: Optional[str], message: str) -> bool:
+    """
+    Cheap local check run before a turn starts. A title is generated for the first
+    turn of a session, and again only when the new message looks like a new topic:
+    long enough, sharing no content words with the current title, and not a
+    follow-up that refers back with "it", "this", etc.
+    """
+    if not current_title or not current_title.strip():
+        return True
+    words = _content_words(message)
+    if len(words) < MIN_TOPIC_CHANGE_WORDS or words & _ANAPHORA:
+        return False
+    return not (words & _content_words(current_title))
+
+
+async def generate_session_title(model, session_id: str, message: str) -> str:
+    """
+    Generates a short chat title for the message and stores it as ChatSession.summary.
+    Runs as a background task, outside the chat graph.
+    """
+    heading_prompt = f"Provide a concise heading (max 5 words) that best describes the following conversation. This will be used as a chat title.\n\nhuman: {message}"
+    response = await model.ainvoke(
+        [
+            SystemMessage(content="You are a helpful assistant."),
+            HumanMessage(content=heading_prompt),
+        ]
+    )
+    heading = str(response.content).strip().strip('"')
+    if not heading:
+        raise ValueError("Heading generation returned no content")
+
+    stmt = select(ChatSession).where(ChatSession.id == uuid.UUID(str(session_id)))
+    async for db in get_db():
+        res = await db.execute(stmt)
+        chat_session = res.scalar_one_or_none()
+        if chat_session:
+            chat_session.summary = heading
+            await db.commit()
+    print(f"DEBUG [generate_session_title]: Session {session_id} titled '{heading}'")
+    return heading
@@ -0,0 +1,160 @@
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool, StructuredTool
+
+from app.chat_provider.utils.metrics import Counter, Histogram
+
+# Threads for blocking tools (yfinance, DuckDuckGo, Brave, YouTube). Kept apart
+# from the default executor so slow tools cannot starve asyncio.to_thread users.
+TOOL_EXECUTOR_THREADS = int(os.environ.get("TOOL_EXECUTOR_THREADS", 16))
+
+# Seconds a tool call may take, per tool family (see tool_memo.tool_family).
+TOOL_FAMILY_DEADLINES = {
+    "quote": float(os.environ.get("TOOL_DEADLINE_QUOTE", 10)),
+    "history": float(os.environ.get("TOOL_DEADLINE_HISTORY", 15)),
+    "fundamentals": float(os.environ.get("TOOL_DEADLINE_FUNDAMENTALS", 20)),
+    "search": float(os.environ.get("TOOL_DEADLINE_SEARCH", 15)),
+    "default": float(os.environ.get("TOOL_DEADLINE_DEFAULT", 20)),
+    "uncached": float(os.environ.get("TOOL_DEADLINE_UNCACHED", 30)),
+}
+# Tools that need a deadline of their own rather than their family's.
+TOOL_DEADLINES = {
+    "python_sandbox_tool": float(os.environ.get("TOOL_DEADLINE_SANDBOX", 60)),
+}
+TOOL_CALL_ERROR_TEMPLATE = "Error: {error}\n Please fix your mistakes."
+
+_tool_threads = ThreadPoolExecutor(
+    max_workers=TOOL_EXECUTOR_THREADS, thread_name_prefix="zenfi-tool"
+)
+
+tool_calls = Counter(
+    "zenfi_tool_calls_total",
+    "Tool calls executed, by tool family and outcome (ok, error, timeout).",
+    ["family", "outcome"],
+)
+tool_execution_seconds = Histogram(
+    "zenfi_tool_execution_seconds",
+    "Wall time of executed tool calls, including time queued for a thread.",
+    ["family"],
+)
+
+
+def _is_sync(tool: BaseTool) -> bool:
+    """True for tools whose async path would only wrap their blocking _run."""
+    if isinstance(tool, StructuredTool):
+        return tool.coroutine is None
+    return type(tool)._arun is BaseTool._arun
+
+
+def timeout_message(call: dict, deadline: float) -> ToolMessage:
+    """Tells the model a tool gave up, so it can answer with partial data."""
+    return ToolMessage(
+        content=json.dumps(
+            {
+                "error": "timeout",
+                "tool": call["name"],
+                "timeout_seconds": deadline,
+                "detail": "The tool did not answer in time. Answer with the "
+                "data from other tools, or say this source is unavailable.",
+            }
+        ),
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+    )
+
+
+class ToolExecutor:
+    """
+    Runs a batch of tool calls concurrently, each under the deadline of its
+    tool family. Blocking tools run on a bounded thread pool, async tools on
+    the event loop. A call that fails or times out yields an error ToolMessage
+    instead of failing or holding up the rest of the batch. A timed out
+    blocking tool keeps its thread until it returns; Python cannot interrupt
+    it, which is why the pool is bounded.
+    """
+
+    def __init__(
+        self,
+        tools: list,
+        family: Callable[[str], str],
+        family_deadlines: Optional[Dict[str, float]] = None,
+    ):
+        self.tools = {tool.name: tool for tool in tools}
+        self.family = family
+        self.family_deadlines = {**TOOL_FAMILY_DEADLINES, **(family_deadlines or {})}
+
+    def deadline(self, tool_name: str) -> float:
+        if tool_name in TOOL_DEADLINES:
+            return TOOL_DEADLINES[tool_name]
+        family = self.family(tool_name)
+        return self.family_deadlines.get(family, self.family_deadlines["default"])
+
+    async def _invoke(self, tool: BaseTool, call: dict, config) -> ToolMessage:
+        tool_call = {**call, "type": "tool_call"}
+        if not _is_sync(tool):
+            return await tool.ainvoke(tool_call, config)
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            _tool_threads,
+            functools.partial(context.run, tool.invoke, tool_call, config),
+        )
+
+    async def _run_one(self, call: dict, config) -> ToolMessage:
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            return ToolMessage(
+                content=TOOL_CALL_ERROR_TEMPLATE.format(
+                    error=f"{call['name']} is not a valid tool, try one of "
+                    f"[{', '.join(self.tools)}]."
+                ),
+                name=call["name"],
+                tool_call_id=call["id"],
+                status="error",
+            )
+        family = self.family(call["name"])
+        deadline = self.deadline(call["name"])
+        started = time.perf_counter()
+        try:
+            message = await asyncio.wait_for(
+                self._invoke(tool, call, config), timeout=deadline
+            )
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            print(f"ERROR [ToolExecutor]: {call['name']} timed out after {deadline}s")
+            message = timeout_message(call, deadline)
+            outcome = "timeout"
+        except Exception as e:
+            message = ToolMessage(
+                content=TOOL_CALL_ERROR_TEMPLATE.format(error=repr(e)),
+                name=call["name"],
+                tool_call_id=call["id"],
+                status="error",
+            )
+            outcome = "error"
+        tool_execution_seconds.labels(family=family).observe(
+            time.perf_counter() - started
+        )
+        tool_calls.labels(family=family, outcome=outcome).inc()
+        if not isinstance(message, ToolMessage):
+            message = ToolMessage(
+                content=str(message), name=call["name"], tool_call_id=call["id"]
+            )
+        return message
+
+    async def run(
+        self, calls: List[dict], config: Optional[RunnableConfig] = None
+    ) -> List[ToolMessage]:
+        """Returns one ToolMessage per call, in call order."""
+        return list(
+            await asyncio.gather(*(self._run_one(call, config) for call in calls))
+        )
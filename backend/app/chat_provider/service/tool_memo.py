@@ -0,0 +1,189 @@
+import json
+import os
+from typing import Dict, List, Optional
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.prebuilt import ToolNode
+
+from app.chat_provider.service.tool_executor import ToolExecutor
+from app.chat_provider.utils.cache_utils import TTLCache
+from app.chat_provider.utils.metrics import Counter
+
+TOOL_MEMO_MAX_ENTRIES = int(os.environ.get("TOOL_MEMO_MAX_ENTRIES", 4096))
+
+# Seconds a tool result stays valid, per tool family. 0 disables memoization.
+TOOL_FAMILY_TTLS = {
+    "quote": int(os.environ.get("TOOL_MEMO_TTL_QUOTE", 30)),
+    "history": int(os.environ.get("TOOL_MEMO_TTL_HISTORY", 900)),
+    "fundamentals": int(os.environ.get("TOOL_MEMO_TTL_FUNDAMENTALS", 21600)),
+    "search": int(os.environ.get("TOOL_MEMO_TTL_SEARCH", 600)),
+    "default": int(os.environ.get("TOOL_MEMO_TTL_DEFAULT", 60)),
+    "uncached": 0,
+}
+
+TOOL_FAMILIES = {
+    # Live prices and intraday figures.
+    "get_stock_snapshot": "quote",
+    "get_stock_last_price": "quote",
+    "get_stock_day_high": "quote",
+    "get_stock_day_low": "quote",
+    "get_stock_open": "quote",
+    "get_stock_last_volume": "quote",
+    "get_stock_market_cap": "quote",
+    "get_stock_point_change": "quote",
+    "get_stock_percentage_change": "quote",
+    "get_stock_price_change": "quote",
+    "get_stock_options_chain": "quote",
+    # Figures derived from daily bars.
+    "get_stock_history": "history",
+    "get_stock_previous_close": "history",
+    "get_stock_regular_market_previous_close": "history",
+    "get_stock_fifty_day_average": "history",
+    "get_stock_two_hundred_day_average": "history",
+    "get_stock_ten_day_average_volume": "history",
+    "get_stock_three_month_average_volume": "history",
+    "get_stock_year_change": "history",
+    "get_stock_year_high": "history",
+    "get_stock_year_low": "history",
+    # Reference data that changes at most quarterly.
+    "get_stock_income_statement": "fundamentals",
+    "get_stock_info": "fundamentals",
+    "get_stock_shares": "fundamentals",
+    "get_stock_currency": "fundamentals",
+    "get_stock_exchange": "fundamentals",
+    "get_stock_quote_type": "fundamentals",
+    "get_stock_timezone": "fundamentals",
+    # Clock and side-effecting tools must always run.
+    "get_current_datetime": "uncached",
+    "python_sandbox_tool": "uncached",
+}
+_SEARCH_HINTS = ("search", "news", "youtube")
+# Tools report failures such as yfinance or network errors as strings starting
+# with this, e.g. "Error getting fast info for ...", instead of raising.
+_ERROR_RESULT_PREFIX = "error"
+
+# Shared so that memoized results survive across turns and deep search sections
+# of the same thread; keys are scoped by thread_id.
+_shared_memo = TTLCache(maxsize=TOOL_MEMO_MAX_ENTRIES, ttl=TOOL_FAMILY_TTLS["default"])
+
+tool_memo_lookups = Counter(
+    "zenfi_tool_memo_lookups_total",
+    "Tool calls served from the memo (hit) or executed (miss), by tool family.",
+    ["family", "result"],
+)
+
+
+def tool_family(tool_name: str) -> str:
+    family = TOOL_FAMILIES.get(tool_name)
+    if family:
+        return family
+    if any(hint in tool_name.lower() for hint in _SEARCH_HINTS):
+        return "search"
+    return "default"
+
+
+def _normalize_args(value):
+    if isinstance(value, dict):
+        return {str(k): _normalize_args(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_args(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+def is_failed_result(message: ToolMessage) -> bool:
+    """True for tool results that report a failure and must not be replayed."""
+    if getattr(message, "status", "success") == "error":
+        return True
+    content = message.content
+    if isinstance(content, list):
+        content = " ".join(
+            item.get("text", "") if isinstance(item, dict) else str(item)
+            for item in content
+        )
+    return str(content or "").lstrip().casefold().startswith(_ERROR_RESULT_PREFIX)
+
+
+def memo_key(scope: str, tool_name: str, args: dict) -> str:
+    normalized = json.dumps(_normalize_args(args or {}), sort_keys=True, default=str)
+    return f"{scope}\x1f{tool_name}\x1f{normalized}"
+
+
+class MemoizedToolNode:
+    """
+    Wraps a LangGraph ToolNode so that repeated calls to the same tool with the
+    same (normalized) arguments inside one thread are answered from memory.
+    Calls that miss run concurrently in a ToolExecutor, each under its tool
+    family's deadline. Failed and timed out tool calls, including results that
+    report an error as text, are never memoized.
+    """
+
+    def __init__(
+        self,
+        tools: list,
+        family_ttls: Optional[Dict[str, int]] = None,
+        cache: Optional[TTLCache] = None,
+        family_deadlines: Optional[Dict[str, float]] = None,
+    ):
+        self.tool_node = ToolNode(tools)
+        self.executor = ToolExecutor(
+            tools, family=tool_family, family_deadlines=family_deadlines
+        )
+        self.family_ttls = {**TOOL_FAMILY_TTLS, **(family_ttls or {})}
+        self._cache = cache if cache is not None else _shared_memo
+
+    @staticmethod
+    def _scope(config: Optional[RunnableConfig]) -> str:
+        configurable = (config or {}).get("configurable", {})
+        return str(configurable.get("thread_id") or configurable.get("run_id") or "")
+
+    async def ainvoke(self, state, config: Optional[RunnableConfig] = None) -> dict:
+        messages = state["messages"] if isinstance(state, dict) else state
+        last_message = messages[-1]
+        if not isinstance(last_message, AIMessage) or not last_message.tool_calls:
+            return await self.tool_node.ainvoke(state, config)
+
+        scope = self._scope(config)
+        results: Dict[str, ToolMessage] = {}
+        pending: List[dict] = []
+        for call in last_message.tool_calls:
+            family = tool_family(call["name"])
+            cached = None
+            if self.family_ttls.get(family, 0) > 0:
+                cached = self._cache.get(memo_key(scope, call["name"], call["args"]))
+            if cached is not None:
+                tool_memo_lookups.labels(family=family, result="hit").inc()
+                results[call["id"]] = ToolMessage(
+                    content=cached, name=call["name"], tool_call_id=call["id"]
+                )
+            else:
+                tool_memo_lookups.labels(family=family, result="miss").inc()
+                pending.append(call)
+
+        if pending:
+            print(
+                f"DEBUG [MemoizedToolNode]: {len(results)} memoized, running {len(pending)} tool calls"
+            )
+            calls_by_id = {call["id"]: call for call in pending}
+            for message in await self.executor.run(pending, config):
+                results[message.tool_call_id] = message
+                call = calls_by_id.get(message.tool_call_id)
+                if call is None or is_failed_result(message):
+                    continue
+                ttl = self.family_ttls.get(tool_family(call["name"]), 0)
+                if ttl > 0:
+                    self._cache.set(
+                        memo_key(scope, call["name"], call["args"]),
+                        message.content,
+                        ttl=ttl,
+                    )
+
+        return {
+            "messages": [
+                results[call["id"]]
+                for call in last_message.tool_calls
+                if call["id"] in results
+            ]
+        }
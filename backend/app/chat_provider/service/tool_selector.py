@@ -0,0 +1,204 @@
+import math
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.chat_provider.utils.metrics import Counter, Histogram
+from app.chat_provider.utils.ticker_extractor import extract_tickers
+
+TOOL_SELECTION_ENABLED = os.environ.get("TOOL_SELECTION_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+TOOL_SELECTION_MAX_TOOLS = int(os.environ.get("TOOL_SELECTION_MAX_TOOLS", 8))
+TOOL_SELECTION_MIN_SCORE = float(os.environ.get("TOOL_SELECTION_MIN_SCORE", 1.0))
+# Tools called in this many trailing messages stay bound for follow-ups.
+TOOL_SELECTION_RECENT_MESSAGES = 8
+BOUND_MODEL_CACHE_MAX_ENTRIES = 256
+
+# Web search tools, by their LangChain names. Both DuckDuckGoSearchResults
+# instances (web and news backends) are named duckduckgo_results_json.
+WEB_SEARCH_TOOLS = ("duckduckgo_results_json", "duckduckgo_search", "brave_search")
+_WEB_SEARCH_KEYWORDS = (
+    "news latest headline headlines announcement announced recent update updates "
+    "happening policy web search"
+)
+
+# Words users say when they want a tool, beyond what its name and description
+# already contain.
+TOOL_KEYWORDS = {
+    "get_stock_snapshot": "price prices quote quotes trading today share shares "
+    "stock stocks ltp change gain loss up down market cap high low",
+    "get_stock_history": "history historical chart trend performance return returns "
+    "past week month year ytd moved",
+    "get_stock_info": "company sector industry business profile pe ratio valuation "
+    "dividend beta fundamentals about",
+    "get_stock_income_statement": "revenue profit income earnings ebitda margin "
+    "quarterly annual results financials",
+    "get_stock_options_chain": "option options call put strike expiry derivatives "
+    "chain",
+    "get_current_datetime": "today date time now current",
+    "duckduckgo_results_json": _WEB_SEARCH_KEYWORDS,
+    "duckduckgo_search": _WEB_SEARCH_KEYWORDS,
+    "brave_search": _WEB_SEARCH_KEYWORDS,
+    "youtube_search": "video videos youtube watch tutorial",
+    "calculate_compound_interest": "compound compounded compounding interest "
+    "maturity fd fixed deposit rd grow grows worth quarterly monthly annually",
+    "calculate_emi": "emi loan instalment installment home car personal "
+    "mortgage repayment borrow tenure",
+    "calculate_sip_future_value": "sip sips systematic investment monthly step "
+    "up stepup step-up invest investing mutual fund corpus",
+    "calculate_cagr": "cagr annualised annualized growth rate grew returns "
+    "return doubled",
+    "calculate_xirr": "xirr irr cash flows flow returns return dated investments "
+    "withdrawals",
+    "calculate_max_drawdown": "drawdown drawdowns peak trough fall fell decline "
+    "crash worst",
+}
+# Tools whose output the prices in a portfolio or a named ticker usually need.
+QUOTE_TOOLS = ("get_stock_snapshot", "get_stock_info")
+
+_STOPWORDS = set(
+    """a an and are as at be by can do does for from get give how i in is it its
+    me my of on or show tell than that the this to was what when which who why
+    will with you your please about vs versus""".split()
+)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+tool_selection_bound = Histogram(
+    "zenfi_tool_selection_bound_tools",
+    "Number of tools bound to the chat model per call_model invocation.",
+    buckets=(0, 1, 2, 4, 6, 8, 12, 16, 24, 32, 48),
+)
+bound_model_cache_lookups = Counter(
+    "zenfi_bound_model_cache_lookups_total",
+    "Lookups of pre-bound model variants by tool set (hit, miss).",
+    ["result"],
+)
+
+
+def _terms(text: str) -> Set[str]:
+    terms = set()
+    for word in _WORD_RE.findall(text.lower()):
+        if len(word) < 2 or word in _STOPWORDS:
+            continue
+        terms.add(word[:-1] if len(word) > 3 and word.endswith("s") else word)
+    return terms
+
+
+def _description(tool) -> str:
+    # Only the summary; the Args section mostly repeats parameter names.
+    return (getattr(tool, "description", "") or "").split("Args:")[0]
+
+
+class ToolSelector:
+    """
+    Picks the tools worth binding for one call_model turn, so trivial queries do
+    not ship every tool schema as input tokens. Tools are scored by IDF-weighted
+    keyword overlap between the user message and each tool's name, description
+    and TOOL_KEYWORDS, then topped up from the routing flags, tickers named in
+    the message and tools the conversation used recently. When no tool scores,
+    the web search tools are bound rather than leaving the model without any.
+    """
+
+    def __init__(
+        self,
+        tools: Sequence,
+        always: Iterable[str] = (),
+        max_tools: int = TOOL_SELECTION_MAX_TOOLS,
+        min_score: float = TOOL_SELECTION_MIN_SCORE,
+    ):
+        self.tools = {tool.name: tool for tool in tools}
+        self.always = [name for name in always if name in self.tools]
+        self.max_tools = max_tools
+        self.min_score = min_score
+        self._terms: Dict[str, Set[str]] = {
+            name: _terms(
+                f"{name.replace('_', ' ')} {_description(tool)} "
+                f"{TOOL_KEYWORDS.get(name, '')}"
+            )
+            for name, tool in self.tools.items()
+        }
+        document_frequency: Dict[str, int] = {}
+        for terms in self._terms.values():
+            for term in terms:
+                document_frequency[term] = document_frequency.get(term, 0) + 1
+        self._idf = {
+            term: math.log(1 + len(self.tools) / count)
+            for term, count in document_frequency.items()
+        }
+
+    def score(self, query: str) -> List[Tuple[str, float]]:
+        query_terms = _terms(query)
+        scored = [
+            (name, sum(self._idf[t] for t in query_terms & terms))
+            for name, terms in self._terms.items()
+        ]
+        return sorted(
+            (item for item in scored if item[1] >= self.min_score),
+            key=lambda item: -item[1],
+        )
+
+    def select(self, state: dict) -> List:
+        """Returns the tools to bind for the latest user message in `state`."""
+        messages = state.get("messages") or []
+        query = next(
+            (str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)),
+            "",
+        )
+        selected: List[str] = list(self.always)
+
+        # Keep tools the model is already using, so follow-ups still work.
+        for message in messages[-TOOL_SELECTION_RECENT_MESSAGES:]:
+            if isinstance(message, AIMessage):
+                selected.extend(call["name"] for call in message.tool_calls or [])
+        if state.get("needs_portfolio") or extract_tickers(query):
+            selected.extend(QUOTE_TOOLS)
+        scored = [name for name, _ in self.score(query)]
+        if state.get("needs_web_search") or not scored:
+            selected.extend(WEB_SEARCH_TOOLS)
+        selected.extend(scored)
+
+        names = [name for name in dict.fromkeys(selected) if name in self.tools]
+        tools = [self.tools[name] for name in names[: self.max_tools]]
+        tool_selection_bound.observe(len(tools))
+        return tools
+
+
+_selectors: Dict[Tuple[str, ...], ToolSelector] = {}
+_bound_models: "OrderedDict[Tuple[int, frozenset], tuple]" = OrderedDict()
+
+
+def tool_selector_for(tools: Sequence, always: Iterable[str] = ()) -> ToolSelector:
+    """Returns a shared selector for this tool list; services are built per request."""
+    key = tuple(tool.name for tool in tools) + ("|",) + tuple(always)
+    selector = _selectors.get(key)
+    if selector is None:
+        selector = _selectors[key] = ToolSelector(tools, always=always)
+    return selector
+
+
+def bind_tools_cached(model, tools: Sequence):
+    """
+    Returns `model.bind_tools(tools)`, reusing the bound variant built earlier
+    for the same model and tool set. With no tools the model itself is used.
+    """
+    if not tools:
+        return model
+    key = (id(model), frozenset(tool.name for tool in tools))
+    cached: Optional[tuple] = _bound_models.get(key)
+    # The model is kept in the entry so its id cannot be reused while cached.
+    if cached is not None and cached[0] is model:
+        _bound_models.move_to_end(key)
+        bound_model_cache_lookups.labels(result="hit").inc()
+        return cached[1]
+    bound_model_cache_lookups.labels(result="miss").inc()
+    bound = model.bind_tools(list(tools))
+    _bound_models[key] = (model, bound)
+    while len(_bound_models) > BOUND_MODEL_CACHE_MAX_ENTRIES:
+        _bound_models.popitem(last=False)
+    return bound
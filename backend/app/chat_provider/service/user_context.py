@@ -0,0 +1,144 @@
+import json
+import os
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.api.api_models import KnowledgeBase, Portfolio, Stock
+from app.chat_provider.tools.rag_tools import get_db
+from app.chat_provider.utils.observability import record_cache_lookup
+
+USER_CONTEXT_TTL_SECONDS = int(os.environ.get("USER_CONTEXT_TTL_SECONDS", 3600))
+
+
+
+def _redis():
+    # The process-wide client; imported late because api_functions imports this module.
+    from app.api.api_functions import redis_client
+
+    return redis_client
+
+
+def _bundle_key(user_id: int) -> str:
+    return f"user:{user_id}:context"
+
+
+def _version_key(user_id: int) -> str:
+    return f"user:{user_id}:context_version"
+
+
+def format_portfolio(portfolio: Portfolio) -> List[str]:
+    """Renders a portfolio and its assets as the lines shown to the chat model."""
+    lines = [
+        f"Portfolio Name: {portfolio.name}",
+        f"Created At: {portfolio.created_at}",
+        f"Description: {portfolio.description}",
+    ]
+    if portfolio.assets:
+        lines.append("Assets:")
+        for asset in portfolio.assets:
+            lines.append(
+                f"  - Asset ID: {asset.id}, Asset Type: {asset.asset_type}, "
+                f"Symbol: {asset.identifier}, Created At: {asset.created_at}, "
+                f"Quantity: {asset.quantity}, Purchase Price: {asset.purchase_price}, "
+                f"Purchase Date: {asset.purchase_date}, "
+                f"Current Value: {asset.current_value}, Notes: {asset.notes}"
+            )
+    else:
+        lines.append("Assets: None")
+    return lines
+
+
+async def load_user_context(db, user_id: int) -> dict:
+    """Reads the user's default portfolio, default knowledge base and watchlist."""
+    portfolio = (
+        (
+            await db.execute(
+                select(Portfolio)
+                .where(Portfolio.user_id == user_id, Portfolio.is_default)
+                .options(selectinload(Portfolio.assets))
+            )
+        )
+        .scalars()
+        .first()
+    )
+    knowledge_base = (
+        (
+            await db.execute(
+                select(KnowledgeBase).where(
+                    KnowledgeBase.user_id == user_id, KnowledgeBase.is_default
+                )
+            )
+        )
+        .scalars()
+        .first()
+    )
+    watchlist = (
+        (
+            await db.execute(
+                select(Stock.symbol)
+                .where(Stock.user_id == user_id)
+                .order_by(Stock.created_at)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    return {
+        "portfolio": format_portfolio(portfolio) if portfolio else None,
+        "kb_table_id": knowledge_base.table_id if knowledge_base else None,
+        "watchlist": list(watchlist),
+    }
+
+
+async def get_user_context(user_id: int) -> Optional[dict]:
+    """
+    Returns the user's context bundle, from Redis when fresh and from the
+    database otherwise. Each bundle records the invalidation version it was
+    read at, so a bundle loaded while a write endpoint invalidated the user
+    is never served. Returns None if the database cannot be reached.
+    """
+    user_id = int(user_id)
+    version = "0"
+    redis = _redis()
+    if redis:
+        try:
+            cached, version = await redis.mget(
+                _bundle_key(user_id), _version_key(user_id)
+            )
+            version = version or "0"
+            bundle = json.loads(cached) if cached else None
+            hit = bool(bundle) and bundle.get("version") == version
+            record_cache_lookup("user_context", hit)
+            if hit:
+                return bundle
+        except Exception as e:
+            record_cache_lookup("user_context", None)
+            print(f"ERROR [get_user_context]: Redis GET failed: {e}")
+
+    bundle = None
+    async for db in get_db():
+        bundle = {**await load_user_context(db, user_id), "version": version}
+    if bundle and redis:
+        try:
+            await redis.set(
+                _bundle_key(user_id), json.dumps(bundle), ex=USER_CONTEXT_TTL_SECONDS
+            )
+        except Exception as e:
+            print(f"ERROR [get_user_context]: Redis SET failed: {e}")
+    return bundle
+
+
+async def invalidate_user_context(user_id: int) -> None:
+    """Called by endpoints that change a user's portfolios, knowledge bases or watchlist."""
+    redis = _redis()
+    if not redis:
+        return
+    try:
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.incr(_version_key(user_id))
+            pipe.delete(_bundle_key(user_id))
+            await pipe.execute()
+    except Exception as e:
+        print(f"ERROR [invalidate_user_context]: Redis DELETE failed: {e}")
@@ -0,0 +1,194 @@
+import datetime
+from typing import List, Optional
+
+from langchain_core.tools import tool
+
+from app.chat_provider.utils import financial_calculators as calc
+
+MAX_SCHEDULE_ROWS = 24
+
+
+def _money(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def _percent(fraction: float) -> str:
+    return f"{fraction * 100:.2f}%"
+
+
+@tool
+def calculate_cagr(start_value: float, end_value: float, years: float) -> str:
+    """
+    Calculates the compound annual growth rate between two values.
+    Args:
+        start_value (float): Value at the start of the period.
+        end_value (float): Value at the end of the period.
+        years (float): Length of the period in years.
+    Returns:
+        str: The CAGR as a percentage or an error message.
+    """
+    try:
+        return f"CAGR: {_percent(calc.cagr(start_value, end_value, years))}"
+    except Exception as e:
+        return f"Error calculating CAGR: {str(e)}"
+
+
+@tool
+def calculate_xirr(amounts: List[float], dates: List[str]) -> str:
+    """
+    Calculates the annualised return (XIRR) of irregular cash flows.
+    Args:
+        amounts (List[float]): Cash flows; investments negative, redemptions and current value positive.
+        dates (List[str]): Date of each cash flow as YYYY-MM-DD, same order as amounts.
+    Returns:
+        str: The XIRR as a percentage or an error message.
+    """
+    try:
+        parsed = [datetime.date.fromisoformat(d) for d in dates]
+        return f"XIRR: {_percent(calc.xirr(amounts, parsed))}"
+    except Exception as e:
+        return f"Error calculating XIRR: {str(e)}"
+
+
+@tool
+def calculate_sip_future_value(
+    monthly_investment: float,
+    annual_rate_percent: float,
+    years: float,
+    annual_step_up_percent: float = 0.0,
+) -> str:
+    """
+    Calculates the future value of a monthly SIP with an optional yearly step-up.
+    Args:
+        monthly_investment (float): Amount invested every month.
+        annual_rate_percent (float): Expected annual return in percent (e.g., 12).
+        years (float): Investment horizon in years.
+        annual_step_up_percent (float): Yearly increase of the instalment in percent. Defaults to 0.
+    Returns:
+        str: Amount invested, future value and gains, or an error message.
+    """
+    try:
+        result = calc.sip_future_value(
+            monthly_investment, annual_rate_percent, years, annual_step_up_percent
+        )
+        return (
+            f"Invested: {_money(result['invested'])}\n"
+            f"Future value: {_money(result['future_value'])}\n"
+            f"Gains: {_money(result['gains'])}"
+        )
+    except Exception as e:
+        return f"Error calculating SIP future value: {str(e)}"
+
+
+@tool
+def calculate_emi(
+    principal: float,
+    annual_rate_percent: float,
+    years: float,
+    include_schedule: bool = False,
+) -> str:
+    """
+    Calculates the monthly EMI of a loan and, optionally, its amortization schedule.
+    Args:
+        principal (float): Loan amount.
+        annual_rate_percent (float): Annual interest rate in percent (e.g., 8.5).
+        years (float): Loan tenure in years.
+        include_schedule (bool): Whether to include a yearly amortization table. Defaults to False.
+    Returns:
+        str: EMI, total interest and total payment, or an error message.
+    """
+    try:
+        schedule = calc.amortization_schedule(principal, annual_rate_percent, years)
+        instalment = float(schedule["emi"][0])
+        total_interest = float(schedule["interest"].sum())
+        lines = [
+            f"EMI: {_money(instalment)}",
+            f"Total interest: {_money(total_interest)}",
+            f"Total payment: {_money(principal + total_interest)}",
+        ]
+        if include_schedule:
+            # Yearly totals keep the table readable for long tenures.
+            months = len(schedule["month"])
+            year_ends = list(range(11, months, 12))
+            if not year_ends or year_ends[-1] != months - 1:
+                year_ends.append(months - 1)
+            interest_cum = schedule["interest"].cumsum()
+            principal_cum = schedule["principal"].cumsum()
+            lines.append("Year | Interest | Principal | Balance")
+            previous = None
+            for row, end in enumerate(year_ends[:MAX_SCHEDULE_ROWS], start=1):
+                interest = interest_cum[end] - (
+                    interest_cum[previous] if previous is not None else 0.0
+                )
+                paid = principal_cum[end] - (
+                    principal_cum[previous] if previous is not None else 0.0
+                )
+                lines.append(
+                    f"{row} | {_money(interest)} | {_money(paid)} | {_money(schedule['balance'][end])}"
+                )
+                previous = end
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error calculating EMI: {str(e)}"
+
+
+@tool
+def calculate_compound_interest(
+    principal: float,
+    annual_rate_percent: float,
+    years: float,
+    compounds_per_year: int = 1,
+) -> str:
+    """
+    Calculates the maturity amount of a lump sum with compound interest.
+    Args:
+        principal (float): Amount invested.
+        annual_rate_percent (float): Annual interest rate in percent.
+        years (float): Duration in years.
+        compounds_per_year (int): Compounding periods per year (1 yearly, 4 quarterly, 12 monthly). Defaults to 1.
+    Returns:
+        str: Maturity amount and interest earned, or an error message.
+    """
+    try:
+        result = calc.compound_interest(
+            principal, annual_rate_percent, years, compounds_per_year
+        )
+        return (
+            f"Maturity amount: {_money(result['amount'])}\n"
+            f"Interest earned: {_money(result['interest'])}"
+        )
+    except Exception as e:
+        return f"Error calculating compound interest: {str(e)}"
+
+
+@tool
+def calculate_max_drawdown(
+    values: List[float], labels: Optional[List[str]] = None
+) -> str:
+    """
+    Calculates the maximum drawdown (largest peak-to-trough fall) of a price or NAV series.
+    Args:
+        values (List[float]): Series of prices or portfolio values in time order.
+        labels (Optional[List[str]]): Optional date label for each value.
+    Returns:
+        str: The maximum drawdown with its peak and trough, or an error message.
+    """
+    try:
+        result = calc.max_drawdown(values, labels)
+        return (
+            f"Maximum drawdown: {_percent(result['max_drawdown'])}\n"
+            f"Peak: {result['peak']} ({_money(result['peak_value'])})\n"
+            f"Trough: {result['trough']} ({_money(result['trough_value'])})"
+        )
+    except Exception as e:
+        return f"Error calculating maximum drawdown: {str(e)}"
+
+
+CALCULATOR_TOOLS = [
+    calculate_cagr,
+    calculate_xirr,
+    calculate_sip_future_value,
+    calculate_emi,
+    calculate_compound_interest,
+    calculate_max_drawdown,
+]
@@ -1,6 +1,23 @@
 import yfinance
 from langchain_core.tools import tool
 import json
+from typing import List, Optional
+
+from app.chat_provider.utils.quote_cache import (
+    SNAPSHOT_FIELDS,
+    quote_cache,
+    resolve_field,
+)
+
+DEFAULT_SNAPSHOT_FIELDS = [
+    "last_price",
+    "change",
+    "change_percent",
+    "day_high",
+    "day_low",
+    "market_cap",
+]
+MAX_SNAPSHOT_SYMBOLS = 25
 
 
 async def get_stock_fastinfo(symbol: str):
@@ -501,6 +518,65 @@ def get_stock_price_change(symbol: str) -> str:
         return f"Error calculating price change for {symbol}: {str(e)}"
 
 
+def _format_snapshot_value(value) -> str:
+    if value is None:
+        return "n/a"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, int):
+        return f"{value:,}"
+    return str(value)
+
+
+@tool
+async def get_stock_snapshot(
+    symbols: List[str], fields: Optional[List[str]] = None
+) -> str:
+    """
+    Retrieves quote fields for one or more stock symbols in a single call and
+    returns them as a compact table. Use this instead of one call per symbol or field.
+    Args:
+        symbols (List[str]): Stock ticker symbols (e.g., ["TCS.NS", "INFY.NS"]).
+        fields (List[str], optional): Fields to return. Defaults to last_price,
+            change, change_percent, day_high, day_low and market_cap. Available:
+            last_price, open, day_high, day_low, previous_close,
+            regular_market_previous_close, change, change_percent, last_volume,
+            market_cap, shares, currency, exchange, quote_type, timezone,
+            fifty_day_average, two_hundred_day_average, ten_day_average_volume,
+            three_month_average_volume, year_high, year_low, year_change.
+            year_high and year_low are the 52 week range.
+    Returns:
+        str: A pipe separated table with one row per symbol, or an error message.
+    """
+    try:
+        if not symbols:
+            return "Error retrieving stock snapshot: no symbols given"
+        symbols = symbols[:MAX_SNAPSHOT_SYMBOLS]
+        requested = fields or DEFAULT_SNAPSHOT_FIELDS
+        resolved = [resolve_field(f) for f in requested]
+        unknown = [f for f, r in zip(requested, resolved) if r is None]
+        columns = list(dict.fromkeys(r for r in resolved if r))
+        if not columns:
+            return (
+                f"Error retrieving stock snapshot: unknown fields {unknown}. "
+                f"Available fields: {', '.join(SNAPSHOT_FIELDS)}"
+            )
+
+        data = await quote_cache.get_many(symbols, columns)
+        lines = [" | ".join(["symbol"] + columns)]
+        for symbol, values in data.items():
+            lines.append(
+                " | ".join(
+                    [symbol] + [_format_snapshot_value(values[c]) for c in columns]
+                )
+            )
+        if unknown:
+            lines.append(f"Unknown fields ignored: {', '.join(unknown)}")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error retrieving stock snapshot for {symbols}: {str(e)}"
+
+
 if __name__ == "__main__":
     symbol_to_test = "RELIANCE.NS"
     # print(f"Currency for {symbol_to_test}: {get_stock_currency(symbol_to_test)}")
@@ -1,3 +1,4 @@
+import asyncio
 from langchain.tools import tool
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 import sqlalchemy
@@ -5,6 +6,7 @@ import os
 from sqlalchemy import select
 from app.api.api_models import KnowledgeBase
 from app.chat_provider.service.knowledge_base.knowledege_base import search_enhanced
+from app.chat_provider.utils.observability import instrument_engine
 
 engine = create_async_engine(
     sqlalchemy.engine.url.URL.create(
@@ -17,6 +19,7 @@ engine = create_async_engine(
     ),
     echo=False,
 )
+instrument_engine(engine)
 
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
@@ -54,7 +57,8 @@ async def query_knowledge_base(query: str, user_id: str) -> str:
             return "Knowledge base has no table_id set."
 
         try:
-            rag_result = search_enhanced(
+            rag_result = await asyncio.to_thread(
+                search_enhanced,
                 table_id=kb_table_id,
                 query=query,
                 filter={"context": "some_context"},
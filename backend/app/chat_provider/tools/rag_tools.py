@@ -7,6 +7,8 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 import sqlalchemy
 import os
 
+from app.chat_provider.utils.observability import instrument_engine
+
 engine = create_async_engine(
     sqlalchemy.engine.url.URL.create(
         drivername="postgresql+asyncpg",
@@ -18,6 +20,7 @@ engine = create_async_engine(
     ),
     echo=False,
 )
+instrument_engine(engine)
 AsyncSessionLocal = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
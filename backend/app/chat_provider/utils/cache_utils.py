@@ -0,0 +1,161 @@
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import Counter as TokenCounter
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+_PUNCTUATION = re.compile(r"[^\w\s.%]")
+_WHITESPACE = re.compile(r"\s+")
+_FILLER_WORDS = {"please", "pls", "kindly", "hi", "hello", "hey", "thanks", "thank"}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a user query so that trivially different phrasings share a cache key.
+    Lowercases, strips punctuation and filler words, and collapses whitespace.
+    """
+    text = _PUNCTUATION.sub(" ", (query or "").lower())
+    tokens = [t.strip(".") for t in _WHITESPACE.split(text)]
+    return " ".join(t for t in tokens if t and t not in _FILLER_WORDS)
+
+
+def query_hash(query: str, *parts: Any) -> str:
+    """Returns a stable sha256 hex digest of the normalized query plus extra key parts."""
+    payload = "\x1f".join([normalize_query(query)] + [repr(p) for p in parts])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache with a per-entry time to live.
+    Entries past their TTL are dropped lazily on access; the least recently used
+    entry is evicted once maxsize is reached.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+
+def _trigram_vector(text: str) -> TokenCounter:
+    padded = f"  {text} "
+    return TokenCounter(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def _cosine(a: TokenCounter, b: TokenCounter) -> float:
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b.get(gram, 0) for gram, count in a.items())
+    norm_a = math.sqrt(sum(c * c for c in a.values()))
+    norm_b = math.sqrt(sum(c * c for c in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+class SimilarityIndex:
+    """
+    Lightweight local near-duplicate index over normalized queries.
+    Uses character trigram cosine similarity, so it needs no embedding model and
+    stays fast for the few thousand entries a cache holds.
+    """
+
+    def __init__(self, threshold: float = 0.92, maxsize: int = 2048):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._vectors: "OrderedDict[str, TokenCounter]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key: str, text: str) -> None:
+        vector = _trigram_vector(normalize_query(text))
+        with self._lock:
+            self._vectors[key] = vector
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.maxsize:
+                self._vectors.popitem(last=False)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._vectors.pop(key, None)
+
+    def search(self, text: str) -> Optional[Tuple[str, float]]:
+        """Returns (key, similarity) of the closest entry above threshold, if any."""
+        vector = _trigram_vector(normalize_query(text))
+        with self._lock:
+            candidates: List[Tuple[str, TokenCounter]] = list(self._vectors.items())
+        best_key, best_score = None, 0.0
+        for key, other in candidates:
+            score = _cosine(vector, other)
+            if score > best_score:
+                best_key, best_score = key, score
+        if best_key is not None and best_score >= self.threshold:
+            return best_key, best_score
+        return None
+
+    def __len__(self) -> int:
+        return len(self._vectors)
@@ -0,0 +1,119 @@
+import os
+import zlib
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+from langgraph.channels.last_value import LastValue
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.chat_provider.utils.metrics import Counter
+
+# Serialized values at least this large (message lists, tool outputs in
+# pending writes, TextValue channels) are stored compressed.
+CHECKPOINT_COMPRESS_MIN_BYTES = int(
+    os.environ.get("CHECKPOINT_COMPRESS_MIN_BYTES", 4096)
+)
+CHECKPOINT_COMPRESS_LEVEL = 6
+_SUFFIX = "+zlib"
+
+checkpoint_serialized_bytes = Counter(
+    "zenfi_checkpoint_serialized_bytes_total",
+    "Bytes of checkpoint values serialized, before (raw) and after (stored) "
+    "compression.",
+    ["stage"],
+)
+
+
+# Application types that reach checkpoints, for langgraph-checkpoint's msgpack
+# allowlist. Unlisted types beyond its built-in safe set load as plain dicts
+# under LANGGRAPH_STRICT_MSGPACK and log a warning on every load otherwise.
+CHECKPOINT_MSGPACK_TYPES = [
+    ("app.chat_provider.utils.checkpoint_serde", "CheckpointText"),
+    ("app.chat_provider.models.deepsearch_models", "Section"),
+    ("app.chat_provider.models.deepsearch_models", "SearchQuery"),
+    ("app.chat_provider.models.chat_models", "SearchQuery"),
+]
+
+
+def default_serializer() -> JsonPlusSerializer:
+    """The saver's usual serializer, allowing CHECKPOINT_MSGPACK_TYPES."""
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_MSGPACK_TYPES)
+    except TypeError:
+        # langgraph-checkpoint releases before the allowlist load every type.
+        return JsonPlusSerializer()
+
+
+class CompressingSerializer(SerializerProtocol):
+    """
+    Wraps the saver's serializer and zlib-compresses large values, marking
+    them with a "+zlib" type suffix the same way EncryptedSerializer marks its
+    cipher. Values written before compression existed load unchanged.
+
+    Only values the saver hands to dumps_typed are compressed. Newer
+    langgraph-checkpoint-postgres releases keep None, str, int, float and bool
+    channel values inline in the checkpoint row, so long text channels must be
+    declared with TextValue to be compressed.
+    """
+
+    def __init__(
+        self,
+        serde: Optional[SerializerProtocol] = None,
+        min_bytes: int = CHECKPOINT_COMPRESS_MIN_BYTES,
+    ):
+        self.serde = serde if serde is not None else default_serializer()
+        self.min_bytes = min_bytes
+
+    def dumps(self, obj: Any) -> bytes:
+        return self.serde.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.serde.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        checkpoint_serialized_bytes.labels(stage="raw").inc(len(data))
+        if len(data) >= self.min_bytes:
+            compressed = zlib.compress(data, CHECKPOINT_COMPRESS_LEVEL)
+            if len(compressed) < len(data):
+                type_, data = type_ + _SUFFIX, compressed
+        checkpoint_serialized_bytes.labels(stage="stored").inc(len(data))
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith(_SUFFIX):
+            type_, payload = type_[: -len(_SUFFIX)], zlib.decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+
+@dataclass(frozen=True)
+class CheckpointText:
+    """A text channel value as stored in a checkpoint; see TextValue."""
+
+    text: str
+
+
+class TextValue(LastValue):
+    """
+    LastValue channel for long text such as search dumps and reports. It
+    checkpoints its value as a CheckpointText, which savers always store as a
+    serialized blob, so the text is compressed instead of copied inline into
+    every checkpoint row. Nodes read and write plain str as usual, and plain
+    str values from older checkpoints still load.
+    """
+
+    __slots__ = ()
+
+    def checkpoint(self) -> Any:
+        value = super().checkpoint()
+        return CheckpointText(value) if isinstance(value, str) else value
+
+    def from_checkpoint(self, checkpoint: Any) -> "TextValue":
+        if isinstance(checkpoint, CheckpointText):
+            checkpoint = checkpoint.text
+        return super().from_checkpoint(checkpoint)
+
+
+checkpoint_serde = CompressingSerializer()
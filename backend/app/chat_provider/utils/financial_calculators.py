@@ -0,0 +1,175 @@
+import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DAYS_PER_YEAR = 365.0
+
+
+def cagr(start_value: float, end_value: float, years: float) -> float:
+    """Compound annual growth rate as a fraction (0.12 == 12%)."""
+    if start_value <= 0 or end_value < 0 or years <= 0:
+        raise ValueError("start_value and years must be positive, end_value >= 0")
+    return float((end_value / start_value) ** (1.0 / years) - 1.0)
+
+
+def _xnpv(rate: float, amounts: np.ndarray, years: np.ndarray) -> float:
+    return float(np.sum(amounts / (1.0 + rate) ** years))
+
+
+def xirr(
+    amounts: Sequence[float],
+    dates: Sequence[datetime.date],
+    guess: float = 0.1,
+    tolerance: float = 1e-10,
+    max_iterations: int = 100,
+) -> float:
+    """
+    Annualised internal rate of return for irregular cash flows (Actual/365).
+    Investments are negative, redemptions positive. Uses Newton's method and
+    falls back to bisection when Newton does not converge.
+    """
+    if len(amounts) != len(dates) or len(amounts) < 2:
+        raise ValueError("Need at least two cash flows with one date each")
+    values = np.asarray(amounts, dtype=float)
+    if not (values > 0).any() or not (values < 0).any():
+        raise ValueError(
+            "Cash flows need at least one positive and one negative amount"
+        )
+    start = min(dates)
+    years = np.array([(d - start).days for d in dates], dtype=float) / DAYS_PER_YEAR
+
+    rate = guess
+    for _ in range(max_iterations):
+        discount = (1.0 + rate) ** years
+        npv = np.sum(values / discount)
+        derivative = np.sum(-years * values / (discount * (1.0 + rate)))
+        if derivative == 0 or not np.isfinite(derivative):
+            break
+        step = npv / derivative
+        rate -= step
+        if rate <= -1.0 or not np.isfinite(rate):
+            break
+        if abs(step) < tolerance:
+            return float(rate)
+
+    # Bisection over a wide bracket.
+    low, high = -0.9999, 100.0
+    f_low = _xnpv(low, values, years)
+    if f_low * _xnpv(high, values, years) > 0:
+        raise ValueError("XIRR did not converge for these cash flows")
+    for _ in range(200):
+        mid = (low + high) / 2.0
+        f_mid = _xnpv(mid, values, years)
+        if abs(f_mid) < tolerance or (high - low) / 2.0 < tolerance:
+            return float(mid)
+        if f_low * f_mid < 0:
+            high = mid
+        else:
+            low, f_low = mid, f_mid
+    return float((low + high) / 2.0)
+
+
+def sip_future_value(
+    monthly_investment: float,
+    annual_rate_percent: float,
+    years: float,
+    annual_step_up_percent: float = 0.0,
+) -> Dict[str, float]:
+    """
+    Future value of a monthly SIP paid at the start of each month, with an
+    optional yearly step-up of the instalment.
+    """
+    months = int(round(years * 12))
+    if months <= 0 or monthly_investment <= 0:
+        raise ValueError("monthly_investment and years must be positive")
+    monthly_rate = annual_rate_percent / 100.0 / 12.0
+    month_index = np.arange(months)
+    instalments = monthly_investment * (1.0 + annual_step_up_percent / 100.0) ** (
+        month_index // 12
+    )
+    growth = (1.0 + monthly_rate) ** (months - month_index)
+    future_value = float(np.sum(instalments * growth))
+    invested = float(np.sum(instalments))
+    return {
+        "invested": invested,
+        "future_value": future_value,
+        "gains": future_value - invested,
+    }
+
+
+def emi(principal: float, annual_rate_percent: float, years: float) -> float:
+    """Equated monthly instalment for a reducing-balance loan."""
+    months = int(round(years * 12))
+    if principal <= 0 or months <= 0:
+        raise ValueError("principal and years must be positive")
+    r = annual_rate_percent / 100.0 / 12.0
+    if r == 0:
+        return principal / months
+    factor = (1.0 + r) ** months
+    return float(principal * r * factor / (factor - 1.0))
+
+
+def amortization_schedule(
+    principal: float, annual_rate_percent: float, years: float
+) -> Dict[str, np.ndarray]:
+    """
+    Month-by-month schedule as arrays: month, emi, interest, principal and
+    closing balance. Computed in closed form, without a Python loop.
+    """
+    months = int(round(years * 12))
+    instalment = emi(principal, annual_rate_percent, years)
+    r = annual_rate_percent / 100.0 / 12.0
+    month = np.arange(1, months + 1)
+    if r == 0:
+        closing = principal - instalment * month
+    else:
+        growth = (1.0 + r) ** month
+        closing = principal * growth - instalment * (growth - 1.0) / r
+    closing = np.maximum(closing, 0.0)
+    opening = np.concatenate(([principal], closing[:-1]))
+    interest = opening * r
+    principal_paid = opening - closing
+    return {
+        "month": month,
+        "emi": np.full(months, instalment),
+        "interest": interest,
+        "principal": principal_paid,
+        "balance": closing,
+    }
+
+
+def compound_interest(
+    principal: float,
+    annual_rate_percent: float,
+    years: float,
+    compounds_per_year: int = 1,
+) -> Dict[str, float]:
+    if principal <= 0 or years < 0 or compounds_per_year <= 0:
+        raise ValueError("principal and compounds_per_year must be positive")
+    rate = annual_rate_percent / 100.0
+    amount = principal * (1.0 + rate / compounds_per_year) ** (
+        compounds_per_year * years
+    )
+    return {"amount": float(amount), "interest": float(amount - principal)}
+
+
+def max_drawdown(
+    values: Sequence[float], labels: Optional[List[str]] = None
+) -> Dict[str, object]:
+    """Largest peak-to-trough fall of a value series, as a fraction."""
+    series = np.asarray(values, dtype=float)
+    if series.size < 2 or (series <= 0).any():
+        raise ValueError("Need at least two positive values")
+    running_peak = np.maximum.accumulate(series)
+    drawdowns = series / running_peak - 1.0
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(series[: trough + 1]))
+    label = (lambda i: labels[i]) if labels and len(labels) == series.size else int
+    return {
+        "max_drawdown": float(drawdowns[trough]),
+        "peak": label(peak),
+        "trough": label(trough),
+        "peak_value": float(series[peak]),
+        "trough_value": float(series[trough]),
+    }
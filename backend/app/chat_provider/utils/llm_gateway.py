@@ -0,0 +1,620 @@
+import asyncio
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from app.chat_provider.utils.metrics import Counter, Gauge, Histogram
+
+T = TypeVar("T")
+
+
+def _parse_rate_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Parses "model=requests_per_second:burst,..."."""
+    limits = {}
+    for item in spec.split(","):
+        model, _, rate = item.strip().partition("=")
+        if not model or not rate:
+            continue
+        per_second, _, burst = rate.partition(":")
+        limits[model.strip()] = (float(per_second), int(burst or 1))
+    return limits
+
+
+# Per-model request rate and burst. Models not listed use the default rate.
+LLM_GATEWAY_RATE_LIMITS = _parse_rate_limits(
+    os.environ.get(
+        "LLM_GATEWAY_RATE_LIMITS",
+        "gemini-2.5-flash=10:20,gemini-2.5-pro=2:5,gemini-2.0-flash-lite=15:30",
+    )
+)
+LLM_GATEWAY_DEFAULT_RPS = float(os.environ.get("LLM_GATEWAY_DEFAULT_RPS", 5))
+LLM_GATEWAY_DEFAULT_BURST = int(os.environ.get("LLM_GATEWAY_DEFAULT_BURST", 10))
+LLM_GATEWAY_MAX_CONCURRENCY = int(os.environ.get("LLM_GATEWAY_MAX_CONCURRENCY", 16))
+# Total time budget of one logical call, across retries.
+LLM_GATEWAY_DEADLINE_SECONDS = float(os.environ.get("LLM_GATEWAY_DEADLINE_SECONDS", 90))
+LLM_GATEWAY_MAX_ATTEMPTS = int(os.environ.get("LLM_GATEWAY_MAX_ATTEMPTS", 4))
+LLM_GATEWAY_BACKOFF_BASE_SECONDS = float(
+    os.environ.get("LLM_GATEWAY_BACKOFF_BASE_SECONDS", 0.5)
+)
+LLM_GATEWAY_BACKOFF_MAX_SECONDS = float(
+    os.environ.get("LLM_GATEWAY_BACKOFF_MAX_SECONDS", 8)
+)
+# A hedged call starts a second attempt if the first has not answered by then.
+LLM_GATEWAY_HEDGE_DELAY_SECONDS = float(
+    os.environ.get("LLM_GATEWAY_HEDGE_DELAY_SECONDS", 2.0)
+)
+LLM_GATEWAY_BREAKER_FAILURES = int(os.environ.get("LLM_GATEWAY_BREAKER_FAILURES", 5))
+LLM_GATEWAY_BREAKER_COOLDOWN_SECONDS = float(
+    os.environ.get("LLM_GATEWAY_BREAKER_COOLDOWN_SECONDS", 30)
+)
+
+_RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "BadGateway",
+    "GatewayTimeout",
+    "DeadlineExceeded",
+    "Aborted",
+    "ConnectError",
+    "ReadTimeout",
+    "RemoteProtocolError",
+}
+_RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+_RETRYABLE_MARKERS = ("429", "RESOURCE_EXHAUSTED", "503", "UNAVAILABLE", "overloaded")
+
+llm_gateway_attempts = Counter(
+    "zenfi_llm_gateway_attempts_total",
+    "LLM attempts made by the gateway, by model and outcome "
+    "(ok, retryable_error, error).",
+    ["model", "outcome"],
+)
+llm_gateway_retries = Counter(
+    "zenfi_llm_gateway_retries_total",
+    "LLM attempts retried after a transient error, by model.",
+    ["model"],
+)
+llm_gateway_rejections = Counter(
+    "zenfi_llm_gateway_rejections_total",
+    "LLM calls failed fast by the gateway, by model and reason "
+    "(circuit_open, rate_limited, deadline).",
+    ["model", "reason"],
+)
+llm_gateway_hedges = Counter(
+    "zenfi_llm_gateway_hedges_total",
+    "Hedged LLM attempts, by model and result (launched, won).",
+    ["model", "result"],
+)
+llm_gateway_limiter_wait_seconds = Histogram(
+    "zenfi_llm_gateway_limiter_wait_seconds",
+    "Time LLM calls waited for their model's rate limiter.",
+    ["model"],
+)
+llm_gateway_circuit_state = Gauge(
+    "zenfi_llm_gateway_circuit_state",
+    "Circuit breaker state per model: 0 closed, 1 half open, 2 open. Across "
+    "processes, the most open breaker wins.",
+    ["model"],
+    multiprocess_mode="livemax",
+)
+
+
+class LLMGatewayError(Exception):
+    """Raised by the gateway itself rather than by the model provider."""
+
+
+class CircuitOpenError(LLMGatewayError):
+    pass
+
+
+class LLMRateLimited(LLMGatewayError):
+    pass
+
+
+class LLMDeadlineExceeded(LLMGatewayError):
+    pass
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for throttling, overload, timeout and connection errors."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    if any(cls.__name__ in _RETRYABLE_ERROR_NAMES for cls in type(error).__mro__):
+        return True
+    if getattr(error, "code", None) in _RETRYABLE_STATUS_CODES:
+        return True
+    text = str(error)
+    return any(marker in text for marker in _RETRYABLE_MARKERS)
+
+
+class TokenBucket:
+    """Thread-safe token bucket that hands out reservations."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Takes a token and returns how long to wait before using it, or None
+        (taking nothing) if that wait would exceed max_wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and rejects
+    calls for `cooldown` seconds, then lets a single probe through; the probe's
+    outcome closes or reopens it.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int, cooldown: float, gauge=None):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._gauge = gauge
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> int:
+        return self._state
+
+    @state.setter
+    def state(self, value: int) -> None:
+        self._state = value
+        if self._gauge is not None:
+            self._gauge.set(value)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """Ends a probe that finished without an outcome (cancelled)."""
+        with self._lock:
+            self._probing = False
+
+
+class ConcurrencySlots:
+    """
+    A concurrency cap shared by async calls on the event loop and blocking
+    calls on worker threads. Async waiters poll instead of parking a thread,
+    so a cancelled waiter can never leave a slot taken.
+    """
+
+    POLL_MIN_SECONDS = 0.005
+    POLL_MAX_SECONDS = 0.05
+
+    def __init__(self, limit: int):
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def acquire(self, timeout: float) -> bool:
+        return self._semaphore.acquire(timeout=max(0.0, timeout))
+
+    async def acquire_async(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        delay = self.POLL_MIN_SECONDS
+        while not self._semaphore.acquire(blocking=False):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.POLL_MAX_SECONDS)
+        return True
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+
+class _ModelLane:
+    def __init__(self, model: str):
+        rate, burst = LLM_GATEWAY_RATE_LIMITS.get(
+            model, (LLM_GATEWAY_DEFAULT_RPS, LLM_GATEWAY_DEFAULT_BURST)
+        )
+        self.model = model
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(
+            LLM_GATEWAY_BREAKER_FAILURES,
+            LLM_GATEWAY_BREAKER_COOLDOWN_SECONDS,
+            gauge=llm_gateway_circuit_state.labels(model=model),
+        )
+        self.slots = ConcurrencySlots(LLM_GATEWAY_MAX_CONCURRENCY)
+
+
+@dataclass(frozen=True)
+class _CallOptions:
+    hedge: bool = False
+    # Absolute time.monotonic() deadline shared by every call in the scope.
+    deadline: Optional[float] = None
+
+
+_call_options: contextvars.ContextVar[_CallOptions] = contextvars.ContextVar(
+    "llm_call_options", default=_CallOptions()
+)
+
+
+@contextmanager
+def llm_call_options(
+    hedge: Optional[bool] = None, deadline_seconds: Optional[float] = None
+):
+    """
+    Sets gateway options for LLM calls made inside the block: `hedge` for
+    latency-critical calls, and a deadline that retries must finish within.
+    Nested deadlines only ever shorten the enclosing one.
+    """
+    current = _call_options.get()
+    deadline = current.deadline
+    if deadline_seconds is not None:
+        requested = time.monotonic() + deadline_seconds
+        deadline = requested if deadline is None else min(deadline, requested)
+    token = _call_options.set(
+        _CallOptions(hedge=current.hedge if hedge is None else hedge, deadline=deadline)
+    )
+    try:
+        yield
+    finally:
+        _call_options.reset(token)
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(
+        0,
+        min(
+            LLM_GATEWAY_BACKOFF_MAX_SECONDS,
+            LLM_GATEWAY_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1),
+        ),
+    )
+
+
+class LLMGateway:
+    """
+    Shared admission and retry policy for LLM calls, per model: a token bucket
+    rate limit, a concurrency cap, deadline-aware retries with jittered
+    exponential backoff, optional hedging and a circuit breaker that fails fast
+    while the provider is down.
+    """
+
+    def __init__(self):
+        self._lanes: Dict[str, _ModelLane] = {}
+        self._lock = threading.Lock()
+
+    def lane(self, model: str) -> _ModelLane:
+        with self._lock:
+            lane = self._lanes.get(model)
+            if lane is None:
+                lane = self._lanes[model] = _ModelLane(model)
+            return lane
+
+    @staticmethod
+    def _deadline(deadline_seconds: Optional[float]) -> float:
+        deadline = time.monotonic() + (deadline_seconds or LLM_GATEWAY_DEADLINE_SECONDS)
+        scoped = _call_options.get().deadline
+        return deadline if scoped is None else min(deadline, scoped)
+
+    def _admit(self, lane: _ModelLane, deadline: float) -> float:
+        """Checks the breaker and takes a rate token; returns the wait."""
+        if not lane.breaker.allow():
+            llm_gateway_rejections.labels(model=lane.model, reason="circuit_open").inc()
+            raise CircuitOpenError(f"{lane.model} is unavailable, failing fast")
+        wait = lane.bucket.reserve(max_wait=max(0.0, deadline - time.monotonic()))
+        if wait is None:
+            lane.breaker.release()
+            llm_gateway_rejections.labels(model=lane.model, reason="rate_limited").inc()
+            raise LLMRateLimited(f"{lane.model} rate limit exceeds the deadline")
+        llm_gateway_limiter_wait_seconds.labels(model=lane.model).observe(wait)
+        return wait
+
+    def _record(self, lane: _ModelLane, error: Optional[BaseException]) -> bool:
+        """Records an attempt's outcome; returns True if it may be retried."""
+        if error is None:
+            lane.breaker.record_success()
+            llm_gateway_attempts.labels(model=lane.model, outcome="ok").inc()
+            return False
+        if is_retryable(error):
+            lane.breaker.record_failure()
+            llm_gateway_attempts.labels(
+                model=lane.model, outcome="retryable_error"
+            ).inc()
+            return True
+        # The provider answered, so it is up even though the request failed.
+        lane.breaker.record_success()
+        llm_gateway_attempts.labels(model=lane.model, outcome="error").inc()
+        return False
+
+    def _give_up(
+        self, lane: _ModelLane, error: Optional[BaseException]
+    ) -> LLMDeadlineExceeded:
+        llm_gateway_rejections.labels(model=lane.model, reason="deadline").inc()
+        reason = f": {error or type(error).__name__}" if error is not None else ""
+        return LLMDeadlineExceeded(f"{lane.model} call ran out of time{reason}")
+
+    async def _acquire_slot(self, lane: _ModelLane, deadline: float) -> None:
+        """Waits for a concurrency slot of the lane until the deadline."""
+        try:
+            acquired = await lane.slots.acquire_async(deadline - time.monotonic())
+        except asyncio.CancelledError:
+            lane.breaker.release()
+            raise
+        if not acquired:
+            lane.breaker.release()
+            raise self._give_up(lane, None)
+
+    async def _attempt(
+        self,
+        lane: _ModelLane,
+        call: Callable[[], Awaitable[T]],
+        deadline: float,
+        admitted: bool = False,
+    ) -> T:
+        if not admitted:
+            wait = self._admit(lane, deadline)
+            if wait:
+                await asyncio.sleep(wait)
+        await self._acquire_slot(lane, deadline)
+        try:
+            return await asyncio.wait_for(
+                call(), timeout=max(0.001, deadline - time.monotonic())
+            )
+        except asyncio.CancelledError:
+            lane.breaker.release()
+            raise
+        except Exception as e:
+            self._record(lane, e)
+            raise
+        finally:
+            lane.slots.release()
+
+    async def _hedged_attempt(
+        self, lane: _ModelLane, call: Callable[[], Awaitable[T]], deadline: float
+    ) -> T:
+        first = asyncio.create_task(self._attempt(lane, call, deadline))
+        tasks = {first}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=LLM_GATEWAY_HEDGE_DELAY_SECONDS)
+            if not done:
+                # Hedge only with spare rate capacity, never by waiting for it.
+                if lane.breaker.allow() and lane.bucket.reserve(max_wait=0) is not None:
+                    llm_gateway_hedges.labels(model=lane.model, result="launched").inc()
+                    second = asyncio.create_task(
+                        self._attempt(lane, call, deadline, admitted=True)
+                    )
+                    tasks.add(second)
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            llm_gateway_hedges.labels(
+                                model=lane.model, result="won"
+                            ).inc()
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def acall(
+        self,
+        model: str,
+        call: Callable[[], Awaitable[T]],
+        hedge: bool = False,
+        deadline_seconds: Optional[float] = None,
+    ) -> T:
+        lane = self.lane(model)
+        deadline = self._deadline(deadline_seconds)
+        last_error: Optional[BaseException] = None
+        for attempt in range(1, LLM_GATEWAY_MAX_ATTEMPTS + 1):
+            try:
+                if hedge:
+                    result = await self._hedged_attempt(lane, call, deadline)
+                else:
+                    result = await self._attempt(lane, call, deadline)
+            except LLMGatewayError:
+                raise
+            except Exception as e:
+                if not is_retryable(e) or attempt == LLM_GATEWAY_MAX_ATTEMPTS:
+                    raise
+                last_error = e
+                backoff = _backoff(attempt)
+                if time.monotonic() + backoff >= deadline:
+                    raise self._give_up(lane, last_error) from e
+                llm_gateway_retries.labels(model=model).inc()
+                print(f"DEBUG [LLMGateway]: {model} attempt {attempt} failed: {e}")
+                await asyncio.sleep(backoff)
+                continue
+            self._record(lane, None)
+            return result
+        raise self._give_up(lane, last_error)
+
+    def call(
+        self,
+        model: str,
+        call: Callable[[], T],
+        deadline_seconds: Optional[float] = None,
+    ) -> T:
+        """
+        Blocking variant for sync callers, without hedging. It shares the
+        lane's concurrency cap with the async paths and sleeps through rate
+        limit waits and backoff, so call it from a worker thread (e.g.
+        asyncio.to_thread), never from the event loop.
+        """
+        lane = self.lane(model)
+        deadline = self._deadline(deadline_seconds)
+        for attempt in range(1, LLM_GATEWAY_MAX_ATTEMPTS + 1):
+            wait = self._admit(lane, deadline)
+            if wait:
+                time.sleep(wait)
+            if not lane.slots.acquire(deadline - time.monotonic()):
+                lane.breaker.release()
+                raise self._give_up(lane, None)
+            try:
+                try:
+                    result = call()
+                finally:
+                    lane.slots.release()
+            except Exception as e:
+                if not self._record(lane, e) or attempt == LLM_GATEWAY_MAX_ATTEMPTS:
+                    raise
+                backoff = _backoff(attempt)
+                if time.monotonic() + backoff >= deadline:
+                    raise self._give_up(lane, e) from e
+                llm_gateway_retries.labels(model=model).inc()
+                time.sleep(backoff)
+                continue
+            self._record(lane, None)
+            return result
+        raise self._give_up(lane, None)
+
+    async def astream(
+        self,
+        model: str,
+        start: Callable[[], AsyncIterator[T]],
+        deadline_seconds: Optional[float] = None,
+    ) -> AsyncIterator[T]:
+        """
+        Streams from `start()`, retrying transient failures that happen before
+        the first chunk. Failures after output has been emitted are raised.
+        """
+        lane = self.lane(model)
+        deadline = self._deadline(deadline_seconds)
+        for attempt in range(1, LLM_GATEWAY_MAX_ATTEMPTS + 1):
+            wait = self._admit(lane, deadline)
+            if wait:
+                await asyncio.sleep(wait)
+            emitted = False
+            await self._acquire_slot(lane, deadline)
+            try:
+                try:
+                    async for chunk in start():
+                        emitted = True
+                        yield chunk
+                finally:
+                    lane.slots.release()
+            except asyncio.CancelledError:
+                lane.breaker.release()
+                raise
+            except Exception as e:
+                retryable = self._record(lane, e)
+                if emitted or not retryable or attempt == LLM_GATEWAY_MAX_ATTEMPTS:
+                    raise
+                backoff = _backoff(attempt)
+                if time.monotonic() + backoff >= deadline:
+                    raise self._give_up(lane, e) from e
+                llm_gateway_retries.labels(model=model).inc()
+                await asyncio.sleep(backoff)
+                continue
+            self._record(lane, None)
+            return
+        raise self._give_up(lane, None)
+
+
+llm_gateway = LLMGateway()
+
+
+class GatewayChatModel(ChatGoogleGenerativeAI):
+    """
+    ChatGoogleGenerativeAI whose calls go through the shared LLM gateway.
+    bind_tools and with_structured_output return bindings of this model, so
+    tool calling and structured output calls are governed too.
+    """
+
+    # Retries are the gateway's job; the client makes a single attempt.
+    max_retries: int = 1
+    # Per-call budget across retries; None uses LLM_GATEWAY_DEADLINE_SECONDS.
+    deadline_seconds: Optional[float] = None
+
+    @property
+    def gateway_model(self) -> str:
+        return self.model.split("/")[-1].strip()
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._generate
+        return llm_gateway.call(
+            self.gateway_model,
+            lambda: generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            deadline_seconds=self.deadline_seconds,
+        )
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        generate = super()._agenerate
+        return await llm_gateway.acall(
+            self.gateway_model,
+            lambda: generate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            hedge=_call_options.get().hedge,
+            deadline_seconds=self.deadline_seconds,
+        )
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[Any]:
+        stream = super()._astream
+        async for chunk in llm_gateway.astream(
+            self.gateway_model,
+            lambda: stream(messages, stop=stop, run_manager=run_manager, **kwargs),
+            deadline_seconds=self.deadline_seconds,
+        ):
+            yield chunk
@@ -0,0 +1,62 @@
+"""
+Prometheus metrics for the API, chat workers and batch jobs.
+
+Modules define their metrics with the prometheus_client classes re-exported
+here, so this module's multiprocess setup always runs before the first metric
+is created. When PROMETHEUS_MULTIPROC_DIR is set, every process writes its
+samples to that directory and render_metrics() merges all of them, so one
+scrape covers every API and worker process sharing the directory instead of
+whichever process happened to answer.
+"""
+
+import os
+import socket
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    values,
+)
+
+__all__ = [
+    "CONTENT_TYPE_LATEST",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "mark_process_dead",
+    "render_metrics",
+]
+
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def _process_identifier() -> str:
+    # Containers sharing the directory all number their processes from 1, so
+    # the pid alone would make them write to the same files. "_" separates
+    # the parts of the file names, so keep it out of the identifier.
+    return f"{socket.gethostname()}-{os.getpid()}".replace("_", "-")
+
+
+if PROMETHEUS_MULTIPROC_DIR:
+    values.ValueClass = values.MultiProcessValue(_process_identifier)
+
+
+def render_metrics() -> bytes:
+    """Text exposition of this process's metrics, or of every process's."""
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drops this process's live gauges from the merged view. Call on shutdown."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(_process_identifier())
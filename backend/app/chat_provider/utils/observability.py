@@ -0,0 +1,285 @@
+import functools
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from sqlalchemy import event
+
+from app.chat_provider.utils.metrics import Counter, Histogram
+
+# Histogram buckets for LLM calls and graph nodes, which routinely exceed 10s.
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+# Start times of runs that never report an end (cancelled streams) are dropped
+# after this long so the bookkeeping cannot grow without bound.
+_STALE_RUN_SECONDS = 3600
+_MAX_TRACKED_RUNS = 4096
+
+graph_node_seconds = Histogram(
+    "zenfi_graph_node_seconds",
+    "Wall time of LangGraph node runs, by graph, node and status.",
+    ["graph", "node", "status"],
+    buckets=SLOW_BUCKETS,
+)
+tool_call_seconds = Histogram(
+    "zenfi_tool_call_seconds",
+    "Wall time of tool invocations, by tool and status.",
+    ["tool", "status"],
+    buckets=SLOW_BUCKETS,
+)
+llm_call_seconds = Histogram(
+    "zenfi_llm_call_seconds",
+    "Wall time of LLM calls, by model and status.",
+    ["model", "status"],
+    buckets=SLOW_BUCKETS,
+)
+llm_tokens = Counter(
+    "zenfi_llm_tokens_total",
+    "Tokens consumed by LLM calls, by model and direction (input, output).",
+    ["model", "direction"],
+)
+search_call_seconds = Histogram(
+    "zenfi_search_call_seconds",
+    "Wall time of web search provider calls, by provider and status.",
+    ["provider", "status"],
+    buckets=SLOW_BUCKETS,
+)
+redis_cache_lookups = Counter(
+    "zenfi_redis_cache_lookups_total",
+    "Redis cache reads by key family and result (hit, miss, error).",
+    ["family", "result"],
+)
+db_query_seconds = Histogram(
+    "zenfi_db_query_seconds",
+    "SQL statement execution time, by statement type.",
+    ["operation"],
+)
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+class _RunTimer:
+    """Start times keyed by callback run_id."""
+
+    def __init__(self):
+        self._started: Dict[UUID, Tuple[float, Tuple[str, ...]]] = {}
+
+    def start(self, run_id: UUID, *labels: str) -> None:
+        now = time.perf_counter()
+        if len(self._started) >= _MAX_TRACKED_RUNS:
+            self._started = {
+                key: value
+                for key, value in self._started.items()
+                if now - value[0] < _STALE_RUN_SECONDS
+            }
+        self._started[run_id] = (now, labels)
+
+    def stop(self, run_id: UUID) -> Optional[Tuple[float, Tuple[str, ...]]]:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return None
+        return time.perf_counter() - started[0], started[1]
+
+
+class GraphMetricsCallback(BaseCallbackHandler):
+    """
+    Records node and tool latencies for one compiled graph. Node runs are the
+    chain runs whose name matches the `langgraph_node` metadata LangGraph
+    attaches; chains nested inside a node are ignored.
+    """
+
+    run_inline = True
+    ignore_llm = True
+    ignore_chat_model = True
+    ignore_retriever = True
+
+    def __init__(self, graph: str):
+        self.graph = graph
+        self._nodes = _RunTimer()
+        self._tools = _RunTimer()
+
+    def on_chain_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        if node and name == node:
+            self._nodes.start(run_id, node)
+
+    def _end_node(self, run_id: UUID, status: str) -> None:
+        stopped = self._nodes.stop(run_id)
+        if stopped is not None:
+            elapsed, (node,) = stopped
+            graph_node_seconds.labels(
+                graph=self.graph, node=node, status=status
+            ).observe(elapsed)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_node(run_id, "ok")
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end_node(run_id, "error")
+
+    def on_tool_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._tools.start(run_id, name)
+
+    def _end_tool(self, run_id: UUID, status: str) -> None:
+        stopped = self._tools.stop(run_id)
+        if stopped is not None:
+            elapsed, (tool,) = stopped
+            tool_call_seconds.labels(tool=tool, status=status).observe(elapsed)
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id, "ok")
+
+    def on_tool_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._end_tool(run_id, "error")
+
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    Records latency and token usage of every call made through a chat model.
+    Attach it to the model itself (`callbacks=[llm_metrics_callback]`) so that
+    calls are counted whether or not they run inside a graph.
+    """
+
+    run_inline = True
+    ignore_chain = True
+    ignore_agent = True
+    ignore_retriever = True
+
+    def __init__(self):
+        self._calls = _RunTimer()
+
+    @staticmethod
+    def _model_name(
+        serialized: Optional[Dict[str, Any]], metadata: Optional[Dict[str, Any]]
+    ) -> str:
+        model = (metadata or {}).get("ls_model_name")
+        if not model:
+            model = ((serialized or {}).get("kwargs") or {}).get("model")
+        return str(model or "unknown").strip()
+
+    def on_chat_model_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._calls.start(run_id, self._model_name(serialized, metadata))
+
+    def on_llm_start(
+        self,
+        serialized: Optional[Dict[str, Any]],
+        prompts: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._calls.start(run_id, self._model_name(serialized, metadata))
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        stopped = self._calls.stop(run_id)
+        if stopped is None:
+            return
+        elapsed, (model,) = stopped
+        llm_call_seconds.labels(model=model, status="ok").observe(elapsed)
+        input_tokens = output_tokens = 0
+        for generations in getattr(response, "generations", None) or []:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                input_tokens += usage.get("input_tokens", 0) or 0
+                output_tokens += usage.get("output_tokens", 0) or 0
+        if input_tokens:
+            llm_tokens.labels(model=model, direction="input").inc(input_tokens)
+        if output_tokens:
+            llm_tokens.labels(model=model, direction="output").inc(output_tokens)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        stopped = self._calls.stop(run_id)
+        if stopped is not None:
+            elapsed, (model,) = stopped
+            llm_call_seconds.labels(model=model, status="error").observe(elapsed)
+
+
+llm_metrics_callback = LLMMetricsCallback()
+
+
+def instrument_graph(graph, name: str):
+    """Returns the compiled graph with node and tool metrics attached."""
+    return graph.with_config(callbacks=[GraphMetricsCallback(name)])
+
+
+def observe_search(func):
+    """Times an async `(search_api, ...)` search dispatcher per provider."""
+
+    @functools.wraps(func)
+    async def wrapper(search_api: str, *args, **kwargs):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await func(search_api, *args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            search_call_seconds.labels(provider=search_api, status=status).observe(
+                time.perf_counter() - started
+            )
+
+    return wrapper
+
+
+def record_cache_lookup(family: str, hit: Optional[bool]) -> None:
+    """Counts a Redis cache read; `hit=None` records a failed read."""
+    result = "error" if hit is None else ("hit" if hit else "miss")
+    redis_cache_lookups.labels(family=family, result=result).inc()
+
+
+def instrument_engine(engine) -> None:
+    """Times every statement executed through a (sync or async) SQLAlchemy engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("zenfi_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("zenfi_query_start")
+        if not starts:
+            return
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        db_query_seconds.labels(
+            operation=operation if operation in _SQL_OPERATIONS else "OTHER"
+        ).observe(time.perf_counter() - starts.pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("zenfi_query_start"):
+            conn.info["zenfi_query_start"].pop()
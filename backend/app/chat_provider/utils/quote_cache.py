@@ -0,0 +1,252 @@
+import asyncio
+import math
+import os
+from typing import Dict, Iterable, List, Optional
+
+import yfinance
+
+from app.chat_provider.utils.cache_utils import TTLCache
+from app.chat_provider.utils.metrics import Counter, Histogram
+
+QUOTE_CACHE_TTL_SECONDS = int(os.environ.get("QUOTE_CACHE_TTL_SECONDS", 30))
+QUOTE_CACHE_STATIC_TTL_SECONDS = int(
+    os.environ.get("QUOTE_CACHE_STATIC_TTL_SECONDS", 21600)
+)
+QUOTE_CACHE_MAX_ENTRIES = int(os.environ.get("QUOTE_CACHE_MAX_ENTRIES", 8192))
+QUOTE_FETCH_CONCURRENCY = int(os.environ.get("QUOTE_FETCH_CONCURRENCY", 8))
+
+# Snapshot field -> yfinance fast_info attribute.
+FAST_INFO_FIELDS = {
+    "last_price": "last_price",
+    "open": "open",
+    "day_high": "day_high",
+    "day_low": "day_low",
+    "previous_close": "previous_close",
+    "regular_market_previous_close": "regular_market_previous_close",
+    "last_volume": "last_volume",
+    "market_cap": "market_cap",
+    "shares": "shares",
+    "currency": "currency",
+    "exchange": "exchange",
+    "quote_type": "quote_type",
+    "timezone": "timezone",
+    "fifty_day_average": "fifty_day_average",
+    "two_hundred_day_average": "two_hundred_day_average",
+    "ten_day_average_volume": "ten_day_average_volume",
+    "three_month_average_volume": "three_month_average_volume",
+    "year_high": "year_high",
+    "year_low": "year_low",
+    "year_change": "year_change",
+}
+# Computed from last_price and previous_close.
+DERIVED_FIELDS = {
+    "change": ("last_price", "previous_close"),
+    "change_percent": ("last_price", "previous_close"),
+}
+# Reference data that does not move intraday.
+STATIC_FIELDS = {"currency", "exchange", "quote_type", "timezone", "shares"}
+FIELD_ALIASES = {
+    "price": "last_price",
+    "ltp": "last_price",
+    "close": "last_price",
+    "volume": "last_volume",
+    "mcap": "market_cap",
+    "market_capitalization": "market_cap",
+    "high": "day_high",
+    "low": "day_low",
+    "52w_high": "year_high",
+    "52_week_high": "year_high",
+    "52w_low": "year_low",
+    "52_week_low": "year_low",
+    "52w_change": "year_change",
+    "pct_change": "change_percent",
+    "percent_change": "change_percent",
+    "percentage_change": "change_percent",
+    "point_change": "change",
+    "50_day_average": "fifty_day_average",
+    "200_day_average": "two_hundred_day_average",
+}
+SNAPSHOT_FIELDS = list(FAST_INFO_FIELDS) + list(DERIVED_FIELDS)
+
+quote_cache_lookups = Counter(
+    "zenfi_quote_cache_lookups_total",
+    "Per-field quote lookups served from cache (hit) or fetched (miss).",
+    ["result"],
+)
+quote_prefetch_symbols = Counter(
+    "zenfi_quote_prefetch_symbols_total",
+    "Symbols fetched speculatively from the user message (issued), and those a "
+    "tool later read (used). used / issued is the prefetch hit rate.",
+    ["result"],
+)
+quote_fetch_seconds = Histogram(
+    "zenfi_quote_fetch_seconds",
+    "Time to fetch the missing fields for one symbol from Yahoo Finance.",
+)
+
+
+_MISSING = object()
+
+
+def resolve_field(name: str) -> Optional[str]:
+    key = name.strip().lower().replace(" ", "_").replace("-", "_")
+    key = FIELD_ALIASES.get(key, key)
+    return key if key in FAST_INFO_FIELDS or key in DERIVED_FIELDS else None
+
+
+def _clean(value):
+    if isinstance(value, float) and (math.isnan(value) or math.isinf(value)):
+        return None
+    return value
+
+
+class QuoteCache:
+    """
+    Per-(symbol, field) cache in front of yfinance fast_info. Missing fields for
+    many symbols are fetched concurrently in worker threads, one Ticker per
+    symbol, so a multi-symbol request costs one round of Yahoo calls.
+    """
+
+    def __init__(
+        self,
+        ttl: float = QUOTE_CACHE_TTL_SECONDS,
+        static_ttl: float = QUOTE_CACHE_STATIC_TTL_SECONDS,
+        maxsize: int = QUOTE_CACHE_MAX_ENTRIES,
+        concurrency: int = QUOTE_FETCH_CONCURRENCY,
+    ):
+        self.ttl = ttl
+        self.static_ttl = static_ttl
+        self.concurrency = concurrency
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Symbols prefetched but not yet read by a tool, and running prefetches.
+        self._prefetched = TTLCache(maxsize=1024, ttl=ttl)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _fetch_symbol(self, symbol: str, fields: List[str]) -> Dict[str, object]:
+        """Blocking fetch of the given fast_info fields for one symbol."""
+        with quote_fetch_seconds.time():
+            fast_info = yfinance.Ticker(symbol).fast_info
+            values = {}
+            for field in fields:
+                try:
+                    values[field] = _clean(getattr(fast_info, FAST_INFO_FIELDS[field]))
+                except Exception as e:
+                    print(f"ERROR [QuoteCache]: {symbol}.{field}: {e}")
+                    values[field] = None
+            return values
+
+    def prefetch(
+        self, symbols: Iterable[str], fields: Iterable[str]
+    ) -> Optional[asyncio.Task]:
+        """
+        Starts fetching the given fields in the background so a later tool call
+        finds them cached. A get_many for a symbol still being prefetched waits
+        for that fetch instead of starting another.
+        """
+        symbols = [
+            s
+            for s in dict.fromkeys(s.strip().upper() for s in symbols if s.strip())
+            if s not in self._inflight
+        ]
+        if not symbols:
+            return None
+        task = asyncio.create_task(
+            self.get_many(symbols, list(fields), speculative=True)
+        )
+        for symbol in symbols:
+            self._inflight[symbol] = task
+            self._prefetched.set(symbol, True)
+        quote_prefetch_symbols.labels(result="issued").inc(len(symbols))
+
+        def done(finished: asyncio.Task) -> None:
+            for symbol in symbols:
+                if self._inflight.get(symbol) is finished:
+                    del self._inflight[symbol]
+            if not finished.cancelled() and finished.exception() is not None:
+                print(f"ERROR [QuoteCache]: Prefetch failed: {finished.exception()}")
+
+        task.add_done_callback(done)
+        return task
+
+    async def get_many(
+        self, symbols: Iterable[str], fields: Iterable[str], speculative: bool = False
+    ) -> Dict[str, Dict[str, object]]:
+        """
+        Returns {symbol: {field: value}} for the requested snapshot fields.
+        Values that could not be fetched are None.
+        """
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+        fields = list(dict.fromkeys(fields))
+        if not speculative:
+            pending = {self._inflight[s] for s in symbols if s in self._inflight}
+            if pending:
+                await asyncio.wait(pending)
+            for symbol in symbols:
+                if self._prefetched.get(symbol):
+                    self._prefetched.delete(symbol)
+                    quote_prefetch_symbols.labels(result="used").inc()
+        raw_fields = list(
+            dict.fromkeys(
+                f
+                for field in fields
+                for f in DERIVED_FIELDS.get(field, (field,))
+                if f in FAST_INFO_FIELDS
+            )
+        )
+
+        result: Dict[str, Dict[str, object]] = {s: {} for s in symbols}
+        missing: Dict[str, List[str]] = {}
+        for symbol in symbols:
+            for field in raw_fields:
+                cached = self._cache.get((symbol, field), _MISSING)
+                if cached is _MISSING:
+                    quote_cache_lookups.labels(result="miss").inc()
+                    missing.setdefault(symbol, []).append(field)
+                else:
+                    quote_cache_lookups.labels(result="hit").inc()
+                    result[symbol][field] = cached
+
+        if missing:
+            semaphore = asyncio.Semaphore(self.concurrency)
+
+            async def fetch(symbol: str, symbol_fields: List[str]):
+                async with semaphore:
+                    try:
+                        return symbol, await asyncio.to_thread(
+                            self._fetch_symbol, symbol, symbol_fields
+                        )
+                    except Exception as e:
+                        print(f"ERROR [QuoteCache]: Fetching {symbol} failed: {e}")
+                        return symbol, {}
+
+            fetched = await asyncio.gather(
+                *(fetch(symbol, f) for symbol, f in missing.items())
+            )
+            for symbol, values in fetched:
+                for field, value in values.items():
+                    result[symbol][field] = value
+                    if value is not None:
+                        ttl = self.static_ttl if field in STATIC_FIELDS else self.ttl
+                        self._cache.set((symbol, field), value, ttl=ttl)
+
+        for symbol in symbols:
+            values = result[symbol]
+            last, previous = values.get("last_price"), values.get("previous_close")
+            if "change" in fields or "change_percent" in fields:
+                change = last - previous if last is not None and previous else None
+                values["change"] = change
+                values["change_percent"] = (
+                    change / previous * 100 if change is not None else None
+                )
+            result[symbol] = {field: values.get(field) for field in fields}
+        return result
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._prefetched.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return self._cache.stats()
+
+
+quote_cache = QuoteCache()
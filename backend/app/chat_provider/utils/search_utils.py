@@ -17,6 +17,7 @@ from langchain_core.tools import tool
 from langsmith import traceable
 
 from app.chat_provider.models.deepsearch_models import Section
+from app.chat_provider.utils.observability import observe_search
 
 
 def get_config_value(value):
@@ -503,7 +504,8 @@ async def google_search_async(
     finally:
         # Only shut down executor if it was created
         if executor:
-            executor.shutdown(wait=False)
+            # Drops scraping jobs that have not started if the run was cancelled.
+            executor.shutdown(wait=False, cancel_futures=True)
 
 
 async def scrape_pages(titles: List[str], urls: List[str]) -> str:
@@ -745,6 +747,7 @@ async def tavily_search(
         return "No valid search results found. Please try different search queries or use a different search API."
 
 
+@observe_search
 async def select_and_execute_search(
     search_api: str, query_list: list[str], params_to_pass: dict
 ) -> str:
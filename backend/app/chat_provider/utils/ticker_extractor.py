@@ -0,0 +1,116 @@
+import os
+import re
+from typing import Dict, List
+
+TICKER_PREFETCH_MAX_SYMBOLS = int(os.environ.get("TICKER_PREFETCH_MAX_SYMBOLS", 5))
+
+# NIFTY 50 constituents (NSE symbol -> common names), plus a few US mega caps
+# users ask about often. Symbols are matched only in upper case; names in any case.
+NSE_SYMBOL_INDEX: Dict[str, List[str]] = {
+    "ADANIENT": ["adani enterprises"],
+    "ADANIPORTS": ["adani ports"],
+    "APOLLOHOSP": ["apollo hospitals"],
+    "ASIANPAINT": ["asian paints"],
+    "AXISBANK": ["axis bank"],
+    "BAJAJ-AUTO": ["bajaj auto"],
+    "BAJFINANCE": ["bajaj finance"],
+    "BAJAJFINSV": ["bajaj finserv"],
+    "BEL": ["bharat electronics"],
+    "BHARTIARTL": ["bharti airtel", "airtel"],
+    "CIPLA": ["cipla"],
+    "COALINDIA": ["coal india"],
+    "DRREDDY": ["dr reddy's", "dr reddys", "dr. reddy's"],
+    "EICHERMOT": ["eicher motors", "royal enfield"],
+    "ETERNAL": ["zomato"],
+    "GRASIM": ["grasim"],
+    "HCLTECH": ["hcl technologies", "hcl tech"],
+    "HDFCBANK": ["hdfc bank"],
+    "HDFCLIFE": ["hdfc life"],
+    "HEROMOTOCO": ["hero motocorp"],
+    "HINDALCO": ["hindalco"],
+    "HINDUNILVR": ["hindustan unilever", "hul"],
+    "ICICIBANK": ["icici bank"],
+    "INDUSINDBK": ["indusind bank"],
+    "INFY": ["infosys"],
+    "ITC": [],
+    "JIOFIN": ["jio financial"],
+    "JSWSTEEL": ["jsw steel"],
+    "KOTAKBANK": ["kotak mahindra bank", "kotak bank"],
+    "LT": ["larsen & toubro", "larsen and toubro", "l&t"],
+    "M&M": ["mahindra & mahindra", "mahindra and mahindra"],
+    "MARUTI": ["maruti suzuki", "maruti"],
+    "NESTLEIND": ["nestle india"],
+    "NTPC": ["ntpc"],
+    "ONGC": ["ongc"],
+    "POWERGRID": ["power grid"],
+    "RELIANCE": ["reliance industries", "reliance"],
+    "SBILIFE": ["sbi life"],
+    "SBIN": ["state bank of india", "sbi"],
+    "SHRIRAMFIN": ["shriram finance"],
+    "SUNPHARMA": ["sun pharma", "sun pharmaceutical"],
+    "TATACONSUM": ["tata consumer"],
+    "TATAMOTORS": ["tata motors"],
+    "TATASTEEL": ["tata steel"],
+    "TCS": ["tata consultancy services", "tata consultancy"],
+    "TECHM": ["tech mahindra"],
+    "TITAN": ["titan company"],
+    "TRENT": [],
+    "ULTRACEMCO": ["ultratech cement", "ultratech"],
+    "WIPRO": ["wipro"],
+}
+US_SYMBOL_INDEX: Dict[str, List[str]] = {
+    "AAPL": ["apple"],
+    "MSFT": ["microsoft"],
+    "NVDA": ["nvidia"],
+    "GOOGL": ["alphabet", "google"],
+    "AMZN": ["amazon"],
+    "META": [],
+    "TSLA": ["tesla"],
+}
+
+# Yahoo Finance symbol for every indexed symbol and name.
+_YAHOO_SYMBOLS: Dict[str, str] = {
+    **{symbol: f"{symbol}.NS" for symbol in NSE_SYMBOL_INDEX},
+    **{symbol: symbol for symbol in US_SYMBOL_INDEX},
+}
+_NAMES: Dict[str, str] = {
+    name: _YAHOO_SYMBOLS[symbol]
+    for index in (NSE_SYMBOL_INDEX, US_SYMBOL_INDEX)
+    for symbol, names in index.items()
+    for name in names
+}
+
+# Explicit exchange-qualified symbols such as RELIANCE.NS or tcs.bo.
+_QUALIFIED_RE = re.compile(
+    r"(?<![\w.&-])([A-Za-z][A-Za-z0-9&-]{0,19})\.(NS|BO)\b", re.I
+)
+# Bare upper case tokens, looked up in the index.
+_SYMBOL_RE = re.compile(r"(?<![\w.&-])([A-Z][A-Z0-9&-]{1,14})(?![\w&-])")
+# Longest names first so "sbi life" wins over "sbi".
+_NAME_RE = re.compile(
+    r"(?<!\w)("
+    + "|".join(re.escape(name) for name in sorted(_NAMES, key=len, reverse=True))
+    + r")(?!\w)",
+    re.I,
+)
+
+
+def extract_tickers(text: str, limit: int = TICKER_PREFETCH_MAX_SYMBOLS) -> List[str]:
+    """
+    Returns the Yahoo Finance symbols a message names, in order of appearance:
+    exchange-qualified symbols as written, plus bare symbols and company names
+    found in the index. Cheap enough to run on every message.
+    """
+    if not text:
+        return []
+    found: Dict[int, str] = {}
+    for match in _QUALIFIED_RE.finditer(text):
+        found.setdefault(match.start(), f"{match.group(1)}.{match.group(2)}".upper())
+    for match in _SYMBOL_RE.finditer(text):
+        symbol = _YAHOO_SYMBOLS.get(match.group(1))
+        if symbol:
+            found.setdefault(match.start(), symbol)
+    for match in _NAME_RE.finditer(text):
+        found.setdefault(match.start(), _NAMES[match.group(1).lower()])
+    ordered = [found[position] for position in sorted(found)]
+    return list(dict.fromkeys(ordered))[:limit]
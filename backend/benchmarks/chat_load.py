@@ -0,0 +1,388 @@
+"""
+Offline load test for POST /chat/stream.
+
+Boots the chat API in a subprocess with a fake chat model, fake search and a
+fake yfinance, opens N concurrent SSE sessions against it over loopback and
+reports TTFT, inter-token latency, total latency, throughput and server
+event-loop lag percentiles. Needs the app Postgres (for users, sessions and
+messages) but no network access; Redis is optional.
+
+    cd backend
+    python -m benchmarks.chat_load --sessions 50 --turns 3 --ttft 0.5 --tps 80
+
+Only the chat router is mounted: app.api.main also imports the knowledge base
+and portfolio routers, which create Google Cloud clients at import time.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import httpx
+
+SERVER_READY_TIMEOUT_SECONDS = 60
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p90/p95/p99/max, in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+        return round(ordered[index] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "p50": rank(50),
+        "p90": rank(90),
+        "p95": rank(95),
+        "p99": rank(99),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+# --- Server -----------------------------------------------------------------
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a fixed sleep."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def drain(self) -> List[float]:
+        samples, self.samples = self.samples, []
+        return samples
+
+
+def build_app(args):
+    from fastapi import FastAPI
+    from fastapi.responses import Response
+    from jose import jwt
+    from langgraph.checkpoint.memory import MemorySaver
+
+    from benchmarks.fakes import FakeChatModel, install_fake_yfinance, make_fake_search
+
+    # The real Gemini clients are still constructed at import time, though
+    # never called; they only need a non-empty key.
+    os.environ.setdefault("GOOGLE_GEMINI_API_KEY", "offline-benchmark")
+    install_fake_yfinance()
+
+    from app.api import api_functions
+    from app.api import chat as chat_api
+    from app.api.api_models import ChatSession, User
+    from app.chat_provider.service import chat_service, deepsearch_service
+    from app.chat_provider.utils.metrics import CONTENT_TYPE_LATEST, render_metrics
+
+    model = FakeChatModel(
+        ttft_seconds=args.ttft,
+        tokens_per_second=args.tps,
+        answer_tokens=args.answer_tokens,
+        decision_seconds=args.decision_latency,
+        search_rate=args.search_rate,
+    )
+    api_functions.quicksearch_llm = model
+    api_functions.deepresearch_llm = model
+    fake_search = make_fake_search(args.search_latency)
+    chat_service.select_and_execute_search = fake_search
+    deepsearch_service.select_and_execute_search = fake_search
+
+    if args.checkpointer == "memory":
+        saver = MemorySaver()
+
+        @asynccontextmanager
+        async def memory_checkpointer():
+            yield saver
+
+        chat_api.chat_service_manager.checkpointer_factory = memory_checkpointer
+
+    app = FastAPI(title="zenfi chat benchmark")
+    app.include_router(chat_api.chat_router)
+    lag_monitor = LoopLagMonitor()
+
+    @app.on_event("startup")
+    async def startup():
+        await api_functions.init_db()
+        lag_monitor.start()
+
+    @app.get("/metrics")
+    async def metrics():
+        return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+    @app.post("/bench/setup")
+    async def setup(sessions: int):
+        """Creates one user and one chat session per simulated client."""
+        clients = []
+        async with api_functions.AsyncSessionLocal() as db:
+            for _ in range(sessions):
+                username = f"bench-{uuid.uuid4().hex[:12]}"
+                user = User(
+                    username=username,
+                    email=f"{username}@example.invalid",
+                    hashed_password="!",
+                )
+                db.add(user)
+                await db.flush()
+                session = ChatSession(user_id=user.id)
+                db.add(session)
+                await db.flush()
+                token = jwt.encode(
+                    {
+                        "sub": username,
+                        "exp": datetime.datetime.now(datetime.timezone.utc)
+                        + datetime.timedelta(hours=6),
+                    },
+                    api_functions.SECRET_KEY,
+                    algorithm=api_functions.ALGORITHM,
+                )
+                clients.append({"token": token, "session_id": str(session.id)})
+            await db.commit()
+        return clients
+
+    @app.get("/bench/loop-lag")
+    async def loop_lag():
+        """Returns lag percentiles since the previous call and resets them."""
+        return percentiles(lag_monitor.drain())
+
+    return app
+
+
+def serve(args) -> None:
+    import uvicorn
+
+    uvicorn.run(build_app(args), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+# --- Load driver --------------------------------------------------------------
+
+
+class Stats:
+    def __init__(self):
+        self.ttft: List[float] = []
+        self.inter_token: List[float] = []
+        self.total: List[float] = []
+        self.tokens = 0
+        self.outcomes: Counter = Counter()
+
+
+async def run_turn(client, token, session_id, message, bypass_cache, stats) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    if bypass_cache:
+        headers["X-Cache-Bypass"] = "1"
+    started = time.perf_counter()
+    first = last = None
+    outcome = "incomplete"
+    async with client.stream(
+        "POST",
+        "/chat/stream",
+        json={"session_id": session_id, "message": message, "isDeepSearch": False},
+        headers=headers,
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            stats.outcomes[f"http_{response.status_code}"] += 1
+            return
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: ") :])
+            now = time.perf_counter()
+            if event["type"] == "token":
+                if first is None:
+                    first = now
+                else:
+                    stats.inter_token.append(now - last)
+                last = now
+                stats.tokens += 1
+            elif event["type"] == "complete":
+                outcome = "ok"
+            elif event["type"] == "error":
+                outcome = event.get("finishReason", "error")
+    stats.outcomes[outcome] += 1
+    if outcome == "ok":
+        stats.total.append(time.perf_counter() - started)
+        if first is not None:
+            stats.ttft.append(first - started)
+
+
+async def run_client(client, credentials, turns, bypass_cache, stats) -> None:
+    for turn in range(turns):
+        message = (
+            f"Explain how index funds differ from active funds "
+            f"(question {turn + 1} from {credentials['session_id'][:8]})"
+        )
+        try:
+            await run_turn(
+                client,
+                credentials["token"],
+                credentials["session_id"],
+                message,
+                bypass_cache,
+                stats,
+            )
+        except httpx.HTTPError as e:
+            stats.outcomes[type(e).__name__] += 1
+
+
+async def wait_until_ready(client: httpx.AsyncClient) -> None:
+    deadline = time.monotonic() + SERVER_READY_TIMEOUT_SECONDS
+    while True:
+        try:
+            if (await client.get("/metrics")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError("Benchmark server did not start; see --server-log")
+        await asyncio.sleep(0.5)
+
+
+async def drive(args, base_url: str) -> dict:
+    limits = httpx.Limits(max_connections=args.sessions + 10)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=httpx.Timeout(None), limits=limits
+    ) as client:
+        await wait_until_ready(client)
+        response = await client.post("/bench/setup", params={"sessions": args.sessions})
+        response.raise_for_status()
+        clients = response.json()
+        await client.get("/bench/loop-lag")
+
+        stats = Stats()
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                run_client(client, credentials, args.turns, args.bypass_cache, stats)
+                for credentials in clients
+            )
+        )
+        elapsed = time.perf_counter() - started
+        loop_lag = (await client.get("/bench/loop-lag")).json()
+
+    completed = stats.outcomes.get("ok", 0)
+    return {
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("serve", "json", "server_log")
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "outcomes": dict(stats.outcomes),
+        "throughput": {
+            "turns_per_second": round(completed / elapsed, 3),
+            "tokens_per_second": round(stats.tokens / elapsed, 1),
+        },
+        "ttft_ms": percentiles(stats.ttft),
+        "inter_token_ms": percentiles(stats.inter_token),
+        "total_ms": percentiles(stats.total),
+        "server_loop_lag_ms": loop_lag,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"\nElapsed: {report['elapsed_seconds']}s  Outcomes: {report['outcomes']}")
+    print(
+        f"Throughput: {report['throughput']['turns_per_second']} turns/s, "
+        f"{report['throughput']['tokens_per_second']} SSE tokens/s"
+    )
+    print(
+        f"{'metric':<20}{'count':>8}{'p50':>10}{'p90':>10}{'p95':>10}{'p99':>10}{'max':>10}"
+    )
+    for name in ("ttft_ms", "inter_token_ms", "total_ms", "server_loop_lag_ms"):
+        row = report[name]
+        values = [row.get(k, "-") for k in ("p50", "p90", "p95", "p99", "max")]
+        print(
+            f"{name:<20}{row.get('count', 0):>8}" + "".join(f"{v:>10}" for v in values)
+        )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--turns", type=int, default=3, help="Messages per client")
+    parser.add_argument("--ttft", type=float, default=0.5, help="Fake model TTFT (s)")
+    parser.add_argument("--tps", type=float, default=80.0, help="Fake tokens/second")
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--decision-latency", type=float, default=0.2)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument(
+        "--search-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of turns routed to web search",
+    )
+    parser.add_argument(
+        "--checkpointer", choices=("memory", "postgres"), default="memory"
+    )
+    parser.add_argument(
+        "--bypass-cache",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Send X-Cache-Bypass so every turn runs the graph",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--url", help="Drive an already running benchmark server instead"
+    )
+    parser.add_argument("--server-log", default=os.devnull)
+    parser.add_argument("--json", help="Also write the report to this file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    if args.serve:
+        serve(args)
+        return
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        base_url = f"http://127.0.0.1:{args.port}"
+        log = open(args.server_log, "w")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.chat_load", "--serve"]
+            + (argv if argv is not None else sys.argv[1:]),
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+    try:
+        report = asyncio.run(drive(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+            log.close()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
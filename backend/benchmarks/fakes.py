@@ -0,0 +1,226 @@
+"""
+Deterministic stand-ins for the external services the chat path calls, so
+benchmarks measure this codebase rather than Gemini, Google or Yahoo.
+"""
+
+import asyncio
+import hashlib
+import random
+import typing
+from typing import Any, List, Optional
+
+import yfinance
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+_WORDS = (
+    "the market closed higher as investors weighed earnings guidance and the "
+    "outlook for interest rates while banking and energy stocks led gains"
+).split()
+
+# Phrases used by the routing prompts that expect a one-word answer.
+_DECISION_MARKERS = ("respond with only", "respond only with")
+
+
+def _seeded(text: str) -> random.Random:
+    return random.Random(int(hashlib.sha256(text.encode()).hexdigest()[:16], 16))
+
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _build(annotation, name: str = "value"):
+    """Builds a placeholder value for a pydantic field annotation."""
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Union:
+        return _build(next(a for a in args if a is not type(None)), name)
+    if origin in (list, List):
+        return [_build(args[0] if args else str, name) for _ in range(2)]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation(
+            **{
+                field: _build(info.annotation, field)
+                for field, info in annotation.model_fields.items()
+            }
+        )
+    if annotation is bool:
+        return False
+    if annotation in (int, float):
+        return annotation(1)
+    return f"benchmark {name}"
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model with a configurable time to first token and decode speed.
+    Routing prompts get a fast one-word decision; everything else gets an
+    `answer_tokens`-word answer. Structured output returns placeholder objects
+    whose booleans are False, so no optional branch (code, portfolio) runs.
+    """
+
+    ttft_seconds: float = 0.5
+    tokens_per_second: float = 80.0
+    answer_tokens: int = 200
+    decision_seconds: float = 0.2
+    search_rate: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _decision(self, prompt: str) -> Optional[str]:
+        lowered = prompt.lower()
+        if not any(marker in lowered for marker in _DECISION_MARKERS):
+            return None
+        if "web search" in lowered and _seeded(prompt).random() < self.search_rate:
+            return "YES"
+        return "NO"
+
+    def _answer_tokens(self, prompt: str) -> List[str]:
+        rng = _seeded(prompt)
+        return [rng.choice(_WORDS) + " " for _ in range(self.answer_tokens)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        raise NotImplementedError("FakeChatModel is async only")
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = _prompt_text(messages)
+        decision = self._decision(prompt)
+        if decision is not None:
+            await asyncio.sleep(self.decision_seconds)
+            content = decision
+        else:
+            tokens = self._answer_tokens(prompt)
+            await asyncio.sleep(
+                self.ttft_seconds + len(tokens) / self.tokens_per_second
+            )
+            content = "".join(tokens).strip()
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": len(prompt) // 4,
+                "output_tokens": len(content.split()),
+                "total_tokens": len(prompt) // 4 + len(content.split()),
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        prompt = _prompt_text(messages)
+        decision = self._decision(prompt)
+        if decision is not None:
+            await asyncio.sleep(self.decision_seconds)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=decision))
+            return
+        await asyncio.sleep(self.ttft_seconds)
+        for token in self._answer_tokens(prompt):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(1.0 / self.tokens_per_second)
+
+    def bind_tools(self, tools, **kwargs):
+        # The fake never emits tool calls.
+        return self
+
+    def with_structured_output(self, schema, **kwargs):
+        async def respond(messages):
+            await asyncio.sleep(self.decision_seconds)
+            return _build(schema)
+
+        return RunnableLambda(lambda messages: _build(schema), afunc=respond)
+
+
+def make_fake_search(latency_seconds: float = 0.3, results: int = 5):
+    """Returns an async stand-in for select_and_execute_search."""
+
+    async def fake_search(search_api: str, query_list: list, params_to_pass: dict):
+        await asyncio.sleep(latency_seconds)
+        sections = []
+        for query in query_list:
+            for i in range(results):
+                sections.append(
+                    f"Source: Benchmark result {i + 1} for {query}\n"
+                    f"URL: https://example.invalid/{i}\n"
+                    f"Most relevant content from source: {' '.join(_WORDS)}\n"
+                )
+        return "\n".join(sections)
+
+    return fake_search
+
+
+class _FakeFastInfo:
+    def __init__(self, symbol: str):
+        rng = _seeded(symbol)
+        self.previous_close = round(rng.uniform(50, 5000), 2)
+        self.regular_market_previous_close = self.previous_close
+        self.last_price = round(self.previous_close * rng.uniform(0.97, 1.03), 2)
+        self.open = round(self.previous_close * rng.uniform(0.99, 1.01), 2)
+        self.day_high = max(self.last_price, self.open) * 1.01
+        self.day_low = min(self.last_price, self.open) * 0.99
+        self.last_volume = rng.randint(10_000, 10_000_000)
+        self.shares = rng.randint(10_000_000, 5_000_000_000)
+        self.market_cap = self.shares * self.last_price
+        self.currency = "INR" if symbol.endswith((".NS", ".BO")) else "USD"
+        self.exchange = "NSI" if symbol.endswith(".NS") else "NMS"
+        self.quote_type = "EQUITY"
+        self.timezone = "Asia/Kolkata" if self.currency == "INR" else "America/New_York"
+        self.fifty_day_average = self.previous_close * rng.uniform(0.9, 1.1)
+        self.two_hundred_day_average = self.previous_close * rng.uniform(0.8, 1.2)
+        self.ten_day_average_volume = self.last_volume
+        self.three_month_average_volume = self.last_volume
+        self.year_high = self.previous_close * 1.3
+        self.year_low = self.previous_close * 0.7
+        self.year_change = rng.uniform(-0.3, 0.5)
+
+
+class FakeTicker:
+    """Offline yfinance.Ticker with deterministic prices per symbol."""
+
+    def __init__(self, symbol: str, session: Any = None):
+        self.ticker = symbol.upper()
+        self.fast_info = _FakeFastInfo(self.ticker)
+
+    @property
+    def info(self) -> dict:
+        return {
+            "symbol": self.ticker,
+            "shortName": self.ticker.split(".")[0],
+            "currentPrice": self.fast_info.last_price,
+            "previousClose": self.fast_info.previous_close,
+            "marketCap": self.fast_info.market_cap,
+            "currency": self.fast_info.currency,
+        }
+
+    def history(self, period: str = "1mo", interval: str = "1d", **kwargs):
+        import pandas as pd
+
+        days = {"1d": 1, "5d": 5, "1mo": 22, "3mo": 66, "6mo": 126, "1y": 252}.get(
+            period, 22
+        )
+        rng = _seeded(f"{self.ticker}:{period}")
+        close = [self.fast_info.previous_close]
+        for _ in range(days - 1):
+            close.append(close[-1] * (1 + rng.gauss(0, 0.01)))
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+        return pd.DataFrame(
+            {
+                "Open": close,
+                "High": [c * 1.01 for c in close],
+                "Low": [c * 0.99 for c in close],
+                "Close": close,
+                "Volume": [self.fast_info.last_volume] * days,
+            },
+            index=index,
+        )
+
+
+def install_fake_yfinance() -> None:
+    """Routes every `yfinance.Ticker(...)` in the app to FakeTicker."""
+    yfinance.Ticker = FakeTicker
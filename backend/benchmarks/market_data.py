@@ -0,0 +1,435 @@
+"""
+Fixture-replay benchmarks for the market data and portfolio valuation paths.
+
+Yahoo Finance and FX responses are replayed from benchmarks/fixtures, so runs
+are offline and repeatable. Each benchmark runs for watchlists or portfolios
+of 10, 100 and 1,000 symbols and records wall time, allocations (tracemalloc)
+and the number of upstream calls. The JSON report can be diffed between
+commits with --compare.
+
+    cd backend
+    python -m benchmarks.market_data --output report.json
+    python -m benchmarks.market_data --compare report.json
+    python -m benchmarks.market_data --record RELIANCE.NS TCS.NS ...  # needs network
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+YAHOO_FIXTURE = FIXTURES_DIR / "yahoo.json"
+FX_FIXTURE = FIXTURES_DIR / "fx.json"
+DEFAULT_SIZES = (10, 100, 1000)
+
+# Modules under test read these at import time.
+for _name in ("FIXER_API_KEY", "EXCHANGERATE_API_KEY", "GOOGLE_GEMINI_API_KEY"):
+    os.environ.setdefault(_name, "offline-benchmark")
+
+
+# --- Replay layer ---------------------------------------------------------------
+
+
+class Replay:
+    """
+    Serves recorded Yahoo and FX responses and counts upstream calls. Symbols
+    beyond the recorded set are aliases of recorded ones, so a 1,000-symbol
+    watchlist has 1,000 distinct tickers backed by the same fixture data.
+    """
+
+    def __init__(self, yahoo: dict, fx: dict):
+        self.records = yahoo["symbols"]
+        self.fx = fx
+        self.aliases: Dict[str, str] = {}
+        self.calls: Counter = Counter()
+
+    def symbols(self, count: int) -> List[str]:
+        recorded = sorted(self.records)
+        symbols = []
+        for i in range(count):
+            base = recorded[i % len(recorded)]
+            if i < len(recorded):
+                symbol = base
+            else:
+                root, dot, suffix = base.partition(".")
+                symbol = f"{root}{i}{dot}{suffix}"
+            self.aliases[symbol] = base
+            symbols.append(symbol)
+        return symbols
+
+    def record_for(self, symbol: str) -> dict:
+        symbol = symbol.upper()
+        return self.records[self.aliases.get(symbol, symbol)]
+
+    def install(self) -> None:
+        import requests
+        import yfinance
+
+        from app.chat_provider.extra_functions import exchange
+
+        replay = self
+
+        class ReplayFastInfo:
+            def __init__(self, values: dict):
+                self._values = values
+
+            def __getattr__(self, name):
+                if name.startswith("_") or name not in self._values:
+                    raise AttributeError(name)
+                replay.calls[f"fast_info.{name}"] += 1
+                return self._values[name]
+
+            def toJSON(self):
+                replay.calls["fast_info.toJSON"] += 1
+                return json.dumps(self._values)
+
+        class ReplayTicker:
+            def __init__(self, symbol, session=None):
+                replay.calls["Ticker"] += 1
+                self.ticker = symbol.upper()
+                self._record = replay.record_for(self.ticker)
+                self.fast_info = ReplayFastInfo(self._record["fast_info"])
+
+            @property
+            def info(self):
+                replay.calls["info"] += 1
+                return dict(self._record["info"])
+
+            def history(self, period="1mo", interval="1d", **kwargs):
+                replay.calls["history"] += 1
+                return replay.frame(self.ticker)
+
+        def download(tickers, *args, **kwargs):
+            replay.calls["download"] += 1
+            return replay.frame(tickers if isinstance(tickers, str) else tickers[0])
+
+        class ReplayResponse:
+            def __init__(self, payload):
+                self._payload = payload
+
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return self._payload
+
+        class ReplayRequests:
+            RequestException = requests.RequestException
+
+            @staticmethod
+            def get(url, *args, **kwargs):
+                replay.calls["fx"] += 1
+                return ReplayResponse(replay.fx)
+
+        yfinance.Ticker = ReplayTicker
+        yfinance.download = download
+        exchange.requests = ReplayRequests
+
+    def frame(self, symbol: str):
+        import pandas as pd
+
+        rows = self.record_for(symbol)["download"]
+        frame = pd.DataFrame(rows["data"], columns=rows["columns"])
+        frame.index = pd.to_datetime(rows["index"])
+        frame.index.name = "Date"
+        return frame
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return list(self._rows)
+
+    def first(self):
+        return self._rows[0] if self._rows else None
+
+
+class FixtureSession:
+    """AsyncSession stand-in that answers every query with fixed rows."""
+
+    def __init__(self, rows):
+        self._rows = rows
+
+    async def execute(self, stmt):
+        return _Result(self._rows)
+
+
+# --- Benchmarks -------------------------------------------------------------------
+
+
+def _bench_snapshot(replay: Replay, size: int) -> Callable:
+    from app.chat_provider.tools.finance_tools import (
+        MAX_SNAPSHOT_SYMBOLS,
+        get_stock_snapshot,
+    )
+    from app.chat_provider.utils.quote_cache import quote_cache
+
+    symbols = replay.symbols(size)
+
+    def run():
+        quote_cache.clear()
+
+        async def fetch():
+            for i in range(0, len(symbols), MAX_SNAPSHOT_SYMBOLS):
+                await get_stock_snapshot.ainvoke(
+                    {"symbols": symbols[i : i + MAX_SNAPSHOT_SYMBOLS]}
+                )
+
+        asyncio.run(fetch())
+
+    return run
+
+
+def _bench_charts(replay: Replay, size: int) -> Callable:
+    from app.chat_provider.extra_functions.charts import get_charts_data
+
+    symbols = replay.symbols(size)
+
+    def run():
+        for symbol in symbols:
+            get_charts_data(symbol)
+
+    return run
+
+
+def _bench_dashboard_stocks(replay: Replay, size: int) -> Callable:
+    from app.api import dashboard
+    from app.api.api_models import Stock, User
+
+    dashboard.redis_client = None
+    user = User(id=1, username="bench")
+    db = FixtureSession(
+        [Stock(user_id=1, symbol=symbol) for symbol in replay.symbols(size)]
+    )
+
+    def run():
+        asyncio.run(dashboard.get_stocks(current_user=user, db=db))
+
+    return run
+
+
+def _bench_portfolio(replay: Replay, size: int) -> Callable:
+    from app.api import portfolio as portfolio_api
+    from app.api.api_models import Asset, Portfolio, User
+
+    async def no_summary(**kwargs):
+        return ""
+
+    portfolio_api.redis_client = None
+    # The LLM summary is out of scope; this measures quotes, FX and valuation.
+    portfolio_api.generate_ai_portfolio_summary = no_summary
+    user = User(id=1, username="bench")
+    portfolio = Portfolio(id=uuid.uuid4(), user_id=1, name="Benchmark")
+    portfolio.assets = [
+        Asset(
+            identifier=symbol,
+            asset_type="Stock",
+            quantity=10 + i % 7,
+            purchase_price=100.0 + i,
+            purchase_date=datetime.date(2024, 1, 1),
+        )
+        for i, symbol in enumerate(replay.symbols(size))
+    ]
+    db = FixtureSession([portfolio])
+
+    def run():
+        asyncio.run(
+            portfolio_api.get_portfolio(
+                portfolio_id=str(portfolio.id), current_user=user, db=db
+            )
+        )
+
+    return run
+
+
+BENCHMARKS = {
+    "finance_tools.get_stock_snapshot": _bench_snapshot,
+    "charts.get_charts_data": _bench_charts,
+    "dashboard.get_stocks": _bench_dashboard_stocks,
+    "portfolio.get_portfolio": _bench_portfolio,
+}
+
+
+def measure(replay: Replay, name: str, size: int, repeat: int) -> dict:
+    run = BENCHMARKS[name](replay, size)
+    quiet = contextlib.redirect_stdout(io.StringIO())
+
+    # Counted on a dedicated run so counts are per call, not per repeat.
+    replay.calls.clear()
+    with quiet:
+        run()
+    calls = dict(sorted(replay.calls.items()))
+
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "benchmark": name,
+        "size": size,
+        "repeat": repeat,
+        "wall_ms": {
+            "min": round(timings[0] * 1000, 3),
+            "median": round(statistics.median(timings) * 1000, 3),
+            "max": round(timings[-1] * 1000, 3),
+        },
+        "alloc_peak_kb": round(peak / 1024, 1),
+        "alloc_retained_kb": round(current / 1024, 1),
+        "upstream_calls": calls,
+        "upstream_calls_total": sum(calls.values()),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_suite(sizes, names, repeat) -> dict:
+    replay = Replay(
+        json.loads(YAHOO_FIXTURE.read_text()), json.loads(FX_FIXTURE.read_text())
+    )
+    replay.install()
+    results = []
+    for name in names:
+        for size in sizes:
+            result = measure(replay, name, size, repeat)
+            results.append(result)
+            print(
+                f"{name:<36}{size:>6}  median {result['wall_ms']['median']:>10.2f} ms"
+                f"  peak {result['alloc_peak_kb']:>10.1f} KiB"
+                f"  calls {result['upstream_calls_total']:>7}"
+            )
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict) -> None:
+    previous = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    print(f"\nAgainst {baseline.get('commit', 'baseline')}:")
+    for result in report["results"]:
+        before = previous.get((result["benchmark"], result["size"]))
+        if before is None:
+            continue
+        ratio = result["wall_ms"]["median"] / max(before["wall_ms"]["median"], 1e-9)
+        calls = result["upstream_calls_total"] - before["upstream_calls_total"]
+        print(
+            f"{result['benchmark']:<36}{result['size']:>6}  time x{ratio:.2f}"
+            f"  calls {calls:+d}"
+        )
+
+
+# --- Recording ----------------------------------------------------------------------
+
+
+def record(symbols: List[str]) -> None:
+    """Captures live Yahoo and FX responses into the fixture files."""
+    import requests
+    import yfinance
+
+    from app.chat_provider.extra_functions.exchange import FIXER_API_KEY
+    from app.chat_provider.utils.quote_cache import FAST_INFO_FIELDS
+
+    end = datetime.date.today()
+    start = end - datetime.timedelta(days=365)
+    records = {}
+    for symbol in symbols:
+        ticker = yfinance.Ticker(symbol)
+        fast_info = {}
+        for field, attribute in FAST_INFO_FIELDS.items():
+            try:
+                fast_info[field] = getattr(ticker.fast_info, attribute)
+            except Exception:
+                fast_info[field] = None
+        frame = yfinance.download(symbol, start=str(start), end=str(end))
+        if hasattr(frame.columns, "levels"):
+            frame.columns = frame.columns.get_level_values(0)
+        records[symbol.upper()] = {
+            "fast_info": fast_info,
+            "info": ticker.info,
+            "download": {
+                "columns": list(frame.columns),
+                "index": [d.strftime("%Y-%m-%d") for d in frame.index],
+                "data": frame.round(4).values.tolist(),
+            },
+        }
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    YAHOO_FIXTURE.write_text(
+        json.dumps({"source": "yfinance", "symbols": records}, default=str)
+    )
+    fx = requests.get(
+        f"http://data.fixer.io/api/latest?access_key={FIXER_API_KEY}", timeout=10
+    ).json()
+    FX_FIXTURE.write_text(json.dumps(fx, indent=2))
+    print(f"Recorded {len(records)} symbols to {FIXTURES_DIR}")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        choices=sorted(BENCHMARKS),
+        help="Run only these benchmarks (repeatable)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--record", nargs="+", metavar="SYMBOL")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record)
+        return
+
+    report = run_suite(args.sizes, args.benchmark or list(BENCHMARKS), args.repeat)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    if args.compare:
+        compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()
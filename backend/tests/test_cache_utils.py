@@ -0,0 +1,75 @@
+import pytest
+
+from app.chat_provider.utils import cache_utils
+from app.chat_provider.utils.cache_utils import (
+    SimilarityIndex,
+    TTLCache,
+    normalize_query,
+    query_hash,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_utils.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_normalize_query_drops_case_punctuation_and_filler():
+    assert normalize_query("  Hi, what's the P/E of INFY?? please ") == (
+        "what s the p e of infy"
+    )
+    assert normalize_query("Growth of 12.5% p.a.") == "growth of 12.5% p.a"
+
+
+def test_query_hash_ignores_trivial_rephrasing_but_not_extra_parts():
+    assert query_hash("What is a P/E ratio?") == query_hash("what is a p/e ratio")
+    assert query_hash("what is a p/e ratio", "user-1") != query_hash(
+        "what is a p/e ratio", "user-2"
+    )
+
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    clock[0] += 59
+    assert cache.get("a") == 1
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_cache_evicts_least_recently_used(clock):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.evictions == 1
+
+
+def test_ttl_cache_skips_non_positive_ttl():
+    cache = TTLCache()
+    cache.set("a", 1, ttl=0)
+    assert "a" not in cache
+
+
+def test_similarity_index_matches_near_duplicates_only():
+    index = SimilarityIndex(threshold=0.8)
+    index.add("k1", "what is the current price of reliance industries")
+    match = index.search("What's the current price of Reliance Industries?")
+    assert match is not None and match[0] == "k1"
+    assert index.search("how do mutual fund expense ratios work") is None
+
+
+def test_similarity_index_is_bounded():
+    index = SimilarityIndex(threshold=0.5, maxsize=2)
+    for key in ("a", "b", "c"):
+        index.add(key, f"query {key}")
+    assert len(index) == 2
+    index.remove("c")
+    assert len(index) == 1
@@ -0,0 +1,76 @@
+import datetime
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.api.api_models import Base, ChatMessage
+from app.api.chat_history import (
+    decode_history_cursor,
+    encode_history_cursor,
+    history_page_query,
+)
+
+SESSION_ID = uuid.uuid4()
+T0 = datetime.datetime(2026, 10, 19, 9, 30, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[ChatMessage.__table__])
+    with Session(engine) as session:
+        # Messages 2-4 were saved within the same clock tick.
+        offsets = [0, 1, 1, 1, 2]
+        for i, offset in enumerate(offsets, start=1):
+            session.add(
+                ChatMessage(
+                    id=i,
+                    session_id=SESSION_ID,
+                    sender="user",
+                    message=f"m{i}",
+                    timestamp=T0 + datetime.timedelta(seconds=offset),
+                )
+            )
+        session.add(
+            ChatMessage(
+                id=6, session_id=uuid.uuid4(), sender="user", message="x", timestamp=T0
+            )
+        )
+        session.commit()
+        yield session
+
+
+def page(db, before, limit):
+    rows = db.execute(history_page_query(SESSION_ID, before, limit)).scalars().all()
+    # SQLite drops the timezone the API serializes.
+    utc = datetime.timezone.utc
+    return [
+        {"id": m.id, "timestamp": m.timestamp.replace(tzinfo=utc).isoformat()}
+        for m in rows
+    ][::-1]
+
+
+def test_pages_cover_equal_timestamps_without_gaps_or_repeats(db):
+    seen = []
+    before = None
+    while True:
+        messages = page(db, before, 2)
+        seen = [m["id"] for m in messages] + seen
+        if len(messages) < 2:
+            break
+        before = decode_history_cursor(encode_history_cursor(messages[0]))
+    assert seen == [1, 2, 3, 4, 5]
+
+
+def test_cursor_round_trip():
+    message = {"id": 42, "timestamp": T0.isoformat()}
+    assert decode_history_cursor(encode_history_cursor(message)) == (T0, 42)
+    assert decode_history_cursor("2026-10-19T09:30:00_7") == (T0, 7)
+
+
+@pytest.mark.parametrize("cursor", ["", "2026-10-19T09:30:00", "yesterday_3"])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_history_cursor(cursor)
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.api import chat_runs
+from app.api.chat_runs import ChatRunStore
+
+
+class UnreachableRedis:
+    def pipeline(self, transaction=True):
+        raise ConnectionError("redis is down")
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr(chat_runs, "CHAT_RUN_FOLLOW_BLOCK_MS", 10)
+    monkeypatch.setattr(chat_runs, "CHAT_RUN_STALL_CHECK_POLLS", 2)
+
+
+async def follow_all(store, run_id):
+    return [item async for item in store.follow(run_id) if item[1] is not None]
+
+
+def test_follow_ends_a_run_whose_executor_stopped():
+    async def run():
+        store = ChatRunStore(UnreachableRedis())
+        await store.create("r1", 1, "s1", "hello")
+        await store.publish("r1", {"type": "session"})
+        store._local["r1"].alive_until = 0.0
+        return await follow_all(store, "r1")
+
+    events = asyncio.run(run())
+    assert [event["type"] for _, event in events] == ["session", "error"]
+    # Published, so a later resume sees the run as finished.
+    assert events[-1][0] == "2-0"
+
+
+def test_follow_keeps_waiting_while_the_run_beats():
+    async def run():
+        store = ChatRunStore(UnreachableRedis())
+        await store.create("r1", 1, "s1", "hello")
+
+        async def finish_later():
+            await asyncio.sleep(0.1)
+            await store.publish("r1", {"type": "complete"})
+
+        asyncio.create_task(finish_later())
+        return await follow_all(store, "r1")
+
+    events = asyncio.run(run())
+    assert [event["type"] for _, event in events] == ["complete"]
+
+
+def test_follow_gives_up_after_the_max_run_time(monkeypatch):
+    monkeypatch.setattr(chat_runs, "CHAT_RUN_MAX_SECONDS", 0)
+
+    async def run():
+        store = ChatRunStore(UnreachableRedis())
+        await store.create("r1", 1, "s1", "hello")
+        return await follow_all(store, "r1")
+
+    events = asyncio.run(run())
+    assert [event["type"] for _, event in events] == ["error"]
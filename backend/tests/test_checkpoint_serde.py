@@ -0,0 +1,114 @@
+import os
+import subprocess
+import sys
+import textwrap
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph
+
+from app.chat_provider.utils.checkpoint_serde import (
+    CheckpointText,
+    CompressingSerializer,
+    TextValue,
+)
+
+LONG_TEXT = "Infosys Q2 results beat estimates. " * 400
+
+
+def test_small_values_are_stored_as_is():
+    serde = CompressingSerializer(min_bytes=4096)
+    value = {"needs_web_search": True, "query": "price of TCS"}
+    stored = serde.dumps_typed(value)
+    assert stored == JsonPlusSerializer().dumps_typed(value)
+    assert serde.loads_typed(stored) == value
+
+
+def test_large_values_round_trip_compressed():
+    serde = CompressingSerializer(min_bytes=4096)
+    messages = [HumanMessage(content="summarize"), AIMessage(content=LONG_TEXT)]
+    type_, data = serde.dumps_typed(messages)
+    assert type_.endswith("+zlib")
+    assert len(data) < len(LONG_TEXT) / 10
+    assert serde.loads_typed((type_, data)) == messages
+
+
+def test_incompressible_values_are_stored_as_is():
+    serde = CompressingSerializer(min_bytes=16)
+    noise = os.urandom(4096)
+    type_, data = serde.dumps_typed(noise)
+    assert not type_.endswith("+zlib")
+    assert serde.loads_typed((type_, data)) == noise
+
+
+def test_rows_written_before_compression_still_load():
+    old_row = JsonPlusSerializer().dumps_typed([AIMessage(content=LONG_TEXT)])
+    loaded = CompressingSerializer().loads_typed(old_row)
+    assert loaded == [AIMessage(content=LONG_TEXT)]
+
+
+class ReportState(TypedDict):
+    topic: str
+    final_report: Annotated[str, TextValue]
+
+
+class ReportOutput(TypedDict):
+    final_report: str
+
+
+def test_text_channels_checkpoint_through_the_serializer():
+    builder = StateGraph(ReportState, output=ReportOutput)
+    builder.add_node("write", lambda state: {"final_report": LONG_TEXT})
+    builder.add_edge(START, "write")
+    builder.add_edge("write", END)
+    saver = InMemorySaver(serde=CompressingSerializer())
+    graph = builder.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": "report"}}
+
+    assert graph.invoke({"topic": "INFY"}, config) == {"final_report": LONG_TEXT}
+    checkpoint = saver.get(config)
+    # Wrapped, so savers never keep it inline as a plain str.
+    assert checkpoint["channel_values"]["final_report"] == CheckpointText(LONG_TEXT)
+    assert checkpoint["channel_values"]["topic"] == "INFY"
+    assert graph.get_state(config).values["final_report"] == LONG_TEXT
+
+
+def test_text_channels_load_plain_strings_from_older_checkpoints():
+    channel = TextValue(str).from_checkpoint("old report")
+    assert channel.get() == "old report"
+    assert channel.checkpoint() == CheckpointText("old report")
+
+
+def test_text_channels_round_trip_with_strict_msgpack():
+    # The strict flag is read when langgraph is imported, so check in a fresh process.
+    script = textwrap.dedent(
+        """
+        from langchain_core.messages import AIMessage
+        from app.chat_provider.models.deepsearch_models import Section
+        from app.chat_provider.utils.checkpoint_serde import (
+            CheckpointText,
+            CompressingSerializer,
+            TextValue,
+        )
+
+        serde = CompressingSerializer(min_bytes=16)
+        text = "Infosys Q2 results beat estimates. " * 400
+        loaded = serde.loads_typed(serde.dumps_typed(CheckpointText(text)))
+        assert loaded == CheckpointText(text), type(loaded)
+        assert TextValue(str).from_checkpoint(loaded).get() == text
+        section = Section(name="a", description="b", research=True, content="c")
+        assert serde.loads_typed(serde.dumps_typed([section])) == [section]
+        messages = [AIMessage(content=text)]
+        assert serde.loads_typed(serde.dumps_typed(messages)) == messages
+        """
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env={**os.environ, "LANGGRAPH_STRICT_MSGPACK": "true"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,108 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from app.chat_provider.utils.financial_calculators import (
+    amortization_schedule,
+    cagr,
+    compound_interest,
+    emi,
+    max_drawdown,
+    sip_future_value,
+    xirr,
+)
+
+
+def test_cagr_doubling_over_five_years():
+    assert cagr(100, 200, 5) == pytest.approx(2 ** (1 / 5) - 1)
+
+
+@pytest.mark.parametrize("args", [(0, 100, 1), (100, -1, 1), (100, 200, 0)])
+def test_cagr_rejects_invalid_inputs(args):
+    with pytest.raises(ValueError):
+        cagr(*args)
+
+
+def test_xirr_single_year_matches_closed_form():
+    # 2024 is a leap year: 366 days between the flows, Actual/365.
+    rate = xirr([-1000, 1100], [datetime.date(2024, 1, 1), datetime.date(2025, 1, 1)])
+    assert rate == pytest.approx(1.1 ** (365 / 366) - 1, abs=1e-9)
+
+
+def test_xirr_irregular_flows_have_zero_npv():
+    dates = [
+        datetime.date(2023, 1, 15),
+        datetime.date(2023, 6, 3),
+        datetime.date(2024, 2, 20),
+        datetime.date(2024, 11, 30),
+    ]
+    amounts = [-50000, -25000, 10000, 80000]
+    rate = xirr(amounts, dates)
+    years = np.array([(d - dates[0]).days for d in dates]) / 365.0
+    assert np.sum(np.array(amounts) / (1 + rate) ** years) == pytest.approx(0, abs=1e-6)
+
+
+def test_xirr_falls_back_to_bisection_for_large_losses():
+    # A 99% loss over exactly 365 days; Newton steps below -100% from the guess.
+    rate = xirr([-1000, 10], [datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)])
+    assert rate == pytest.approx(-0.99, abs=1e-6)
+
+
+@pytest.mark.parametrize("amounts", [[1000, 1100], [-1000, -1100], [-1000]], ids=str)
+def test_xirr_rejects_one_sided_flows(amounts):
+    dates = [datetime.date(2024, 1, 1), datetime.date(2025, 1, 1)][: len(amounts)]
+    with pytest.raises(ValueError):
+        xirr(amounts, dates)
+
+
+def test_sip_future_value_paid_at_month_start():
+    result = sip_future_value(1000, 12, 1)
+    expected = 1000 * 1.01 * (1.01**12 - 1) / 0.01
+    assert result["invested"] == pytest.approx(12000)
+    assert result["future_value"] == pytest.approx(expected)
+    assert result["gains"] == pytest.approx(expected - 12000)
+
+
+def test_sip_step_up_raises_instalment_each_year():
+    result = sip_future_value(1000, 0, 2, annual_step_up_percent=10)
+    assert result["invested"] == pytest.approx(12 * 1000 + 12 * 1100)
+    assert result["future_value"] == pytest.approx(result["invested"])
+
+
+def test_emi_matches_standard_formula():
+    assert emi(100000, 12, 1) == pytest.approx(8884.88, abs=0.01)
+
+
+def test_emi_without_interest_splits_principal_evenly():
+    assert emi(120000, 0, 1) == pytest.approx(10000)
+
+
+def test_amortization_schedule_pays_off_the_loan():
+    schedule = amortization_schedule(500000, 9, 5)
+    assert len(schedule["month"]) == 60
+    assert schedule["balance"][-1] == pytest.approx(0, abs=1e-6)
+    assert schedule["principal"].sum() == pytest.approx(500000)
+    np.testing.assert_allclose(
+        schedule["interest"] + schedule["principal"], schedule["emi"]
+    )
+
+
+def test_compound_interest_annual_and_monthly():
+    assert compound_interest(1000, 10, 2)["amount"] == pytest.approx(1210)
+    monthly = compound_interest(1000, 12, 1, compounds_per_year=12)
+    assert monthly["interest"] == pytest.approx(1000 * (1.01**12 - 1))
+
+
+def test_max_drawdown_uses_running_peak():
+    result = max_drawdown(
+        [100, 120, 90, 130, 65], labels=["jan", "feb", "mar", "apr", "may"]
+    )
+    assert result["max_drawdown"] == pytest.approx(-0.5)
+    assert (result["peak"], result["trough"]) == ("apr", "may")
+    assert (result["peak_value"], result["trough_value"]) == (130, 65)
+
+
+def test_max_drawdown_rejects_non_positive_values():
+    with pytest.raises(ValueError):
+        max_drawdown([100, 0, 50])
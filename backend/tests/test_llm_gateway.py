@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+
+from app.chat_provider.utils import llm_gateway
+from app.chat_provider.utils.llm_gateway import LLMGateway
+
+
+def test_blocking_calls_respect_the_lane_concurrency_cap(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_GATEWAY_MAX_CONCURRENCY", 2)
+    gateway = LLMGateway()
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def call():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return "ok"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(gateway.call("test-model", call)))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["ok"] * 6
+    assert peak == 2
+
+
+def test_async_and_blocking_calls_share_the_lane_cap(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "LLM_GATEWAY_MAX_CONCURRENCY", 2)
+    gateway = LLMGateway()
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+
+    def enter():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+
+    def leave():
+        nonlocal running
+        with lock:
+            running -= 1
+
+    def blocking_call():
+        enter()
+        time.sleep(0.05)
+        leave()
+        return "sync"
+
+    async def async_call():
+        enter()
+        await asyncio.sleep(0.05)
+        leave()
+        return "async"
+
+    async def run():
+        threads = [
+            asyncio.to_thread(gateway.call, "test-model", blocking_call)
+            for _ in range(3)
+        ]
+        calls = [gateway.acall("test-model", async_call) for _ in range(3)]
+        return await asyncio.gather(*threads, *calls)
+
+    assert asyncio.run(run()) == ["sync"] * 3 + ["async"] * 3
+    assert peak == 2
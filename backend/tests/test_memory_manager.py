@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.chat_provider.service import memory_manager
+from app.chat_provider.service.memory_manager import ConversationMemory
+
+
+class SummaryModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=f"summary {self.calls}")
+
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(memory_manager, "_redis", lambda: None)
+    memory_manager._local_folds.clear()
+    memory_manager._inflight.clear()
+
+
+def conversation(turns):
+    messages = []
+    for i in range(turns):
+        messages += [HumanMessage(content=f"q{i}"), AIMessage(content=f"a{i}")]
+    return messages
+
+
+def config(thread_id="t1"):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_update_never_calls_the_model():
+    model = SummaryModel()
+    memory = ConversationMemory(model, max_turns=2, min_turns=1)
+    state = {"messages": conversation(4)}
+    assert asyncio.run(memory.update(state, config())) == {}
+    assert model.calls == 0
+
+
+def test_fold_prepared_after_a_turn_is_applied_on_the_next():
+    model = SummaryModel()
+    memory = ConversationMemory(model, max_turns=2, min_turns=1)
+    state = {"messages": conversation(3)}
+    asyncio.run(memory.prepare_fold("t1", state))
+    assert model.calls == 1
+
+    state["messages"] = state["messages"] + [HumanMessage(content="q3")]
+    assert asyncio.run(memory.update(state, config())) == {
+        "conversation_summary": "summary 1",
+        "summarized_message_count": 4,
+    }
+    # Applied once; other threads never see it.
+    assert asyncio.run(memory.update(state, config())) == {}
+    assert asyncio.run(memory.update(state, config("t2"))) == {}
+
+
+def test_stale_fold_is_discarded():
+    memory = ConversationMemory(SummaryModel(), max_turns=2, min_turns=1)
+    asyncio.run(memory.prepare_fold("t1", {"messages": conversation(3)}))
+    state = {"messages": conversation(4), "summarized_message_count": 2}
+    assert asyncio.run(memory.update(state, config())) == {}
+
+
+def test_nothing_to_fold_within_the_window():
+    model = SummaryModel()
+    memory = ConversationMemory(model, max_turns=2, min_turns=1)
+    asyncio.run(memory.prepare_fold("t1", {"messages": conversation(2)}))
+    assert model.calls == 0
+
+
+def test_fold_is_shared_across_instances():
+    # Each request builds its own ChatService, and with it its own memory.
+    asyncio.run(
+        ConversationMemory(SummaryModel(), max_turns=2, min_turns=1).prepare_fold(
+            "t1", {"messages": conversation(3)}
+        )
+    )
+    state = {"messages": conversation(3) + [HumanMessage(content="q3")]}
+    memory = ConversationMemory(SummaryModel(), max_turns=2, min_turns=1)
+    assert asyncio.run(memory.update(state, config())) == {
+        "conversation_summary": "summary 1",
+        "summarized_message_count": 4,
+    }
+
+
+def test_schedule_fold_runs_once_per_thread_across_instances():
+    model = SummaryModel()
+    state = {"messages": conversation(3)}
+
+    async def run():
+        first = ConversationMemory(model, max_turns=2, min_turns=1)
+        second = ConversationMemory(model, max_turns=2, min_turns=1)
+        task = first.schedule_fold("t1", state)
+        assert second.schedule_fold("t1", state) is None
+        await task
+
+    asyncio.run(run())
+    assert model.calls == 1
+
+
+def test_window_is_enforced_before_any_fold_is_applied():
+    memory = ConversationMemory(SummaryModel(), max_turns=2, token_budget=6000)
+    messages = conversation(5)
+    assert memory.build_messages({"messages": messages}) == messages[-4:]
+
+
+def test_window_drops_turns_over_the_token_budget():
+    memory = ConversationMemory(SummaryModel(), max_turns=6, token_budget=50)
+    messages = [HumanMessage(content="x" * 400), AIMessage(content="y" * 400)]
+    messages += conversation(2)
+    assert memory.build_messages({"messages": messages}) == messages[-4:]
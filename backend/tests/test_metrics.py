@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+RECORD = """
+from app.chat_provider.utils.metrics import Counter, Gauge, mark_process_dead
+runs = Counter("zenfi_test_runs_total", "Runs.", ["lane"])
+running = Gauge("zenfi_test_running", "Running.", ["lane"], multiprocess_mode="livesum")
+runs.labels(lane="quick").inc(2)
+running.labels(lane="quick").set(1)
+if {dead}:
+    mark_process_dead()
+"""
+
+RENDER = """
+import sys
+from app.chat_provider.utils.metrics import render_metrics
+sys.stdout.write(render_metrics().decode())
+"""
+
+
+def run(code, metrics_dir):
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(metrics_dir)}
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout
+
+
+def test_metrics_are_merged_across_processes(tmp_path):
+    run(RECORD.format(dead=False), tmp_path)
+    run(RECORD.format(dead=False), tmp_path)
+    text = run(RENDER, tmp_path)
+    assert 'zenfi_test_runs_total{lane="quick"} 4.0' in text
+    assert 'zenfi_test_running{lane="quick"} 2.0' in text
+
+
+def test_live_gauges_drop_processes_that_shut_down(tmp_path):
+    run(RECORD.format(dead=False), tmp_path)
+    run(RECORD.format(dead=True), tmp_path)
+    text = run(RENDER, tmp_path)
+    assert 'zenfi_test_runs_total{lane="quick"} 4.0' in text
+    assert 'zenfi_test_running{lane="quick"} 1.0' in text
@@ -0,0 +1,88 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.api_models import PortfolioDigest
+from app.api.portfolio_digest_rules import (
+    holdings_fingerprint,
+    needs_regeneration,
+    value_assets,
+)
+
+NOW = datetime.datetime(2026, 10, 19, 10, 15, tzinfo=datetime.timezone.utc)
+
+
+def asset(identifier, quantity, purchase_price, asset_type="Stock"):
+    return SimpleNamespace(
+        identifier=identifier,
+        asset_type=asset_type,
+        quantity=quantity,
+        purchase_price=purchase_price,
+        purchase_date=datetime.date(2024, 4, 1),
+    )
+
+
+ASSETS = [asset("INFY.NS", 10, 1500.0), asset("AAPL", 2, 150.0)]
+QUOTES = {
+    "INFY.NS": {"last_price": 1600.0, "previous_close": 1580.0, "currency": "INR"},
+    "AAPL": {"last_price": 200.0, "previous_close": 210.0, "currency": "USD"},
+}
+
+
+def test_value_assets_converts_to_inr_and_totals():
+    details, value, day_gain, gain = value_assets(ASSETS, QUOTES, {"USD": 80.0})
+    infy, apple = details
+    assert infy["value_base"] == 16000.0
+    assert infy["day_gain_base"] == 200.0
+    assert infy["total_gain_percent"] == pytest.approx(6.6667, rel=1e-4)
+    assert apple["value_base"] == 32000.0
+    assert apple["day_gain_base"] == -1600.0
+    assert apple["day_gain_percent"] == pytest.approx(-4.7619, rel=1e-4)
+    assert (value, day_gain, gain) == (48000.0, -1400.0, 9000.0)
+
+
+def test_value_assets_skips_unpriced_and_non_stock_holdings():
+    holdings = [asset("TCS.NS", 5, 3000.0), asset("GOLD", 1, 5000.0, "Commodity")]
+    details, value, day_gain, gain = value_assets(holdings, {}, {})
+    assert [d["value_base"] for d in details] == [0.0, 0.0]
+    assert (value, day_gain, gain) == (0.0, 0.0, 0.0)
+
+
+def test_holdings_fingerprint_ignores_order():
+    assert holdings_fingerprint(ASSETS) == holdings_fingerprint(ASSETS[::-1])
+    assert holdings_fingerprint(ASSETS) != holdings_fingerprint(ASSETS[:1])
+
+
+def digest(**overrides):
+    fields = {
+        "holdings_fingerprint": "abc",
+        "total_value_inr": 100000.0,
+        "generated_at": NOW - datetime.timedelta(days=1),
+    }
+    fields.update(overrides)
+    return PortfolioDigest(**fields)
+
+
+def moved(percent):
+    return [{"day_gain_percent": percent}]
+
+
+def test_unchanged_portfolio_keeps_its_digest():
+    assert not needs_regeneration(digest(), "abc", moved(1.0), 101000.0, NOW)
+
+
+@pytest.mark.parametrize(
+    "stored, fingerprint, assets, value",
+    [
+        (None, "abc", moved(0), 100000.0),
+        (digest(), "changed", moved(0), 100000.0),
+        (digest(generated_at=NOW - datetime.timedelta(days=8)), "abc", moved(0), 1e5),
+        (digest(), "abc", moved(0), 97000.0),
+        (digest(), "abc", moved(-5.0), 100000.0),
+        (digest(total_value_inr=0.0), "abc", moved(0), 500.0),
+    ],
+    ids=["no-digest", "holdings", "age", "value", "asset-move", "first-value"],
+)
+def test_stale_digest_is_regenerated(stored, fingerprint, assets, value):
+    assert needs_regeneration(stored, fingerprint, assets, value, NOW)
@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from app.chat_provider.service.answer_cache import AnswerCache, is_time_insensitive
+from app.chat_provider.service.code_cache import PythonCodeCache, extract_parameters
+from app.chat_provider.service.routing_cache import RoutingCache
+from app.chat_provider.service.tool_memo import MemoizedToolNode
+from app.chat_provider.utils.cache_utils import TTLCache
+
+
+def test_routing_cache_merges_flags_per_query():
+    cache = RoutingCache(similarity_threshold=0)
+    assert cache.get_flag("latest news on infosys", "needs_web_search") is None
+    cache.set_flag("latest news on infosys", "needs_web_search", True)
+    cache.set_flag("Latest news on Infosys?", "needs_knowledge_base", False)
+    assert cache.get("latest news on infosys") == {
+        "needs_web_search": True,
+        "needs_knowledge_base": False,
+    }
+    # A flag that was never decided for this query is still a miss.
+    assert cache.get_flag("latest news on infosys", "needs_python_code") is None
+
+
+def test_routing_cache_serves_near_duplicates():
+    cache = RoutingCache(similarity_threshold=0.85)
+    cache.set_flag("what is the share price of tata motors today", "x", True)
+    assert cache.get_flag("what is the share price of tata motors now", "x") is True
+    assert cache.get_flag("explain how index funds work", "x") is None
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "What is a P/E ratio?",
+        "Explain the difference between ELSS and PPF",
+        "define CAGR",
+    ],
+)
+def test_educational_questions_are_cacheable(query):
+    assert is_time_insensitive(query)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "What is the price of INFY today?",
+        "What is RELIANCE doing?",
+        "Explain my portfolio",
+        "What is the repo rate in 2024?",
+        "Explain that again",
+        "Should I buy gold?",
+        "What is the EMI on 50 lakh at 8.5% for 20 years?",
+        "Explain how much 10000 a month grows to",
+        "What is a good return over several years?",
+    ],
+)
+def test_market_user_and_context_questions_are_not_cacheable(query):
+    assert not is_time_insensitive(query)
+
+
+def test_answer_cache_near_hit_requires_same_key_terms():
+    cache = AnswerCache(similarity_threshold=0.5)
+    assert cache.set("What is a P/E ratio?", "Price divided by earnings.")
+    assert cache.get("what is the P/E ratio") == "Price divided by earnings."
+    assert cache.get("What is a P/B ratio?") is None
+
+
+def test_answer_cache_refuses_ineligible_or_empty_answers():
+    cache = AnswerCache()
+    assert not cache.set("What is the price of TCS today?", "4000")
+    assert not cache.set("What is a P/E ratio?", "  ")
+    assert cache.get("What is the price of TCS today?") is None
+
+
+def test_extract_parameters_replaces_numbers_in_order():
+    assert extract_parameters("EMI for 10,00,000 at 8.5% for 20 years") == (
+        "emi for <n> at <n>% for <n> years",
+        [1000000.0, 8.5, 20.0],
+    )
+
+
+EMI_CODE = """principal = 1000000
+rate = 8
+years = 20
+r = rate / 1200
+print(principal * r / (1 - (1 + r) ** (-years * 12)))
+"""
+EMI_PARAMETERS = [
+    {"name": "principal", "value": 1000000},
+    {"name": "rate", "value": 8},
+    {"name": "years", "value": 20},
+]
+
+
+def test_code_cache_reuses_code_for_new_numbers():
+    cache = PythonCodeCache()
+    cache.set("EMI for 1000000 at 8% for 20 years", EMI_CODE, "ctx", EMI_PARAMETERS)
+    assert cache.get("emi for 1000000 at 8% for 20 years")["code"] == EMI_CODE
+
+    reused = cache.get("EMI for 2500000 at 9.5% for 15 years")
+    assert reused["context"] == "ctx"
+    assert "principal = 2500000\n" in reused["code"]
+    assert "rate = 9.5\n" in reused["code"]
+    assert "years = 15\n" in reused["code"]
+
+
+def test_code_cache_template_needs_every_number_bound():
+    cache = PythonCodeCache()
+    cache.set("EMI for 1000000 at 8% for 20 years", EMI_CODE, None, EMI_PARAMETERS[:2])
+    assert cache.get("EMI for 2500000 at 9.5% for 15 years") is None
+
+
+def test_code_cache_template_needs_unambiguous_bindings():
+    code = "principal = 100\nyears = 8\nrate = 8\nprint(principal * (1 + rate / 100) ** years)\n"
+    parameters = [
+        {"name": "principal", "value": 100},
+        {"name": "years", "value": 8},
+        {"name": "rate", "value": 8},
+    ]
+    cache = PythonCodeCache()
+    cache.set("100 at 8% for 8 years", code, None, parameters)
+    assert cache.get("100 at 8% for 8 years")["code"] == code
+    assert cache.get("100 at 9% for 15 years") is None
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        EMI_CODE.replace("rate = 8\n", "rate = 8 / 100 / 12\n"),
+        EMI_CODE.replace("principal = 1000000\n", "principal = 10 * 100000\n"),
+        EMI_CODE + "years = 30\n",
+    ],
+)
+def test_code_cache_template_needs_literal_assignments(code):
+    cache = PythonCodeCache()
+    cache.set("EMI for 1000000 at 8% for 20 years", code, None, EMI_PARAMETERS)
+    assert cache.get("EMI for 1000000 at 8% for 20 years")["code"] == code
+    assert cache.get("EMI for 2500000 at 9.5% for 15 years") is None
+
+def test_tool_memo_does_not_replay_error_strings():
+    calls = []
+
+    @tool
+    def get_stock_last_price(symbol: str) -> str:
+        """Returns the last price of a stock."""
+        calls.append(symbol)
+        if len(calls) == 1:
+            return f"Error retrieving stock price for {symbol}: timed out"
+        return "101.5"
+
+    node = MemoizedToolNode([get_stock_last_price], cache=TTLCache())
+    config = {"configurable": {"thread_id": "t1"}}
+
+    def ask():
+        call = {"name": "get_stock_last_price", "args": {"symbol": "TCS.NS"}}
+        message = AIMessage(content="", tool_calls=[{**call, "id": f"c{len(calls)}"}])
+        result = asyncio.run(node.ainvoke({"messages": [message]}, config))
+        return result["messages"][0].content
+
+    assert ask().startswith("Error")
+    assert ask() == "101.5"
+    assert ask() == "101.5"
+    assert len(calls) == 2
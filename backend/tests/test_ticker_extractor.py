@@ -0,0 +1,37 @@
+from app.chat_provider.utils.ticker_extractor import extract_tickers
+
+
+def test_symbols_and_names_in_order_of_appearance():
+    assert extract_tickers("Compare Infosys with TCS and hdfc bank") == [
+        "INFY.NS",
+        "TCS.NS",
+        "HDFCBANK.NS",
+    ]
+
+
+def test_exchange_qualified_symbols_are_kept_as_written():
+    assert extract_tickers("how did tatapower.ns and IRCTC.BO do?") == [
+        "TATAPOWER.NS",
+        "IRCTC.BO",
+    ]
+
+
+def test_longest_name_wins():
+    assert extract_tickers("Is SBI Life better than SBI?") == [
+        "SBILIFE.NS",
+        "SBIN.NS",
+    ]
+
+
+def test_us_symbols_have_no_suffix():
+    assert extract_tickers("NVDA vs apple") == ["NVDA", "AAPL"]
+
+
+def test_ignores_unknown_and_lowercase_symbols():
+    assert extract_tickers("what is the PE and EPS of itc") == []
+    assert extract_tickers("") == []
+
+
+def test_duplicates_removed_and_limit_applied():
+    text = "INFY infosys TCS WIPRO ITC LT"
+    assert extract_tickers(text, limit=3) == ["INFY.NS", "TCS.NS", "WIPRO.NS"]
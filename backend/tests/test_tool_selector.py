@@ -0,0 +1,137 @@
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.chat_provider.service.tool_selector import (
+    QUOTE_TOOLS,
+    TOOL_KEYWORDS,
+    WEB_SEARCH_TOOLS,
+    ToolSelector,
+)
+from app.chat_provider.tools.calculator_tools import CALCULATOR_TOOLS
+from app.chat_provider.tools.finance_tools import (
+    get_stock_history,
+    get_stock_income_statement,
+    get_stock_info,
+    get_stock_options_chain,
+    get_stock_snapshot,
+)
+
+CURRENT_EVENTS = "Useful for when you need to answer questions about current events."
+# Stand-ins with the names and descriptions of the LangChain community tools,
+# which need API keys or Deno to construct.
+OTHER_TOOLS = [
+    SimpleNamespace(
+        name="brave_search",
+        description="a search engine. useful for when you need to answer "
+        "questions about current events. input should be a search query.",
+    ),
+    SimpleNamespace(
+        name="duckduckgo_results_json",
+        description=f"A wrapper around Duck Duck Go Search. {CURRENT_EVENTS}",
+    ),
+    SimpleNamespace(
+        name="duckduckgo_search",
+        description=f"A wrapper around DuckDuckGo Search. {CURRENT_EVENTS}",
+    ),
+    SimpleNamespace(
+        name="get_current_datetime", description="Returns the current date and time."
+    ),
+    SimpleNamespace(
+        name="youtube_search",
+        description="search for youtube videos associated with a person.",
+    ),
+]
+TOOLS = [
+    get_stock_snapshot,
+    get_stock_history,
+    get_stock_income_statement,
+    get_stock_info,
+    get_stock_options_chain,
+    *OTHER_TOOLS,
+    *CALCULATOR_TOOLS,
+]
+
+
+@pytest.fixture
+def selector():
+    return ToolSelector(TOOLS, always=["get_current_datetime"])
+
+
+def selected(selector, query, **state):
+    messages = state.pop("messages", []) + [HumanMessage(content=query)]
+    return [tool.name for tool in selector.select({"messages": messages, **state})]
+
+
+def test_every_keyword_names_a_real_tool():
+    names = {tool.name for tool in TOOLS}
+    assert set(TOOL_KEYWORDS) <= names
+
+
+def test_headline_query_binds_web_search(selector):
+    names = selected(selector, "What are the latest headlines about the RBI policy?")
+    assert set(WEB_SEARCH_TOOLS) <= set(names)
+
+
+def test_company_news_binds_quotes_and_web_search(selector):
+    names = selected(selector, "latest news on Infosys")
+    assert set(QUOTE_TOOLS) <= set(names)
+    assert set(WEB_SEARCH_TOOLS) <= set(names)
+
+
+def test_unscored_query_falls_back_to_web_search(selector):
+    names = selected(selector, "hmm")
+    assert names[0] == "get_current_datetime"
+    assert set(WEB_SEARCH_TOOLS) <= set(names)
+
+
+def test_routing_flag_binds_web_search(selector):
+    query = "What is the EMI on a 20 lakh loan?"
+    assert not set(WEB_SEARCH_TOOLS) & set(selected(selector, query))
+    names = selected(selector, query, needs_web_search=True)
+    assert set(WEB_SEARCH_TOOLS) <= set(names)
+
+
+def test_recently_called_tools_stay_bound(selector):
+    history = [
+        HumanMessage(content="options for nifty"),
+        AIMessage(
+            content="",
+            tool_calls=[
+                {"name": "get_stock_options_chain", "args": {}, "id": "call-1"}
+            ],
+        ),
+    ]
+    names = selected(selector, "and for next month?", messages=history)
+    assert "get_stock_options_chain" in names
+
+
+def test_selection_is_capped(selector):
+    names = selected(
+        selector,
+        "latest news, price history, revenue, options chain and sip for TCS",
+        needs_web_search=True,
+    )
+    assert len(names) == selector.max_tools
+
+
+@pytest.mark.parametrize(
+    "query,tool_name",
+    [
+        (
+            "how much will 1 lakh grow to at 7% compounded quarterly in 5 years",
+            "calculate_compound_interest",
+        ),
+        ("maturity amount of a 2 lakh fd at 7.1% for 3 years", "calculate_compound_interest"),
+        ("what is the emi on a 50 lakh home loan at 8.5% for 20 years", "calculate_emi"),
+        ("monthly instalment for a 10 lakh car loan over 5 years", "calculate_emi"),
+        ("sip of 10000 a month for 15 years at 12%", "calculate_sip_future_value"),
+        ("5000 sip with 10% step-up for 10 years", "calculate_sip_future_value"),
+        ("cagr if 1 lakh became 3 lakh in 6 years", "calculate_cagr"),
+        ("xirr of these investments and withdrawals", "calculate_xirr"),
+        ("max drawdown of 100, 120, 90, 130, 80", "calculate_max_drawdown"),
+    ],
+)
+def test_calculation_queries_bind_their_calculator(selector, query, tool_name):
+    assert tool_name in selected(selector, query)
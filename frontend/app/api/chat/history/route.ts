@@ -19,24 +19,37 @@ export async function GET(request: Request) {
     )
   }
 
-  const response = await fetch(
-    `${process.env.NEXT_PUBLIC_BACKEND_API_URL}/chat/history?session_id=${sessionId}`,
-    {
-      method: 'GET',
-      headers: {
-        Authorization: `Bearer ${token}`
+  // The backend returns one page at a time, newest page first; follow the
+  // X-Next-Before cursor back to the start of the session.
+  let history: unknown[] = []
+  let before: string | null = null
+  do {
+    const params = new URLSearchParams({ session_id: sessionId })
+    if (before) {
+      params.set('before', before)
+    }
+    const response = await fetch(
+      `${process.env.NEXT_PUBLIC_BACKEND_API_URL}/chat/history?${params}`,
+      {
+        method: 'GET',
+        headers: {
+          Authorization: `Bearer ${token}`
+        }
       }
+    )
+
+    if (!response.ok) {
+      const error = await response.json()
+      return NextResponse.json(
+        { error: error.detail },
+        { status: response.status }
+      )
     }
-  )
 
-  if (!response.ok) {
-    const error = await response.json()
-    return NextResponse.json(
-      { error: error.detail },
-      { status: response.status }
-    )
-  }
+    const page = await response.json()
+    history = [...page, ...history]
+    before = response.headers.get('X-Next-Before')
+  } while (before)
 
-  const history = await response.json()
   return NextResponse.json(history)
 }